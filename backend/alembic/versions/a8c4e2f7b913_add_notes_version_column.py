@@ -0,0 +1,29 @@
+"""Add version column to notes for optimistic concurrency
+
+Revision ID: a8c4e2f7b913
+Revises: f2b9d4e6a1c3
+Create Date: 2026-10-18 17:05:12.448190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c4e2f7b913'
+down_revision: Union[str, Sequence[str], None] = 'f2b9d4e6a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default is stored in the catalog, so this does not rewrite the table
+    op.add_column('notes', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notes', 'version')
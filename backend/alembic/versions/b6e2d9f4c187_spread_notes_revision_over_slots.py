@@ -0,0 +1,68 @@
+"""Spread the notes_revision counter over slots
+
+Revision ID: b6e2d9f4c187
+Revises: a8c4e2f7b913
+Create Date: 2026-10-18 21:34:06.219583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d9f4c187'
+down_revision: Union[str, Sequence[str], None] = 'a8c4e2f7b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTES_REVISION_SLOTS = 16
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every writing transaction used to update the single notes_revision row
+    # and hold its lock until commit, serializing all writes to notes. Each
+    # connection now bumps the slot picked by its backend pid, so concurrent
+    # writers rarely share a row; the revision is the sum of the slots, read
+    # in the same snapshot as the notes it describes. Row 1 keeps the count
+    # reached so far, so the sum carries on from it.
+    op.execute(f"""
+        INSERT INTO notes_revision (id, revision)
+        SELECT slot, 0 FROM generate_series(0, {NOTES_REVISION_SLOTS - 1}) AS slot
+        ON CONFLICT (id) DO NOTHING
+    """)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION bump_notes_revision() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'TRUNCATE' THEN
+                IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+            UPDATE notes_revision SET revision = revision + 1 WHERE id = pg_backend_pid() % {NOTES_REVISION_SLOTS};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_notes_revision() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'TRUNCATE' THEN
+                IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+            UPDATE notes_revision SET revision = revision + 1 WHERE id = 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Fold the other slots into row 1 so the revision never goes backwards
+    op.execute("UPDATE notes_revision SET revision = (SELECT sum(revision) FROM notes_revision) WHERE id = 1")
+    op.execute("DELETE FROM notes_revision WHERE id <> 1")
@@ -0,0 +1,74 @@
+"""Add notes_revision change counter maintained by triggers
+
+Revision ID: c3f1a9d2e7b4
+Revises: 8caf0a8eaa64
+Create Date: 2026-10-18 09:12:44.381205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a9d2e7b4'
+down_revision: Union[str, Sequence[str], None] = '8caf0a8eaa64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('notes_revision',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('revision', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO notes_revision (id, revision) VALUES (1, 0)")
+
+    # Statement-level triggers bump the counter once per statement that
+    # actually changed rows (checked through the transition tables), so a
+    # conditional UPDATE/DELETE that matched nothing leaves it alone.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_notes_revision() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'TRUNCATE' THEN
+                IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+            UPDATE notes_revision SET revision = revision + 1 WHERE id = 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER notes_revision_on_insert AFTER INSERT ON notes
+        REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_notes_revision()
+    """)
+    op.execute("""
+        CREATE TRIGGER notes_revision_on_update AFTER UPDATE ON notes
+        REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_notes_revision()
+    """)
+    op.execute("""
+        CREATE TRIGGER notes_revision_on_delete AFTER DELETE ON notes
+        REFERENCING OLD TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_notes_revision()
+    """)
+    op.execute("""
+        CREATE TRIGGER notes_revision_on_truncate AFTER TRUNCATE ON notes
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_notes_revision()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS notes_revision_on_truncate ON notes")
+    op.execute("DROP TRIGGER IF EXISTS notes_revision_on_delete ON notes")
+    op.execute("DROP TRIGGER IF EXISTS notes_revision_on_update ON notes")
+    op.execute("DROP TRIGGER IF EXISTS notes_revision_on_insert ON notes")
+    op.execute("DROP FUNCTION IF EXISTS bump_notes_revision()")
+    op.drop_table('notes_revision')
@@ -0,0 +1,41 @@
+"""Add generated search vector and GIN index to notes
+
+Revision ID: d4e8b2a61f0c
+Revises: c3f1a9d2e7b4
+Create Date: 2026-10-18 11:03:27.519840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8b2a61f0c'
+down_revision: Union[str, Sequence[str], None] = 'c3f1a9d2e7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Adding a stored generated column rewrites the table once to fill it in.
+    op.add_column('notes', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_notes_search_vector', 'notes', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notes_search_vector', table_name='notes', postgresql_using='gin')
+    op.drop_column('notes', 'search_vector')
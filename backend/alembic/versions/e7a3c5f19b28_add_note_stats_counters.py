@@ -0,0 +1,96 @@
+"""Add note_stats counters maintained by triggers
+
+Revision ID: e7a3c5f19b28
+Revises: d4e8b2a61f0c
+Create Date: 2026-10-18 14:26:09.734512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c5f19b28'
+down_revision: Union[str, Sequence[str], None] = 'd4e8b2a61f0c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('note_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('locked', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Keep writers out until the triggers exist, so no change is missed
+    # between the initial count and the first trigger firing.
+    op.execute("LOCK TABLE notes IN SHARE MODE")
+    op.execute("""
+        INSERT INTO note_stats (id, total, locked)
+        SELECT 1, count(*), count(*) FILTER (WHERE locked) FROM notes
+    """)
+
+    # Statement-level triggers apply one delta per statement, computed from the
+    # transition tables, so a bulk insert or batch delete updates the row once.
+    # Statements that changed nothing leave it alone.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION adjust_note_stats() RETURNS trigger AS $$
+        DECLARE
+            total_delta bigint := 0;
+            locked_delta bigint := 0;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                UPDATE note_stats SET total = 0, locked = 0 WHERE id = 1;
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                SELECT count(*), count(*) FILTER (WHERE locked) INTO total_delta, locked_delta FROM new_rows;
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                SELECT -count(*), -count(*) FILTER (WHERE locked) INTO total_delta, locked_delta FROM old_rows;
+            ELSIF TG_OP = 'UPDATE' THEN
+                -- Only the locked flag can change the counts of an update
+                total_delta := 0;
+                locked_delta := locked_delta - (SELECT count(*) FILTER (WHERE locked) FROM old_rows);
+            END IF;
+            IF total_delta <> 0 OR locked_delta <> 0 THEN
+                UPDATE note_stats SET total = total + total_delta, locked = locked + locked_delta WHERE id = 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER note_stats_on_insert AFTER INSERT ON notes
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION adjust_note_stats()
+    """)
+    op.execute("""
+        CREATE TRIGGER note_stats_on_update AFTER UPDATE ON notes
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION adjust_note_stats()
+    """)
+    op.execute("""
+        CREATE TRIGGER note_stats_on_delete AFTER DELETE ON notes
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION adjust_note_stats()
+    """)
+    op.execute("""
+        CREATE TRIGGER note_stats_on_truncate AFTER TRUNCATE ON notes
+        FOR EACH STATEMENT EXECUTE FUNCTION adjust_note_stats()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS note_stats_on_truncate ON notes")
+    op.execute("DROP TRIGGER IF EXISTS note_stats_on_delete ON notes")
+    op.execute("DROP TRIGGER IF EXISTS note_stats_on_update ON notes")
+    op.execute("DROP TRIGGER IF EXISTS note_stats_on_insert ON notes")
+    op.execute("DROP FUNCTION IF EXISTS adjust_note_stats()")
+    op.drop_table('note_stats')
@@ -0,0 +1,37 @@
+"""Add a covering index to notes, drop the redundant id index
+
+Revision ID: f2b9d4e6a1c3
+Revises: e7a3c5f19b28
+Create Date: 2026-10-18 15:48:51.206733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9d4e6a1c3'
+down_revision: Union[str, Sequence[str], None] = 'e7a3c5f19b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The primary key kept its name when the table was renamed from examples;
+    # give it the name the model uses. ix_notes_id duplicates the primary key.
+    op.execute("ALTER INDEX examples_pkey RENAME TO notes_pkey")
+    op.drop_index('ix_notes_id', table_name='notes')
+
+    # Id-ordered listing pages read only id, uuid and name: answered by an
+    # index-only scan without visiting the heap.
+    op.create_index('ix_notes_id_covering', 'notes', ['id'], unique=False, postgresql_include=['uuid', 'name'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notes_id_covering', table_name='notes')
+    op.create_index('ix_notes_id', 'notes', ['id'], unique=False)
+    op.execute("ALTER INDEX notes_pkey RENAME TO examples_pkey")
@@ -0,0 +1,202 @@
+from collections import OrderedDict
+from opentelemetry import metrics
+import json
+import logging
+import os
+import threading
+import time
+import uuid as uuid_lib
+
+# Read-through cache for NoteDetail payloads, keyed by note uuid. Entries are
+# {"detail": <NoteDetail dict>, "etag": <ETag or None>} so conditional GETs can
+# be answered from the cache as well.
+#
+# Configuration:
+#   NOTES_CACHE_BACKEND      "memory" (default), "redis" or "disabled"
+#   NOTES_CACHE_MAX_ENTRIES  entries kept by the in-memory LRU (default 10000)
+#   NOTES_CACHE_TTL_SECONDS  lifetime of unlocked notes (default 30); locked
+#                            notes never change and are cached without expiry
+#   NOTES_CACHE_TOMBSTONE_SECONDS
+#                            how long an invalidated note stays uncacheable
+#                            (default 5); must outlast a detail read
+#   REDIS_URL                used by the redis backend, which lets every worker
+#                            share entries and invalidations
+#
+# The in-memory backend is per process, so with several workers an update is
+# only invalidated on the worker that served it; other workers can serve the
+# old payload until its TTL runs out. Use the redis backend when that matters.
+#
+# A read that missed the cache can finish after a write to the same note has
+# committed and invalidated it, and would then store what it read before the
+# write. So invalidating leaves a tombstone (a None value) for a few seconds,
+# and reads only ever add an entry where there is none, tombstones included.
+
+logger = logging.getLogger(__name__)
+meter = metrics.get_meter(__name__)
+
+cache_hits = meter.create_counter(
+    "notes.cache.hits", unit="{lookup}", description="Note detail lookups served from the cache"
+)
+cache_misses = meter.create_counter(
+    "notes.cache.misses", unit="{lookup}", description="Note detail lookups that went to the database"
+)
+cache_evictions = meter.create_counter(
+    "notes.cache.evictions", unit="{entry}", description="Entries dropped by the cache because of capacity or expiry"
+)
+
+
+class InMemoryCacheBackend:
+    """
+    Thread-safe LRU with per-entry expiry. A ttl of None keeps the entry until it
+    is evicted for capacity or deleted.
+    """
+
+    def __init__(self, max_entries=10000, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self._entries[key]
+                cache_evictions.add(1, {"reason": "expired"})
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = self.clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def add(self, key, value, ttl=None):
+        """Like set, but leaves a live entry for the key alone."""
+        expires_at = self.clock() + ttl if ttl is not None else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > self.clock()):
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            cache_evictions.add(1, {"reason": "capacity"})
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCacheBackend:
+    """
+    Stores entries as JSON in any client exposing redis-py's get/set(ex=)/delete.
+    Capacity is left to the server's maxmemory policy.
+    """
+
+    def __init__(self, client, prefix="notes:detail:v2:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=None if ttl is None else max(int(ttl), 1))
+
+    def add(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=None if ttl is None else max(int(ttl), 1), nx=True)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class NoteDetailCache:
+    """
+    Front end used by the notes routers. Backend failures are logged and treated
+    as misses so the cache can never fail a request.
+    """
+
+    def __init__(self, backend, ttl_seconds=30, enabled=True, tombstone_seconds=5):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.tombstone_seconds = tombstone_seconds
+
+    @staticmethod
+    def key(uuid):
+        try:
+            return str(uuid_lib.UUID(str(uuid)))
+        except ValueError:
+            return str(uuid)
+
+    def get(self, uuid):
+        if not self.enabled:
+            return None
+        try:
+            entry = self.backend.get(self.key(uuid))
+        except Exception as e:
+            logger.warning("Note cache lookup failed for %s: %s", uuid, e)
+            entry = None
+        if entry is None:
+            cache_misses.add(1)
+        else:
+            cache_hits.add(1)
+        return entry
+
+    def put(self, detail, etag=None):
+        if not self.enabled:
+            return
+        ttl = None if detail["locked"] else self.ttl_seconds
+        try:
+            self.backend.add(self.key(detail["uuid"]), {"detail": detail, "etag": etag}, ttl)
+        except Exception as e:
+            logger.warning("Note cache store failed for %s: %s", detail['uuid'], e)
+
+    def invalidate(self, uuid):
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(self.key(uuid), None, self.tombstone_seconds)
+        except Exception as e:
+            logger.warning("Note cache invalidation failed for %s: %s", uuid, e)
+
+    def clear(self):
+        self.backend.clear()
+
+
+def create_note_cache_from_env():
+    backend_name = os.getenv("NOTES_CACHE_BACKEND", "memory").lower()
+    ttl_seconds = float(os.getenv("NOTES_CACHE_TTL_SECONDS", "30"))
+    tombstone_seconds = float(os.getenv("NOTES_CACHE_TOMBSTONE_SECONDS", "5"))
+    if backend_name == "redis":
+        import redis  # Optional dependency, only needed for the shared backend
+        client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+        return NoteDetailCache(RedisCacheBackend(client), ttl_seconds, tombstone_seconds=tombstone_seconds)
+    max_entries = int(os.getenv("NOTES_CACHE_MAX_ENTRIES", "10000"))
+    return NoteDetailCache(
+        InMemoryCacheBackend(max_entries), ttl_seconds, enabled=backend_name != "disabled",
+        tombstone_seconds=tombstone_seconds,
+    )
+
+
+note_detail_cache = create_note_cache_from_env()
@@ -1,23 +1,28 @@
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 import os
 from models.base import Base
+# Engines are built by the shared factory in the backend root so the API and
+# Alembic use the same pool configuration; `engine`, `SessionLocal` and
+# `get_db` are the process-wide sync objects defined there.
+from database import DATABASE_URL, create_db_engine, engine, SessionLocal, get_db
 
-# OpenTelemetry SQLAlchemy instrumentation
-from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
 
+# Async engine for the async notes router. Defaults to the same database as
+# DATABASE_URL, reached through the asyncpg driver.
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1),
+)
+async_engine = create_db_engine(ASYNC_DATABASE_URL, is_async=True, pool_name="async")
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Which notes handlers serve /notes: "sync" (threadpool) or "async" (event loop)
+NOTES_DB_MODE = os.getenv("NOTES_DB_MODE", "sync").lower()
 
-# Instrument SQLAlchemy engine
-SQLAlchemyInstrumentor().instrument(engine=engine)
+# Both engines are instrumented for tracing by api.otel_setup on app startup
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,168 @@
+from logging.handlers import QueueHandler, QueueListener
+from opentelemetry import context as otel_context
+from opentelemetry import metrics
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+# Logging pipeline. The root logger has a single QueueHandler, so request
+# threads only append records to a bounded queue. A QueueListener thread does
+# the formatting and runs the real handlers: the console handler and, once
+# telemetry is set up, the OTel LoggingHandler (see api.otel_setup).
+#
+#   LOG_LEVEL        root logger level (default INFO)
+#   LOG_QUEUE_SIZE   records buffered for the listener (default 10000); records
+#                    arriving while the queue is full are dropped and counted
+#   LOG_RATE_LIMITS  per-logger caps for INFO and below, as
+#                    "logger=records_per_second,...", e.g.
+#                    "api.services.simulation=20,api.services.note=100".
+#                    A cap applies to the logger and its children. WARNING and
+#                    above are never limited.
+#
+# Records are queued unformatted: messages must use %-style arguments, and the
+# arguments must not be mutated after the call, since they are rendered later
+# on the listener thread.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+meter = metrics.get_meter(__name__)
+dropped_records = meter.create_counter(
+    "log.records.dropped", unit="{record}", description="Log records dropped by rate limits or a full log queue"
+)
+
+
+def parse_rate_limits(spec: str):
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        limits[name.strip()] = float(rate)
+    return limits
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per configured logger for records below WARNING. A logger may
+    burst up to one second's worth of records.
+    """
+
+    def __init__(self, limits, clock=time.monotonic):
+        super().__init__()
+        self.limits = dict(limits)
+        self.clock = clock
+        self._buckets = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def _limited_logger(self, name):
+        # Longest configured prefix of the logger name, cached per logger
+        if name not in self._keys:
+            candidate = name
+            while candidate and candidate not in self.limits:
+                candidate = candidate.rpartition(".")[0]
+            self._keys[name] = candidate or None
+        return self._keys[name]
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.limits:
+            return True
+        key = self._limited_logger(record.name)
+        if key is None:
+            return True
+        rate = self.limits[key]
+        now = self.clock()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (rate, now))
+            tokens = min(max(rate, 1.0), tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        if not allowed:
+            dropped_records.add(1, {"logger": key, "reason": "rate_limit"})
+        return allowed
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Queues records as they are, leaving formatting to the listener, together
+    with the OTel context of the logging thread (trace and span ids are read
+    from the context when the OTel handler emits).
+    """
+
+    def prepare(self, record):
+        record.otel_context = otel_context.get_current()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records.add(1, {"logger": record.name, "reason": "queue_full"})
+
+
+class ContextQueueListener(QueueListener):
+    def handle(self, record):
+        context = record.__dict__.pop("otel_context", None)
+        token = otel_context.attach(context) if context is not None else None
+        try:
+            super().handle(record)
+        finally:
+            if token is not None:
+                otel_context.detach(token)
+
+
+_queue_handler = None
+_listener = None
+
+
+def _start_listener(handlers):
+    global _listener
+    if _listener is not None:
+        # Stopping drains what is queued so far; later records wait in the queue
+        _listener.stop()
+    _listener = ContextQueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def configure_logging():
+    """
+    Routes the root logger through the queue with a console handler behind it.
+    Safe to call more than once.
+    """
+    global _queue_handler
+    root_logger = logging.getLogger()
+    root_logger.setLevel(LOG_LEVEL)
+    if _queue_handler is not None:
+        return
+
+    _queue_handler = ContextQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(RateLimitFilter(parse_rate_limits(os.getenv("LOG_RATE_LIMITS", ""))))
+    root_logger.addHandler(_queue_handler)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+    _start_listener([console_handler])
+    atexit.register(stop_logging)
+
+
+def add_log_handler(handler):
+    """
+    Adds a handler to the listener thread, e.g. the OTel LoggingHandler.
+    """
+    if _queue_handler is None:
+        configure_logging()
+    _start_listener(list(_listener.handlers) + [handler])
+
+
+def stop_logging():
+    """
+    Flushes queued records through the handlers and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
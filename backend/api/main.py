@@ -1,33 +1,58 @@
 
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI
 from api.services import note as note_router
+from api.services import note_async as note_async_router
 from api.services import simulation as simulation_router
-from api.middleware import setup_cors
+from api.services import simulation_async as simulation_async_router
+from api.middleware import setup_cors, setup_profiling, setup_request_metrics
+from api.database import NOTES_DB_MODE
+from api.logging_setup import configure_logging
+from api.otel_setup import TELEMETRY_MODE, telemetry_lifespan
 import logging
 
 logger = logging.getLogger(__name__)
 
-def create_app():
+def include_notes_routers(app, mode=NOTES_DB_MODE):
+    """
+    Mounts the notes endpoints. In "async" mode the async CRUD/lock handlers
+    replace their sync counterparts; every other notes route stays on the sync
+    router. Sync-only routes are registered first so that static paths are not
+    shadowed by the async "/notes/{uuid}" routes.
+    """
+    if mode != "async":
+        app.include_router(note_router.router)
+        return
+
+    overridden = {
+        (route.path, method)
+        for route in note_async_router.router.routes
+        for method in route.methods
+    }
+    sync_only = APIRouter()
+    sync_only.routes.extend(
+        route for route in note_router.router.routes
+        if not any((route.path, method) in overridden for method in route.methods)
+    )
+    app.include_router(sync_only)
+    app.include_router(note_async_router.router)
+    logger.info("Notes router running in async database mode")
+
+def create_app(telemetry_mode=TELEMETRY_MODE):
     app = FastAPI(
-        root_path="/api"  # Set root path for reverse proxy
+        root_path="/api",  # Set root path for reverse proxy
+        # OpenTelemetry (metrics, tracing, log export, HTTP/DB instrumentation)
+        # is set up on startup according to TELEMETRY_MODE, see api.otel_setup
+        lifespan=lambda app: telemetry_lifespan(app, telemetry_mode),
     )
 
+    setup_profiling(app)
+    setup_request_metrics(app)
     setup_cors(app)
-    # OpenTelemetry metrics setup
-    from api.otel_setup import setup_otel_metrics
-    setup_otel_metrics()
-    # OpenTelemetry tracing setup
-    from api.otel_setup import setup_otel_tracing
-    setup_otel_tracing()
-    # OpenTelemetry logging setup
-    from api.otel_setup import setup_otel_logging
-    setup_otel_logging()
-    # OpenTelemetry HTTP instrumentation setup
-    from api.otel_setup import setup_otel_http_instrumentation
-    setup_otel_http_instrumentation(app)
-    
-    app.include_router(note_router.router)
+    configure_logging()
+
+    include_notes_routers(app)
     app.include_router(simulation_router.router)
+    app.include_router(simulation_async_router.router)
 
     @app.get("/")
     def read_root():
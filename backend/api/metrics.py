@@ -0,0 +1,97 @@
+from opentelemetry import metrics
+import time
+
+# Request latency histograms per route group, recorded by
+# RequestMetricsMiddleware with the matched route template as http.route.
+# Each group has its own instrument so it can have its own buckets (a view
+# selects instruments, not attribute values):
+#
+#   notes.request.duration       /notes/*, dense below 50 ms for p99 shifts
+#   simulation.request.duration  /simulation/*, out to the 30 s simulated delays
+#
+# http.server.duration from the FastAPI instrumentation also gets finer
+# buckets than the SDK default. Exemplars (trace and span ids of a sampled
+# request) are attached to buckets because the histograms are recorded
+# inside the request span; the SDK's exemplar filter is trace_based unless
+# OTEL_METRICS_EXEMPLAR_FILTER says otherwise. The export interval and
+# temporality come from OTEL_METRIC_EXPORT_INTERVAL and
+# OTEL_EXPORTER_OTLP_METRICS_TEMPORALITY_PREFERENCE.
+
+HTTP_SERVER_DURATION_BUCKETS_MS = (
+    1, 2.5, 5, 10, 25, 50, 75, 100, 250, 500, 750, 1000, 2500, 5000, 7500, 10000,
+)
+ROUTE_GROUP_BUCKETS_MS = {
+    "notes": (1, 2, 3, 4, 5, 7.5, 10, 12.5, 15, 20, 25, 30, 40, 50, 75, 100, 150, 250, 500, 1000, 2500),
+    "simulation": (5, 10, 25, 50, 100, 250, 500, 1000, 2000, 3000, 4000, 5000, 7500, 10000, 20000, 30000),
+}
+
+meter = metrics.get_meter(__name__)
+request_durations = {
+    group: meter.create_histogram(
+        f"{group}.request.duration", unit="ms", description=f"Duration of /{group} requests by route"
+    )
+    for group in ROUTE_GROUP_BUCKETS_MS
+}
+
+
+def route_group(path):
+    """
+    The route group of a route template such as "/notes/{uuid}", or None.
+    """
+    group = path.lstrip("/").partition("/")[0]
+    return group if group in request_durations else None
+
+
+def metric_views():
+    """
+    Views with the explicit bucket boundaries above, for the MeterProvider.
+    """
+    from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
+
+    views = [
+        View(
+            instrument_name="http.server.duration",
+            aggregation=ExplicitBucketHistogramAggregation(HTTP_SERVER_DURATION_BUCKETS_MS),
+        )
+    ]
+    for group, boundaries in ROUTE_GROUP_BUCKETS_MS.items():
+        views.append(View(
+            instrument_name=f"{group}.request.duration",
+            aggregation=ExplicitBucketHistogramAggregation(boundaries),
+        ))
+    return views
+
+
+class RequestMetricsMiddleware:
+    """
+    Records the duration of each request into its route group's histogram.
+    Requests that match no route (404s, CORS preflights) are not recorded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            group = route_group(route.path) if route is not None else None
+            if group is not None:
+                request_durations[group].record((time.perf_counter() - start) * 1000, {
+                    "http.route": route.path,
+                    "http.request.method": scope["method"],
+                    "http.response.status_code": status["code"],
+                })
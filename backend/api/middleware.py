@@ -1,5 +1,10 @@
 
 from fastapi.middleware.cors import CORSMiddleware
+from api.metrics import RequestMetricsMiddleware
+from api import profiling
+import logging
+
+logger = logging.getLogger(__name__)
 
 def setup_cors(app):
     """
@@ -11,4 +16,28 @@ def setup_cors(app):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag", "X-Cache", "X-Profile-Id"],
     )
+
+def setup_request_metrics(app):
+    """
+    Adds per-route-group latency histograms (see api.metrics). The FastAPI
+    instrumentation wraps the whole middleware stack, so durations are recorded
+    inside the request span and carry its trace id as an exemplar.
+    """
+    app.add_middleware(RequestMetricsMiddleware)
+
+def setup_profiling(app):
+    """
+    Installs on-demand request profiling when PROFILING_ENABLED is set (see
+    api.profiling). Nothing is added otherwise, so unprofiled deployments pay
+    nothing for it.
+    """
+    if not profiling.PROFILING_ENABLED:
+        return
+    if not profiling.PROFILING_TOKEN:
+        logger.warning("PROFILING_ENABLED is set without PROFILING_TOKEN; request profiling stays off")
+        return
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(profiling.router)
+    logger.info("Request profiling enabled")
@@ -1,38 +1,55 @@
-
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
-from opentelemetry import metrics
-
-# Tracing imports
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.resources import SERVICE_NAME, Resource
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry import trace
-
-# Logging imports
-from opentelemetry._logs import set_logger_provider
-from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
-from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
-from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+from contextlib import asynccontextmanager
+import asyncio
 import logging
+import os
+
+# OpenTelemetry is wired up by the application's lifespan rather than at import
+# time, and the SDK/exporter modules (the gRPC log exporter in particular) are
+# only imported when telemetry is actually set up. TELEMETRY_MODE selects how:
+#
+#   enabled   set up before the app serves its first request (default)
+#   deferred  start serving immediately and set up in the background; requests
+#             handled before setup finishes are not traced
+#   disabled  no providers, exporters or instrumentation; logs go to the console
+#
+# Meters and tracers obtained before setup (e.g. the pool and cache metrics)
+# are API proxies and start reporting once the providers are installed.
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_MODE = os.getenv("TELEMETRY_MODE", "enabled").lower()
+TELEMETRY_MODES = ("enabled", "deferred", "disabled")
+
+_providers_ready = False
 
-# HTTP instrumentation imports
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
 def setup_otel_metrics():
+    from opentelemetry import metrics
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+    from api.metrics import metric_views
+
+    # Export interval and temporality follow OTEL_METRIC_EXPORT_INTERVAL and
+    # OTEL_EXPORTER_OTLP_METRICS_TEMPORALITY_PREFERENCE (see api.metrics)
     otlp_exporter = OTLPMetricExporter(endpoint="http://otel-collector:4318/v1/metrics")
     reader = PeriodicExportingMetricReader(otlp_exporter)
-    provider = MeterProvider(metric_readers=[reader])
+    provider = MeterProvider(metric_readers=[reader], views=metric_views())
     metrics.set_meter_provider(provider)
 
 
 def setup_otel_tracing():
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from api.trace_sampling import SampledSpanProcessor, build_sampler
+
     trace_exporter = OTLPSpanExporter(endpoint="http://otel-collector:4318/v1/traces")
     resource = Resource.create({SERVICE_NAME: "backend"})
-    tracer_provider = TracerProvider(resource=resource)
-    span_processor = BatchSpanProcessor(trace_exporter)
+    # Sampling is configured by the TRACE_SAMPLE_* variables (see api.trace_sampling)
+    tracer_provider = TracerProvider(resource=resource, sampler=build_sampler())
+    span_processor = SampledSpanProcessor(trace_exporter)
     tracer_provider.add_span_processor(span_processor)
     trace.set_tracer_provider(tracer_provider)
 
@@ -42,30 +59,35 @@ def setup_otel_logging():
     Sets up OpenTelemetry logging to send logs to the collector.
     This bridges Python's standard logging to OpenTelemetry.
     """
+    from opentelemetry._logs import set_logger_provider
+    from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+    from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    # The gRPC exporter is by far the slowest import of the telemetry stack
+    from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
+
     resource = Resource.create({SERVICE_NAME: "backend"})
     logger_provider = LoggerProvider(resource=resource)
     set_logger_provider(logger_provider)
-    
+
     # Use gRPC endpoint to match collector configuration
     log_exporter = OTLPLogExporter(endpoint="http://otel-collector:4317", insecure=True)
     logger_provider.add_log_record_processor(
         BatchLogRecordProcessor(log_exporter)
     )
-    
-    # Bridge Python's standard logging to OpenTelemetry
-    otel_handler = LoggingHandler(logger_provider=logger_provider)
-    
-    # Configure root logger to send to OpenTelemetry
-    root_logger = logging.getLogger()
-    root_logger.addHandler(otel_handler)
-    root_logger.setLevel(logging.INFO)
-    
-    # Also configure console logging for development
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(
-        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    )
-    root_logger.addHandler(console_handler)
+
+    # Bridge Python's standard logging to OpenTelemetry; the handler runs on
+    # the log listener thread rather than on the request path
+    from api.logging_setup import add_log_handler
+    add_log_handler(LoggingHandler(logger_provider=logger_provider))
+
+
+def setup_otel_sqlalchemy_instrumentation():
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from api.database import engine, async_engine
+
+    # The instrumentor only honours its first call, so both engines are passed together
+    SQLAlchemyInstrumentor().instrument(engines=[engine, async_engine.sync_engine])
 
 
 def setup_otel_http_instrumentation(app):
@@ -73,4 +95,54 @@ def setup_otel_http_instrumentation(app):
     Sets up OpenTelemetry HTTP instrumentation for FastAPI.
     This replaces the Prometheus FastAPI Instrumentator.
     """
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
     FastAPIInstrumentor.instrument_app(app)
+    if app.middleware_stack is not None:
+        # The stack is built before lifespan startup runs; rebuild it so the
+        # instrumentation middleware is picked up by the next request
+        app.middleware_stack = app.build_middleware_stack()
+
+
+def setup_otel_providers():
+    """
+    Installs the metrics, tracing and logging providers with their exporters and
+    instruments the database engines. Runs once per process.
+    """
+    global _providers_ready
+    if _providers_ready:
+        return
+    setup_otel_metrics()
+    setup_otel_tracing()
+    setup_otel_logging()
+    setup_otel_sqlalchemy_instrumentation()
+    _providers_ready = True
+
+
+async def _setup_in_background(app):
+    try:
+        await asyncio.to_thread(setup_otel_providers)
+        setup_otel_http_instrumentation(app)
+        logger.info("Deferred telemetry setup finished")
+    except Exception as e:
+        logger.error("Deferred telemetry setup failed: %s", e)
+
+
+@asynccontextmanager
+async def telemetry_lifespan(app, mode=TELEMETRY_MODE):
+    if mode not in TELEMETRY_MODES:
+        raise ValueError(f"TELEMETRY_MODE must be one of {', '.join(TELEMETRY_MODES)}, got {mode!r}")
+
+    background = None
+    if mode == "enabled":
+        setup_otel_providers()
+        setup_otel_http_instrumentation(app)
+    elif mode == "deferred":
+        background = asyncio.create_task(_setup_in_background(app))
+    else:
+        logger.info("Telemetry disabled")
+    try:
+        yield
+    finally:
+        if background is not None and not background.done():
+            background.cancel()
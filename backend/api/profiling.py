@@ -0,0 +1,253 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from opentelemetry import trace
+from typing import Annotated, Literal, Optional
+import asyncio
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+
+# On-demand profiling of single requests. Off unless PROFILING_ENABLED=true
+# and PROFILING_TOKEN is set; when off, neither the middleware nor the
+# /profiles routes are installed. When on, a request is profiled only if it
+# carries X-Profile-Token with the token; every other request costs one
+# header lookup.
+#
+#   PROFILING_ENABLED      "true" to install the middleware (default false)
+#   PROFILING_TOKEN        shared secret clients send as X-Profile-Token
+#   PROFILING_INTERVAL_MS  sampling interval (default 5)
+#   PROFILING_DIR          where profiles are stored (default /tmp/profiles)
+#   PROFILING_MAX_FILES    profiles kept in PROFILING_DIR; storing one more
+#                          deletes the oldest (default 100)
+#
+# A profiled request is sampled by a background thread that walks the stacks
+# of the event loop thread and of every busy worker thread (sync handlers run
+# in the threadpool). Other requests running on the same worker at the same
+# time are sampled too, so profile with little concurrent traffic. The
+# profile is stored in speedscope format; its id is returned in X-Profile-Id
+# and recorded as profile.id on the request span. Fetch it from
+# GET /profiles/{id} (?format=collapsed for flame graph tools).
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "/tmp/profiles")
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "100"))
+
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Leaf frames of threads that are parked rather than doing work
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+
+def _frame_name(code):
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+
+def _stack(frame):
+    stack = []
+    while frame is not None:
+        stack.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of busy threads every interval seconds until
+    stopped. The thread given as main_thread (the event loop) is always
+    sampled, idle or not, so time spent waiting on I/O shows up.
+    """
+
+    def __init__(self, main_thread, interval):
+        self.main_thread = main_thread
+        self.interval = interval
+        self.samples = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident != self.main_thread and os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                self.samples.setdefault(names.get(ident, str(ident)), []).append(_stack(frame))
+
+
+def speedscope_profile(sampler, name):
+    """
+    The samples as a speedscope document, one sampled profile per thread.
+    """
+    frames, index = [], {}
+    profiles = []
+    weight = sampler.interval * 1000
+    for thread_name, stacks in sampler.samples.items():
+        samples = []
+        for stack in stacks:
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                sample.append(index[frame])
+            samples.append(sample)
+        profiles.append({
+            "type": "sampled",
+            "name": thread_name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": len(samples) * weight,
+            "samples": samples,
+            "weights": [weight] * len(samples),
+        })
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "backend api.profiling",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
+
+
+def collapsed_stacks(profile):
+    """
+    Folded stacks ("thread;outer;inner count" per line) from a speedscope document.
+    """
+    frames = profile["shared"]["frames"]
+    counts = {}
+    for thread_profile in profile["profiles"]:
+        for sample in thread_profile["samples"]:
+            names = [thread_profile["name"]] + [
+                f"{frames[i]['name']} ({os.path.basename(frames[i]['file'])}:{frames[i]['line']})" for i in sample
+            ]
+            key = ";".join(names)
+            counts[key] = counts.get(key, 0) + 1
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+
+def profile_path(profile_id):
+    return os.path.join(PROFILING_DIR, f"{profile_id}.speedscope.json")
+
+
+def prune_profiles(keep=None):
+    """
+    Deletes the oldest stored profiles until at most `keep` (default
+    PROFILING_MAX_FILES) are left.
+    """
+    keep = PROFILING_MAX_FILES if keep is None else keep
+    paths = []
+    for entry in os.scandir(PROFILING_DIR):
+        if entry.name.endswith(".speedscope.json"):
+            try:
+                paths.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                pass  # pruned by another worker
+    paths.sort()
+    for _, path in paths[:max(len(paths) - keep, 0)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def store_profile(profile_id, profile):
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    with open(profile_path(profile_id), "w") as f:
+        json.dump(profile, f)
+    prune_profiles()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that carry the profiling token; passes everything else
+    straight through.
+    """
+
+    def __init__(self, app, token=PROFILING_TOKEN, interval_ms=PROFILING_INTERVAL_MS):
+        self.app = app
+        self.token = token.encode()
+        self.interval = interval_ms / 1000
+
+    def _requested(self, scope):
+        for name, value in scope["headers"]:
+            if name == PROFILE_TOKEN_HEADER:
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        trace.get_current_span().set_attribute("profile.id", profile_id)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [
+                    *message.get("headers", []), (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())
+                ]}
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            name = f"{scope['method']} {scope['path']}"
+            profile = speedscope_profile(sampler, name)
+            try:
+                await asyncio.to_thread(store_profile, profile_id, profile)
+                logger.info("Stored profile %s for %s (%.0f ms)", profile_id, name, sampler.duration * 1000)
+            except OSError as e:
+                logger.error("Could not store profile %s: %s", profile_id, e)
+
+
+router = APIRouter(prefix="/profiles", tags=["profiling"])
+
+
+@router.get("/{profile_id}")
+def get_profile(
+    profile_id: str,
+    profile_format: Annotated[Literal["speedscope", "collapsed"], Query(alias="format")] = "speedscope",
+    x_profile_token: Annotated[Optional[str], Header()] = None,
+):
+    """
+    Returns a stored profile. Needs the same X-Profile-Token as profiling.
+    """
+    if x_profile_token is None or not hmac.compare_digest(x_profile_token.encode(), PROFILING_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+    try:
+        profile_id = uuid.UUID(hex=profile_id).hex
+        with open(profile_path(profile_id)) as f:
+            profile = json.load(f)
+    except (ValueError, OSError):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if profile_format == "collapsed":
+        return PlainTextResponse(collapsed_stacks(profile))
+    return JSONResponse(profile)
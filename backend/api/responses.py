@@ -0,0 +1,34 @@
+from fastapi.responses import JSONResponse
+import orjson
+
+# Fast response path for the read-heavy note endpoints. FastAPI validates
+# whatever a handler returns against its response_model before encoding it;
+# for lists of rows the server built itself that second validation pass costs
+# more than the query. Returning a Response skips it (the response_model still
+# documents the route), and orjson encodes the rows directly, uuid.UUID
+# values included.
+
+
+class TrustedJSONResponse(JSONResponse):
+    """
+    JSON response for content built by the server from database rows, encoded
+    with orjson and not validated against the route's response_model.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+def trusted_json(content, response=None):
+    """
+    Wraps server-built content in a TrustedJSONResponse, carrying over headers
+    the handler set on its injected `response` (FastAPI only merges those into
+    responses it builds itself).
+    """
+    headers = None
+    if response is not None:
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name not in ("content-length", "content-type")
+        }
+    return TrustedJSONResponse(content, headers=headers)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 
 class NoteCreate(BaseModel):
     name: str
@@ -14,7 +14,33 @@ class NoteDetail(BaseModel):
     name: str
     description: Optional[str] = None
     locked: bool  # Expose as locked for API
+    version: int  # Also sent as the ETag; send it back in If-Match or NoteUpdate.version
+
+class NoteDetails(BaseModel):
+    notes: Dict[str, NoteDetail]  # Keyed by the uuid as requested
+    missing: List[str]  # Requested uuids with no note
+
+class NoteStats(BaseModel):
+    total: int
+    locked: int
+    unlocked: int
 
 class NoteUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
+    version: Optional[int] = None  # Apply only to this version, like If-Match
+
+class NoteBatchResult(BaseModel):
+    uuid: Optional[str] = None
+    status: int  # Per-item HTTP status: 200, 404, 409 or 422
+    detail: Optional[str] = None
+    note: Optional[NoteDetail] = None
+
+class NoteImportError(BaseModel):
+    line: int  # Line of the upload the rejected row starts on
+    detail: str
+
+class NoteImportResult(BaseModel):
+    accepted: int
+    rejected: int
+    errors: List[NoteImportError]  # First rejected rows only, see NOTES_IMPORT_MAX_REPORTED_ERRORS
@@ -0,0 +1,139 @@
+import mmap
+import os
+import threading
+import time
+import tracemalloc
+
+# Allocation helpers for /simulation/memory.
+#
+#   strings    the original simulation: a list of 10 KiB str objects, whose real
+#              footprint is above size_mb because of per-object overhead
+#   bytearray  one bytearray of exactly size_mb, every page written
+#   mmap       one anonymous mmap of exactly size_mb, every page written; it is
+#              outside the Python allocator, so tracemalloc does not see it
+#
+# Held allocations (the sustained-pressure mode) live in this process only, so
+# with several workers each one is pressured separately.
+#
+#   MEMORY_PRESSURE_CAP_MB  most memory held across requests per worker (default 512)
+
+MEMORY_PRESSURE_CAP_MB = int(os.getenv("MEMORY_PRESSURE_CAP_MB", "512"))
+MB = 1024 * 1024
+
+
+def rss_bytes():
+    """
+    Current resident set size of this process, or None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def to_mb(size):
+    return None if size is None else round(size / MB, 1)
+
+
+def allocate(size_mb, allocation):
+    size = size_mb * MB
+    if allocation == "strings":
+        return ["x" * 10240 for _ in range(size_mb * 100)]
+    buffer = bytearray(size) if allocation == "bytearray" else mmap.mmap(-1, size)
+    # Write one byte per page so the pages are really backed by RAM
+    buffer[::mmap.PAGESIZE] = b"\x01" * len(range(0, size, mmap.PAGESIZE))
+    return buffer
+
+
+def release(buffer):
+    if isinstance(buffer, mmap.mmap):
+        buffer.close()
+
+
+_probes = 0
+_started_tracing = False
+_probes_lock = threading.Lock()
+
+
+class MemoryProbe:
+    """
+    Measures RSS and the tracemalloc peak around an allocation. Tracing is
+    started by the first probe and stopped when the last concurrent one ends,
+    unless something else had already started it. Overlapping probes share
+    the peak, so their figures include each other's allocations.
+    """
+
+    def __enter__(self):
+        global _probes, _started_tracing
+        with _probes_lock:
+            if _probes == 0:
+                _started_tracing = not tracemalloc.is_tracing()
+                if _started_tracing:
+                    tracemalloc.start()
+            _probes += 1
+        tracemalloc.reset_peak()
+        self.rss_before = rss_bytes()
+        return self
+
+    def allocated(self):
+        self.rss_allocated = rss_bytes()
+        self.tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+
+    def __exit__(self, *exc):
+        global _probes
+        self.rss_after = rss_bytes()
+        with _probes_lock:
+            _probes -= 1
+            if _probes == 0 and _started_tracing:
+                tracemalloc.stop()
+        return False
+
+    def report(self):
+        return {
+            "rss_before_mb": to_mb(self.rss_before),
+            "rss_allocated_mb": to_mb(getattr(self, "rss_allocated", None)),
+            "rss_after_mb": to_mb(self.rss_after),
+            "tracemalloc_peak_mb": to_mb(getattr(self, "tracemalloc_peak", None)),
+        }
+
+
+class HeldMemory:
+    """
+    Allocations kept across requests, up to cap_mb in total.
+    """
+
+    def __init__(self, cap_mb=MEMORY_PRESSURE_CAP_MB):
+        self.cap_mb = cap_mb
+        self._buffers = []
+        self._lock = threading.Lock()
+
+    @property
+    def held_mb(self):
+        return sum(size_mb for size_mb, _ in self._buffers)
+
+    def hold(self, size_mb, allocation):
+        """
+        Allocates and keeps size_mb more. Returns False, allocating nothing,
+        when that would go past the cap.
+        """
+        with self._lock:
+            if self.held_mb + size_mb > self.cap_mb:
+                return False
+            self._buffers.append((size_mb, allocate(size_mb, allocation)))
+            return True
+
+    def release_all(self):
+        """
+        Frees everything held. Returns (MB released, seconds taken).
+        """
+        with self._lock:
+            buffers, self._buffers = self._buffers, []
+        released_mb = sum(size_mb for size_mb, _ in buffers)
+        start = time.perf_counter()
+        while buffers:
+            release(buffers.pop()[1])
+        return released_mb, time.perf_counter() - start
+
+
+held_memory = HeldMemory()
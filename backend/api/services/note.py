@@ -1,146 +1,758 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from models.note import Note
-from api.schemas.note import NoteCreate, NoteSummary, NoteDetail, NoteUpdate
+from api.schemas.note import (
+    NoteCreate, NoteSummary, NoteDetail, NoteDetails, NoteUpdate, NoteBatchResult, NoteImportResult, NoteStats,
+)
+from api.cache import note_detail_cache
+from api.responses import trusted_json
 from api.database import get_db
-from typing import List
+from api.services.note_import import (
+    ImportFormat, ImportFormatError, import_note_rows, iter_request_body, open_body_text,
+)
+from api.services.note_statements import (
+    select_note_detail, select_note_details, select_note_version, select_note_state, select_note_states,
+    select_notes_revision, select_note_stats, select_matching_notes, select_export_rows, update_unlocked_note,
+    lock_unlocked_note, delete_unlocked_note, insert_notes, lock_unlocked_notes, delete_unlocked_notes,
+)
+from typing import Annotated, List, Literal, Optional, Tuple
+import base64
+import binascii
+import csv
+import io
+import json
 import logging
+import math
+import os
+import re
+import uuid as uuid_lib
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/notes", tags=["notes"])
 
+# Upper bound for a single page of list_notes
+LIST_NOTES_MAX_LIMIT = 1000
+# Response header carrying the opaque cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Response header telling whether a note detail came from the cache (HIT) or
+# the database (MISS)
+CACHE_STATUS_HEADER = "X-Cache"
+# Page size of search_notes when no limit is given
+SEARCH_NOTES_DEFAULT_LIMIT = 20
+# Maximum number of items accepted by a single batch request
+NOTES_BATCH_MAX_ITEMS = int(os.getenv("NOTES_BATCH_MAX_ITEMS", "1000"))
+# Maximum number of uuids accepted by GET /notes/details. They travel in the
+# query string, so keep it within the proxy's request line limit.
+NOTES_DETAILS_MAX_ITEMS = int(os.getenv("NOTES_DETAILS_MAX_ITEMS", "100"))
+# Rows fetched from the server-side cursor, and written, per export chunk
+NOTES_EXPORT_CHUNK_ROWS = int(os.getenv("NOTES_EXPORT_CHUNK_ROWS", "1000"))
+
+# Per-item details for batch items that were not written, by status
+BATCH_LOCK_DETAILS = {
+    404: "Note not found",
+    409: "Note is already locked.",
+    412: "Note has been modified since it was fetched.",
+}
+BATCH_DELETE_DETAILS = {
+    404: "Note not found",
+    409: "Note is locked and cannot be deleted.",
+    412: "Note has been modified since it was fetched.",
+}
+
+ExportFormat = Literal["ndjson", "csv"]
+EXPORT_FIELDS = ("uuid", "name", "description", "locked")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _b64encode(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def _b64decode(cursor: str) -> str:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return base64.urlsafe_b64decode(padded.encode()).decode()
+
+
+def encode_cursor(note_id: int) -> str:
+    """
+    Encodes the id of the last returned note as an opaque, URL-safe cursor.
+    """
+    return _b64encode(str(note_id))
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decodes a cursor produced by encode_cursor. Raises a 400 for anything else.
+    """
+    try:
+        return int(_b64decode(cursor))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_search_cursor(rank: float, note_id: int) -> str:
+    """
+    Encodes the rank and id of the last returned search result. repr() keeps
+    every digit of the rank so the next page starts exactly after it.
+    """
+    return _b64encode(f"{rank!r}:{note_id}")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Decodes a cursor produced by encode_search_cursor. Raises a 400 for anything else.
+    """
+    try:
+        rank, note_id = _b64decode(cursor).split(":")
+        rank = float(rank)
+        if not math.isfinite(rank):
+            raise ValueError(rank)
+        return rank, int(note_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def check_batch_size(items: list):
+    if not items:
+        raise HTTPException(status_code=422, detail="Batch must contain at least one item")
+    if len(items) > NOTES_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds the maximum of {NOTES_BATCH_MAX_ITEMS} items")
+
+
+def parse_batch_uuids(uuids: List[str]):
+    """
+    Splits requested uuids into parsed values and per-item 422 results for malformed ones.
+    """
+    parsed = {}
+    invalid = {}
+    for raw in uuids:
+        try:
+            parsed[raw] = uuid_lib.UUID(raw)
+        except ValueError:
+            invalid[raw] = {"uuid": raw, "status": 422, "detail": "Invalid UUID"}
+    return parsed, invalid
+
+
+def parse_detail_uuids(uuids: List[str]):
+    """
+    Maps each distinct requested uuid to its parsed value. Raises a 413 past
+    NOTES_DETAILS_MAX_ITEMS and a 422 naming any malformed uuids.
+    """
+    if len(uuids) > NOTES_DETAILS_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Request exceeds the maximum of {NOTES_DETAILS_MAX_ITEMS} uuids")
+    parsed, invalid = parse_batch_uuids(uuids)
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"Invalid UUID: {', '.join(invalid)}")
+    return parsed
+
+
+def note_details(parsed, rows):
+    by_uuid = {row.uuid: row for row in rows}
+    notes = {raw: note_detail(by_uuid[value]) for raw, value in parsed.items() if value in by_uuid}
+    return {"notes": notes, "missing": [raw for raw in parsed if raw not in notes]}
+
+
+def note_detail(row):
+    return {
+        "uuid": str(row.uuid), "name": row.name, "description": row.description, "locked": row.locked,
+        "version": row.version,
+    }
+
+
+def export_header(export_format: ExportFormat) -> str:
+    return ",".join(EXPORT_FIELDS) + "\r\n" if export_format == "csv" else ""
+
+
+def export_chunk(rows, export_format: ExportFormat) -> str:
+    """
+    Serializes one chunk of export rows. Each chunk is complete lines, so the
+    stream can be cut after any chunk and still parse.
+    """
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            (str(row.uuid), row.name, row.description, "true" if row.locked else "false") for row in rows
+        )
+        return buffer.getvalue()
+    return "".join(
+        json.dumps({"uuid": str(row.uuid), "name": row.name, "description": row.description, "locked": row.locked}) + "\n"
+        for row in rows
+    )
+
+
+def export_response(chunks, export_format: ExportFormat) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="notes.{export_format}"'},
+    )
+
+
+# ETags: notes use their version column, the list uses the notes_revision counter.
+
+def format_etag(version) -> str:
+    return f'"{version}"'
+
+
+def parse_etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def if_none_match_hits(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Weak comparison, as used for If-None-Match.
+    """
+    if not if_none_match or etag is None:
+        return False
+    tags = [tag[2:] if tag.startswith("W/") else tag for tag in parse_etags(if_none_match)]
+    return "*" in tags or etag in tags
+
+
+def expected_versions(if_match: Optional[str], body_version: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Note versions a write may apply to under If-Match (strong comparison, so weak
+    tags never match) and, for updates, the version given in the body. With both,
+    the write must satisfy both. None means the write is unconditional.
+    """
+    versions = None
+    if if_match is not None:
+        tags = parse_etags(if_match)
+        if "*" not in tags:
+            # A tag that is not one of our versions can never match
+            versions = [int(tag.strip('"')) for tag in tags if re.fullmatch(r'"\d+"', tag)]
+    if body_version is not None:
+        versions = [body_version] if versions is None else [v for v in versions if v == body_version]
+    return versions
+
+
+def missed_write_status(state) -> int:
+    """
+    Status for a single-note write that changed no row, from the note's
+    current_version and current_locked (see note_statements). `state` is None
+    when a fresh read found no note.
+    """
+    if state is None or state.current_version is None:
+        return 404
+    if state.current_locked:
+        return 409
+    return 412
+
+
+def missed_batch_states(db: Session, outcomes) -> dict:
+    """
+    State of every note a batch mutation did not write, keyed by uuid, for
+    missed_write_status. Notes the mutation's snapshot showed unlocked are read
+    again in a new statement, which sees what a concurrent write committed.
+    """
+    states = {note_uuid: row for note_uuid, row in outcomes.items() if row.uuid is None}
+    unlocked = [note_uuid for note_uuid, row in states.items() if not row.current_locked]
+    if unlocked:
+        fresh = {row.found_uuid: row for row in db.execute(*select_note_states(unlocked)).all()}
+        states.update((note_uuid, fresh.get(note_uuid)) for note_uuid in unlocked)
+    return states
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
 @router.post("/", response_model=NoteDetail)
 def create_note(note: NoteCreate, db: Session = Depends(get_db)):
-    logger.info(f"Creating new note with name: {note.name}")
+    attrs = {"operation": "create_note"}
+    logger.info("Creating new note with name: %s", note.name, extra=attrs)
     try:
         db_note = Note(name=note.name, description=note.description)
         db.add(db_note)
         db.commit()
         db.refresh(db_note)
-        logger.info(f"Successfully created note with UUID: {db_note.uuid}")
-        return {"uuid": str(db_note.uuid), "name": db_note.name, "description": db_note.description, "locked": db_note.locked}
+        logger.info("Successfully created note with UUID: %s", db_note.uuid, extra=attrs)
+        return note_detail(db_note)
     except SQLAlchemyError as e:
-        logger.error(f"Database error while creating note: {str(e)}")
+        logger.error("Database error while creating note: %s", e, extra=attrs)
         db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
     except Exception as e:
-        logger.error(f"Unexpected error while creating note: {str(e)}")
+        logger.error("Unexpected error while creating note: %s", e, extra=attrs)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/", response_model=List[NoteSummary])
-def list_notes(db: Session = Depends(get_db)):
-    logger.info("Fetching all notes")
+def list_notes(
+    response: Response = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=LIST_NOTES_MAX_LIMIT)] = None,
+    cursor: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Lists note summaries ordered by id, selecting only the columns NoteSummary needs.
+    Without `limit` every note is returned (the original behaviour). With `limit`, a
+    single page is returned and, if more notes follow, the cursor for the next page
+    is sent in the X-Next-Cursor header; pass it back as `cursor` to continue.
+    The ETag is the notes revision counter, so If-None-Match is answered with a 304
+    before the list query runs.
+    """
+    attrs = {"operation": "list_notes"}
+    logger.info("Fetching notes (limit=%s, cursor=%s)", limit, cursor, extra=attrs)
+    after_id = decode_cursor(cursor) if cursor is not None else None
+    try:
+        revision = db.execute(select_notes_revision()).scalar_one()
+        etag = format_etag(revision)
+        if if_none_match_hits(if_none_match, etag):
+            logger.info("Notes unchanged since the client's copy", extra=attrs)
+            return not_modified(etag)
+
+        query = db.query(Note.id, Note.uuid, Note.name).order_by(Note.id.asc())
+        if after_id is not None:
+            query = query.filter(Note.id > after_id)
+        if limit is not None:
+            # Fetch one extra row to find out whether another page exists
+            query = query.limit(limit + 1)
+        rows = query.all()
+
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+        if etag is not None:
+            response.headers["ETag"] = etag
+        logger.info("Successfully retrieved %s notes", len(rows), extra=attrs)
+        return trusted_json([{"uuid": row.uuid, "name": row.name} for row in rows], response)
+    except SQLAlchemyError as e:
+        logger.error("Database error while fetching notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while fetching notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/search", response_model=List[NoteSummary])
+def search_notes(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    response: Response = None,
+    limit: Annotated[int, Query(ge=1, le=LIST_NOTES_MAX_LIMIT)] = SEARCH_NOTES_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Full-text search over note names and descriptions, best match first. `q`
+    accepts web-search syntax ("quoted phrases", or, -excluded). Pages work like
+    list_notes: the next page's cursor is sent in the X-Next-Cursor header.
+    """
+    attrs = {"operation": "search_notes"}
+    logger.info("Searching notes (q=%r, limit=%s, cursor=%s)", q, limit, cursor, extra=attrs)
+    after = decode_search_cursor(cursor) if cursor is not None else None
+    try:
+        # Fetch one extra row to find out whether another page exists
+        rows = db.execute(select_matching_notes(q, limit + 1, after)).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_search_cursor(rows[-1].rank, rows[-1].id)
+        logger.info("Search matched %s notes on this page", len(rows), extra=attrs)
+        return trusted_json([{"uuid": row.uuid, "name": row.name} for row in rows], response)
+    except SQLAlchemyError as e:
+        logger.error("Database error while searching notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while searching notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/stats", response_model=NoteStats)
+def get_note_stats(db: Session = Depends(get_db)):
+    """
+    Total, locked and unlocked note counts, read from the trigger-maintained
+    note_stats row rather than counted.
+    """
+    attrs = {"operation": "get_note_stats"}
+    try:
+        stats = db.execute(select_note_stats()).one()
+        logger.info("Note stats: %s total, %s locked", stats.total, stats.locked, extra=attrs)
+        return {"total": stats.total, "locked": stats.locked, "unlocked": stats.unlocked}
+    except SQLAlchemyError as e:
+        logger.error("Database error while reading note stats: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+
+@router.get("/details", response_model=NoteDetails)
+def get_note_details(
+    uuid: Annotated[List[str], Query(min_length=1)],
+    response: Response = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Details of several notes in one query: /notes/details?uuid=a&uuid=b.
+    Notes are keyed by the uuid as requested; uuids without a note are listed
+    in `missing`. At most NOTES_DETAILS_MAX_ITEMS uuids per request.
+    """
+    attrs = {"operation": "get_note_details"}
+    parsed = parse_detail_uuids(uuid)
+    logger.info("Fetching details of %s notes", len(parsed), extra=attrs)
+    try:
+        rows = db.execute(*select_note_details(list(parsed.values()))).all()
+        logger.info("Found %s of %s notes", len(rows), len(parsed), extra=attrs)
+        return trusted_json(note_details(parsed, rows), response)
+    except SQLAlchemyError as e:
+        logger.error("Database error while fetching note details: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while fetching note details: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/export")
+def export_notes(
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "ndjson",
+    db: Session = Depends(get_db),
+):
+    """
+    Streams every note as NDJSON or CSV. Rows are read from a server-side cursor
+    and written NOTES_EXPORT_CHUNK_ROWS at a time, so memory use does not grow
+    with the size of the table.
+    """
+    attrs = {"operation": "export_notes"}
+    logger.info("Exporting notes as %s", export_format, extra=attrs)
+    try:
+        # Run the query up front so a failure here can still be answered with a 500
+        result = db.execute(select_export_rows(NOTES_EXPORT_CHUNK_ROWS))
+    except SQLAlchemyError as e:
+        logger.error("Database error while exporting notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while exporting notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    def chunks():
+        exported = 0
+        try:
+            yield export_header(export_format)
+            for partition in result.partitions():
+                exported += len(partition)
+                yield export_chunk(partition, export_format)
+            logger.info("Successfully exported %s notes", exported, extra=attrs)
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated stream
+            logger.error("Error after exporting %s notes: %s", exported, e, extra=attrs)
+            raise
+        finally:
+            result.close()
+
+    return export_response(chunks(), export_format)
+
+@router.post("/import", response_model=NoteImportResult)
+def import_notes(
+    request: Request,
+    import_format: Annotated[ImportFormat, Query(alias="format")] = "ndjson",
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk-loads notes from an NDJSON body (one NoteCreate object per line) or a CSV
+    body with a name[,description] header. The body is read as it arrives and
+    loaded with COPY, so uploads of any size use bounded memory. Invalid rows are
+    skipped and reported; the valid rows are inserted together in one transaction.
+    """
+    attrs = {"operation": "import_notes"}
+    logger.info("Importing notes from %s", import_format, extra=attrs)
+    try:
+        summary = import_note_rows(db, open_body_text(iter_request_body(request)), import_format)
+        db.commit()
+        logger.info("Imported %s notes, rejected %s rows", summary['accepted'], summary['rejected'], extra=attrs)
+        return summary
+    except ImportFormatError as e:
+        logger.warning("Rejected note import: %s", e, extra=attrs)
+        db.rollback()
+        raise HTTPException(status_code=422, detail=str(e))
+    except UnicodeDecodeError:
+        logger.warning("Rejected note import: body is not valid UTF-8", extra=attrs)
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 encoded")
+    except SQLAlchemyError as e:
+        logger.error("Database error while importing notes: %s", e, extra=attrs)
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        # Also covers driver errors raised by COPY on the raw cursor
+        logger.error("Unexpected error while importing notes: %s", e, extra=attrs)
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/batch", response_model=List[NoteBatchResult])
+def create_notes_batch(notes: List[NoteCreate], db: Session = Depends(get_db)):
+    attrs = {"operation": "create_notes_batch"}
+    check_batch_size(notes)
+    logger.info("Creating batch of %s notes", len(notes), extra=attrs)
+    try:
+        params = [{"name": note.name, "description": note.description} for note in notes]
+        rows = db.execute(insert_notes(), params).all()
+        db.commit()
+        logger.info("Successfully created batch of %s notes", len(rows), extra=attrs)
+        return [{"uuid": str(row.uuid), "status": 200, "note": note_detail(row)} for row in rows]
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions as-is
+    except SQLAlchemyError as e:
+        logger.error("Database error while creating note batch: %s", e, extra=attrs)
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while creating note batch: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/actions/lock-batch", response_model=List[NoteBatchResult])
+def lock_notes_batch(uuids: List[str], db: Session = Depends(get_db)):
+    attrs = {"operation": "lock_notes_batch"}
+    check_batch_size(uuids)
+    logger.info("Locking batch of %s notes", len(uuids), extra=attrs)
+    parsed, invalid = parse_batch_uuids(uuids)
+    try:
+        outcomes, missed = {}, {}
+        if parsed:
+            outcomes = {row.found_uuid: row for row in db.execute(lock_unlocked_notes(list(parsed.values()))).all()}
+            db.commit()
+            for note_uuid in outcomes:
+                note_detail_cache.invalidate(note_uuid)
+            missed = missed_batch_states(db, outcomes)
+
+        results = []
+        for raw in uuids:
+            note_uuid = parsed.get(raw)
+            if raw in invalid:
+                results.append(invalid[raw])
+            elif note_uuid in outcomes and note_uuid not in missed:
+                results.append({"uuid": raw, "status": 200, "note": note_detail(outcomes[note_uuid])})
+            else:
+                status = missed_write_status(missed.get(note_uuid))
+                results.append({"uuid": raw, "status": status, "detail": BATCH_LOCK_DETAILS[status]})
+        logger.info("Lock batch completed: %s of %s notes locked", sum(r['status'] == 200 for r in results), len(uuids), extra=attrs)
+        return results
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions as-is
+    except SQLAlchemyError as e:
+        logger.error("Database error while locking note batch: %s", e, extra=attrs)
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while locking note batch: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.delete("/batch", response_model=List[NoteBatchResult])
+def delete_notes_batch(uuids: List[str], db: Session = Depends(get_db)):
+    attrs = {"operation": "delete_notes_batch"}
+    check_batch_size(uuids)
+    logger.info("Deleting batch of %s notes", len(uuids), extra=attrs)
+    parsed, invalid = parse_batch_uuids(uuids)
     try:
-        notes = db.query(Note).order_by(Note.id.asc()).all()
-        logger.info(f"Successfully retrieved {len(notes)} notes")
-        return [{"uuid": str(e.uuid), "name": e.name} for e in notes]
+        outcomes, missed = {}, {}
+        if parsed:
+            outcomes = {row.found_uuid: row for row in db.execute(delete_unlocked_notes(list(parsed.values()))).all()}
+            db.commit()
+            for note_uuid in outcomes:
+                note_detail_cache.invalidate(note_uuid)
+            missed = missed_batch_states(db, outcomes)
+
+        results = []
+        for raw in uuids:
+            note_uuid = parsed.get(raw)
+            if raw in invalid:
+                results.append(invalid[raw])
+            elif note_uuid in outcomes and note_uuid not in missed:
+                results.append({"uuid": raw, "status": 200, "detail": "Note deleted"})
+            else:
+                status = missed_write_status(missed.get(note_uuid))
+                results.append({"uuid": raw, "status": status, "detail": BATCH_DELETE_DETAILS[status]})
+        logger.info("Delete batch completed: %s of %s notes deleted", sum(r['status'] == 200 for r in results), len(uuids), extra=attrs)
+        return results
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions as-is
     except SQLAlchemyError as e:
-        logger.error(f"Database error while fetching notes: {str(e)}")
+        logger.error("Database error while deleting note batch: %s", e, extra=attrs)
+        db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
     except Exception as e:
-        logger.error(f"Unexpected error while fetching notes: {str(e)}")
+        logger.error("Unexpected error while deleting note batch: %s", e, extra=attrs)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/{uuid}", response_model=NoteDetail)
-def get_note_detail(uuid: str, db: Session = Depends(get_db)):
-    logger.info(f"Fetching note details for UUID: {uuid}")
+def get_note_detail(
+    uuid: str,
+    response: Response = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    db: Session = Depends(get_db),
+):
+    attrs = {"operation": "get_note_detail", "note.uuid": uuid}
+    logger.info("Fetching note details for UUID: %s", uuid, extra=attrs)
+    cached = note_detail_cache.get(uuid)
+    if cached is not None:
+        if if_none_match_hits(if_none_match, cached["etag"]):
+            return not_modified(cached["etag"])
+        logger.info("Served note %s from cache", uuid, extra=attrs)
+        if cached["etag"] is not None:
+            response.headers["ETag"] = cached["etag"]
+        response.headers[CACHE_STATUS_HEADER] = "HIT"
+        return trusted_json(cached["detail"], response)
     try:
-        note = db.query(Note).filter_by(uuid=uuid).first()
+        if if_none_match:
+            # Answer a matching conditional GET from the version alone
+            version = db.execute(*select_note_version(uuid)).scalar()
+            if version is not None and if_none_match_hits(if_none_match, format_etag(version)):
+                return not_modified(format_etag(version))
+
+        note = db.execute(*select_note_detail(uuid)).first()
         if not note:
-            logger.warning(f"Note not found for UUID: {uuid}")
+            logger.warning("Note not found for UUID: %s", uuid, extra=attrs)
             raise HTTPException(status_code=404, detail="Note not found")
-        logger.info(f"Successfully retrieved note: {note.name}")
-        return {"uuid": str(note.uuid), "name": note.name, "description": note.description, "locked": note.locked}
+        logger.info("Successfully retrieved note: %s", note.name, extra=attrs)
+        detail = note_detail(note)
+        etag = format_etag(note.version)
+        note_detail_cache.put(detail, etag)
+        response.headers["ETag"] = etag
+        response.headers[CACHE_STATUS_HEADER] = "MISS"
+        return trusted_json(detail, response)
     except HTTPException:
         raise  # Re-raise HTTP exceptions as-is
     except SQLAlchemyError as e:
-        logger.error(f"Database error while fetching note {uuid}: {str(e)}")
+        logger.error("Database error while fetching note %s: %s", uuid, e, extra=attrs)
         raise HTTPException(status_code=500, detail="Database error occurred")
     except Exception as e:
-        logger.error(f"Unexpected error while fetching note {uuid}: {str(e)}")
+        logger.error("Unexpected error while fetching note %s: %s", uuid, e, extra=attrs)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.put("/{uuid}", response_model=NoteDetail)
-def update_note(uuid: str, update: NoteUpdate, db: Session = Depends(get_db)):
-    logger.info(f"Updating note with UUID: {uuid}")
+def update_note(
+    uuid: str,
+    update: NoteUpdate,
+    response: Response = None,
+    if_match: Annotated[Optional[str], Header()] = None,
+    db: Session = Depends(get_db),
+):
+    attrs = {"operation": "update_note", "note.uuid": uuid}
+    logger.info("Updating note with UUID: %s", uuid, extra=attrs)
     try:
-        note = db.query(Note).filter_by(uuid=uuid).first()
-        if not note:
-            logger.warning(f"Note not found for update, UUID: {uuid}")
-            raise HTTPException(status_code=404, detail="Note not found")
-        if note.locked:
-            logger.warning(f"Attempted to update locked note: {uuid}")
-            raise HTTPException(status_code=409, detail="Note is locked and cannot be modified.")
-        
+        values = {}
         if update.name is not None:
-            note.name = update.name
+            values["name"] = update.name
         if update.description is not None:
-            note.description = update.description
+            values["description"] = update.description
+        expected = expected_versions(if_match, update.version)
+        if not values:
+            # Nothing to write: answer from the note as it is. An UPDATE that
+            # changes nothing would still fire the notes triggers.
+            note = db.execute(*select_note_detail(uuid)).first()
+            if note is None:
+                logger.warning("Note not found for update, UUID: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=404, detail="Note not found")
+            if note.locked:
+                logger.warning("Attempted to update locked note: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=409, detail="Note is locked and cannot be modified.")
+            if expected is not None and note.version not in expected:
+                logger.warning("Stale version for note %s", uuid, extra=attrs)
+                raise HTTPException(status_code=412, detail="Note has been modified since it was fetched.")
+            response.headers["ETag"] = format_etag(note.version)
+            return note_detail(note)
+        outcome = db.execute(*update_unlocked_note(uuid, values, expected)).one()
+        if outcome.uuid is None:
+            state = outcome
+            if state.current_version is not None and not state.current_locked:
+                # A stale version, or a concurrent write: read what is committed now
+                state = db.execute(*select_note_state(uuid)).first()
+            status = missed_write_status(state)
+            if status == 404:
+                logger.warning("Note not found for update, UUID: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=404, detail="Note not found")
+            if status == 412:
+                logger.warning("Stale version for note %s", uuid, extra=attrs)
+                raise HTTPException(status_code=412, detail="Note has been modified since it was fetched.")
+            logger.warning("Attempted to update locked note: %s", uuid, extra=attrs)
+            raise HTTPException(status_code=409, detail="Note is locked and cannot be modified.")
+
         db.commit()
-        db.refresh(note)
-        logger.info(f"Successfully updated note: {note.name}")
-        return {"uuid": str(note.uuid), "name": note.name, "description": note.description, "locked": note.locked}
+        note_detail_cache.invalidate(uuid)
+        response.headers["ETag"] = format_etag(outcome.version)
+        logger.info("Successfully updated note: %s", outcome.name, extra=attrs)
+        return note_detail(outcome)
     except HTTPException:
         raise  # Re-raise HTTP exceptions as-is
     except SQLAlchemyError as e:
-        logger.error(f"Database error while updating note {uuid}: {str(e)}")
+        logger.error("Database error while updating note %s: %s", uuid, e, extra=attrs)
         db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
     except Exception as e:
-        logger.error(f"Unexpected error while updating note {uuid}: {str(e)}")
+        logger.error("Unexpected error while updating note %s: %s", uuid, e, extra=attrs)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/{uuid}/actions/lock", response_model=NoteDetail)
-def lock_note(uuid: str, db: Session = Depends(get_db)):
-    logger.info(f"Locking note with UUID: {uuid}")
+def lock_note(
+    uuid: str,
+    response: Response = None,
+    if_match: Annotated[Optional[str], Header()] = None,
+    db: Session = Depends(get_db),
+):
+    attrs = {"operation": "lock_note", "note.uuid": uuid}
+    logger.info("Locking note with UUID: %s", uuid, extra=attrs)
     try:
-        note = db.query(Note).filter_by(uuid=uuid).first()
-        if not note:
-            logger.warning(f"Note not found for locking, UUID: {uuid}")
-            raise HTTPException(status_code=404, detail="Note not found")
-        if note.locked:
-            logger.warning(f"Attempted to lock already locked note: {uuid}")
+        expected = expected_versions(if_match)
+        outcome = db.execute(*lock_unlocked_note(uuid, expected)).one()
+        if outcome.uuid is None:
+            state = outcome
+            if state.current_version is not None and not state.current_locked:
+                # A stale version, or a concurrent write: read what is committed now
+                state = db.execute(*select_note_state(uuid)).first()
+            status = missed_write_status(state)
+            if status == 404:
+                logger.warning("Note not found for locking, UUID: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=404, detail="Note not found")
+            if status == 412:
+                logger.warning("Stale version for note %s", uuid, extra=attrs)
+                raise HTTPException(status_code=412, detail="Note has been modified since it was fetched.")
+            logger.warning("Attempted to lock already locked note: %s", uuid, extra=attrs)
             raise HTTPException(status_code=409, detail="Note is already locked.")
-        
-        note.locked = True
+
         db.commit()
-        db.refresh(note)
-        logger.info(f"Successfully locked note: {note.name}")
-        return {"uuid": str(note.uuid), "name": note.name, "description": note.description, "locked": note.locked}
+        note_detail_cache.invalidate(uuid)
+        response.headers["ETag"] = format_etag(outcome.version)
+        logger.info("Successfully locked note: %s", outcome.name, extra=attrs)
+        return note_detail(outcome)
     except HTTPException:
         raise  # Re-raise HTTP exceptions as-is
     except SQLAlchemyError as e:
-        logger.error(f"Database error while locking note {uuid}: {str(e)}")
+        logger.error("Database error while locking note %s: %s", uuid, e, extra=attrs)
         db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
     except Exception as e:
-        logger.error(f"Unexpected error while locking note {uuid}: {str(e)}")
+        logger.error("Unexpected error while locking note %s: %s", uuid, e, extra=attrs)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.delete("/{uuid}", response_model=dict)
-def delete_note(uuid: str, db: Session = Depends(get_db)):
-    logger.info(f"Deleting note with UUID: {uuid}")
+def delete_note(
+    uuid: str,
+    if_match: Annotated[Optional[str], Header()] = None,
+    db: Session = Depends(get_db),
+):
+    attrs = {"operation": "delete_note", "note.uuid": uuid}
+    logger.info("Deleting note with UUID: %s", uuid, extra=attrs)
     try:
-        note = db.query(Note).filter_by(uuid=uuid).first()
-        if not note:
-            logger.warning(f"Note not found for deletion, UUID: {uuid}")
-            raise HTTPException(status_code=404, detail="Note not found")
-        if note.locked:
-            logger.warning(f"Attempted to delete locked note: {uuid}")
+        expected = expected_versions(if_match)
+        outcome = db.execute(*delete_unlocked_note(uuid, expected)).one()
+        if outcome.uuid is None:
+            state = outcome
+            if state.current_version is not None and not state.current_locked:
+                # A stale version, or a concurrent write: read what is committed now
+                state = db.execute(*select_note_state(uuid)).first()
+            status = missed_write_status(state)
+            if status == 404:
+                logger.warning("Note not found for deletion, UUID: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=404, detail="Note not found")
+            if status == 412:
+                logger.warning("Stale version for note %s", uuid, extra=attrs)
+                raise HTTPException(status_code=412, detail="Note has been modified since it was fetched.")
+            logger.warning("Attempted to delete locked note: %s", uuid, extra=attrs)
             raise HTTPException(status_code=409, detail="Note is locked and cannot be deleted.")
-        
-        note_name = note.name  # Store name for logging before deletion
-        db.delete(note)
+
         db.commit()
-        logger.info(f"Successfully deleted note: {note_name}")
+        note_detail_cache.invalidate(uuid)
+        logger.info("Successfully deleted note: %s", outcome.name, extra=attrs)
         return {"detail": "Note deleted"}
     except HTTPException:
         raise  # Re-raise HTTP exceptions as-is
     except SQLAlchemyError as e:
-        logger.error(f"Database error while deleting note {uuid}: {str(e)}")
+        logger.error("Database error while deleting note %s: %s", uuid, e, extra=attrs)
         db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
     except Exception as e:
-        logger.error(f"Unexpected error while deleting note {uuid}: {str(e)}")
+        logger.error("Unexpected error while deleting note %s: %s", uuid, e, extra=attrs)
         raise HTTPException(status_code=500, detail="Internal server error")
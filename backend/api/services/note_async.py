@@ -0,0 +1,370 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from models.note import Note
+from api.schemas.note import NoteCreate, NoteSummary, NoteDetail, NoteDetails, NoteUpdate, NoteStats
+from api.cache import note_detail_cache
+from api.responses import trusted_json
+from api.database import get_async_db
+from api.services.note import (
+    LIST_NOTES_MAX_LIMIT, NEXT_CURSOR_HEADER, CACHE_STATUS_HEADER, SEARCH_NOTES_DEFAULT_LIMIT,
+    NOTES_EXPORT_CHUNK_ROWS, note_detail, ExportFormat, export_header, export_chunk, export_response,
+    encode_cursor, decode_cursor, encode_search_cursor, decode_search_cursor,
+    format_etag, if_none_match_hits, expected_versions, missed_write_status, not_modified, parse_detail_uuids,
+    note_details,
+)
+from api.services.note_statements import (
+    select_note_detail, select_note_details, select_note_version, select_note_state, select_notes_revision,
+    select_note_stats, select_matching_notes, select_export_rows, update_unlocked_note, lock_unlocked_note,
+    delete_unlocked_note,
+)
+from typing import Annotated, List, Optional
+import logging
+
+# Async counterparts of the CRUD/lock handlers in api.services.note. They run on
+# the event loop with an AsyncSession instead of occupying a threadpool slot, and
+# are mounted in place of the sync handlers when NOTES_DB_MODE=async.
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/notes", tags=["notes"])
+
+@router.post("/", response_model=NoteDetail)
+async def create_note(note: NoteCreate, db: AsyncSession = Depends(get_async_db)):
+    attrs = {"operation": "create_note"}
+    logger.info("Creating new note with name: %s", note.name, extra=attrs)
+    try:
+        db_note = Note(name=note.name, description=note.description)
+        db.add(db_note)
+        await db.commit()
+        await db.refresh(db_note)
+        logger.info("Successfully created note with UUID: %s", db_note.uuid, extra=attrs)
+        return note_detail(db_note)
+    except SQLAlchemyError as e:
+        logger.error("Database error while creating note: %s", e, extra=attrs)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while creating note: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/", response_model=List[NoteSummary])
+async def list_notes(
+    response: Response = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=LIST_NOTES_MAX_LIMIT)] = None,
+    cursor: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    attrs = {"operation": "list_notes"}
+    logger.info("Fetching notes (limit=%s, cursor=%s)", limit, cursor, extra=attrs)
+    after_id = decode_cursor(cursor) if cursor is not None else None
+    try:
+        revision = (await db.execute(select_notes_revision())).scalar_one()
+        etag = format_etag(revision)
+        if if_none_match_hits(if_none_match, etag):
+            logger.info("Notes unchanged since the client's copy", extra=attrs)
+            return not_modified(etag)
+
+        stmt = select(Note.id, Note.uuid, Note.name).order_by(Note.id.asc())
+        if after_id is not None:
+            stmt = stmt.where(Note.id > after_id)
+        if limit is not None:
+            # Fetch one extra row to find out whether another page exists
+            stmt = stmt.limit(limit + 1)
+        rows = (await db.execute(stmt)).all()
+
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+        if etag is not None:
+            response.headers["ETag"] = etag
+        logger.info("Successfully retrieved %s notes", len(rows), extra=attrs)
+        return trusted_json([{"uuid": row.uuid, "name": row.name} for row in rows], response)
+    except SQLAlchemyError as e:
+        logger.error("Database error while fetching notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while fetching notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/search", response_model=List[NoteSummary])
+async def search_notes(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    response: Response = None,
+    limit: Annotated[int, Query(ge=1, le=LIST_NOTES_MAX_LIMIT)] = SEARCH_NOTES_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    attrs = {"operation": "search_notes"}
+    logger.info("Searching notes (q=%r, limit=%s, cursor=%s)", q, limit, cursor, extra=attrs)
+    after = decode_search_cursor(cursor) if cursor is not None else None
+    try:
+        # Fetch one extra row to find out whether another page exists
+        rows = (await db.execute(select_matching_notes(q, limit + 1, after))).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_search_cursor(rows[-1].rank, rows[-1].id)
+        logger.info("Search matched %s notes on this page", len(rows), extra=attrs)
+        return trusted_json([{"uuid": row.uuid, "name": row.name} for row in rows], response)
+    except SQLAlchemyError as e:
+        logger.error("Database error while searching notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while searching notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/stats", response_model=NoteStats)
+async def get_note_stats(db: AsyncSession = Depends(get_async_db)):
+    attrs = {"operation": "get_note_stats"}
+    try:
+        stats = (await db.execute(select_note_stats())).one()
+        logger.info("Note stats: %s total, %s locked", stats.total, stats.locked, extra=attrs)
+        return {"total": stats.total, "locked": stats.locked, "unlocked": stats.unlocked}
+    except SQLAlchemyError as e:
+        logger.error("Database error while reading note stats: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+
+@router.get("/details", response_model=NoteDetails)
+async def get_note_details(
+    uuid: Annotated[List[str], Query(min_length=1)],
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    attrs = {"operation": "get_note_details"}
+    parsed = parse_detail_uuids(uuid)
+    logger.info("Fetching details of %s notes", len(parsed), extra=attrs)
+    try:
+        rows = (await db.execute(*select_note_details(list(parsed.values())))).all()
+        logger.info("Found %s of %s notes", len(rows), len(parsed), extra=attrs)
+        return trusted_json(note_details(parsed, rows), response)
+    except SQLAlchemyError as e:
+        logger.error("Database error while fetching note details: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while fetching note details: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/export")
+async def export_notes(
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "ndjson",
+    db: AsyncSession = Depends(get_async_db),
+):
+    attrs = {"operation": "export_notes"}
+    logger.info("Exporting notes as %s", export_format, extra=attrs)
+    try:
+        # Open the stream up front so a failure here can still be answered with a 500
+        result = await db.stream(select_export_rows(NOTES_EXPORT_CHUNK_ROWS))
+    except SQLAlchemyError as e:
+        logger.error("Database error while exporting notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while exporting notes: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def chunks():
+        exported = 0
+        try:
+            yield export_header(export_format)
+            async for partition in result.partitions():
+                exported += len(partition)
+                yield export_chunk(partition, export_format)
+            logger.info("Successfully exported %s notes", exported, extra=attrs)
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated stream
+            logger.error("Error after exporting %s notes: %s", exported, e, extra=attrs)
+            raise
+        finally:
+            await result.close()
+
+    return export_response(chunks(), export_format)
+
+@router.get("/{uuid}", response_model=NoteDetail)
+async def get_note_detail(
+    uuid: str,
+    response: Response = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    attrs = {"operation": "get_note_detail", "note.uuid": uuid}
+    logger.info("Fetching note details for UUID: %s", uuid, extra=attrs)
+    cached = note_detail_cache.get(uuid)
+    if cached is not None:
+        if if_none_match_hits(if_none_match, cached["etag"]):
+            return not_modified(cached["etag"])
+        logger.info("Served note %s from cache", uuid, extra=attrs)
+        if cached["etag"] is not None:
+            response.headers["ETag"] = cached["etag"]
+        response.headers[CACHE_STATUS_HEADER] = "HIT"
+        return trusted_json(cached["detail"], response)
+    try:
+        if if_none_match:
+            # Answer a matching conditional GET from the version alone
+            version = (await db.execute(*select_note_version(uuid))).scalar()
+            if version is not None and if_none_match_hits(if_none_match, format_etag(version)):
+                return not_modified(format_etag(version))
+
+        note = (await db.execute(*select_note_detail(uuid))).first()
+        if not note:
+            logger.warning("Note not found for UUID: %s", uuid, extra=attrs)
+            raise HTTPException(status_code=404, detail="Note not found")
+        logger.info("Successfully retrieved note: %s", note.name, extra=attrs)
+        detail = note_detail(note)
+        etag = format_etag(note.version)
+        note_detail_cache.put(detail, etag)
+        response.headers["ETag"] = etag
+        response.headers[CACHE_STATUS_HEADER] = "MISS"
+        return trusted_json(detail, response)
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions as-is
+    except SQLAlchemyError as e:
+        logger.error("Database error while fetching note %s: %s", uuid, e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while fetching note %s: %s", uuid, e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.put("/{uuid}", response_model=NoteDetail)
+async def update_note(
+    uuid: str,
+    update: NoteUpdate,
+    response: Response = None,
+    if_match: Annotated[Optional[str], Header()] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    attrs = {"operation": "update_note", "note.uuid": uuid}
+    logger.info("Updating note with UUID: %s", uuid, extra=attrs)
+    try:
+        values = {}
+        if update.name is not None:
+            values["name"] = update.name
+        if update.description is not None:
+            values["description"] = update.description
+        expected = expected_versions(if_match, update.version)
+        if not values:
+            # Nothing to write: answer from the note as it is. An UPDATE that
+            # changes nothing would still fire the notes triggers.
+            note = (await db.execute(*select_note_detail(uuid))).first()
+            if note is None:
+                logger.warning("Note not found for update, UUID: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=404, detail="Note not found")
+            if note.locked:
+                logger.warning("Attempted to update locked note: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=409, detail="Note is locked and cannot be modified.")
+            if expected is not None and note.version not in expected:
+                logger.warning("Stale version for note %s", uuid, extra=attrs)
+                raise HTTPException(status_code=412, detail="Note has been modified since it was fetched.")
+            response.headers["ETag"] = format_etag(note.version)
+            return note_detail(note)
+        outcome = (await db.execute(*update_unlocked_note(uuid, values, expected))).one()
+        if outcome.uuid is None:
+            state = outcome
+            if state.current_version is not None and not state.current_locked:
+                # A stale version, or a concurrent write: read what is committed now
+                state = (await db.execute(*select_note_state(uuid))).first()
+            status = missed_write_status(state)
+            if status == 404:
+                logger.warning("Note not found for update, UUID: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=404, detail="Note not found")
+            if status == 412:
+                logger.warning("Stale version for note %s", uuid, extra=attrs)
+                raise HTTPException(status_code=412, detail="Note has been modified since it was fetched.")
+            logger.warning("Attempted to update locked note: %s", uuid, extra=attrs)
+            raise HTTPException(status_code=409, detail="Note is locked and cannot be modified.")
+
+        await db.commit()
+        note_detail_cache.invalidate(uuid)
+        response.headers["ETag"] = format_etag(outcome.version)
+        logger.info("Successfully updated note: %s", outcome.name, extra=attrs)
+        return note_detail(outcome)
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions as-is
+    except SQLAlchemyError as e:
+        logger.error("Database error while updating note %s: %s", uuid, e, extra=attrs)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while updating note %s: %s", uuid, e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/{uuid}/actions/lock", response_model=NoteDetail)
+async def lock_note(
+    uuid: str,
+    response: Response = None,
+    if_match: Annotated[Optional[str], Header()] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    attrs = {"operation": "lock_note", "note.uuid": uuid}
+    logger.info("Locking note with UUID: %s", uuid, extra=attrs)
+    try:
+        expected = expected_versions(if_match)
+        outcome = (await db.execute(*lock_unlocked_note(uuid, expected))).one()
+        if outcome.uuid is None:
+            state = outcome
+            if state.current_version is not None and not state.current_locked:
+                # A stale version, or a concurrent write: read what is committed now
+                state = (await db.execute(*select_note_state(uuid))).first()
+            status = missed_write_status(state)
+            if status == 404:
+                logger.warning("Note not found for locking, UUID: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=404, detail="Note not found")
+            if status == 412:
+                logger.warning("Stale version for note %s", uuid, extra=attrs)
+                raise HTTPException(status_code=412, detail="Note has been modified since it was fetched.")
+            logger.warning("Attempted to lock already locked note: %s", uuid, extra=attrs)
+            raise HTTPException(status_code=409, detail="Note is already locked.")
+
+        await db.commit()
+        note_detail_cache.invalidate(uuid)
+        response.headers["ETag"] = format_etag(outcome.version)
+        logger.info("Successfully locked note: %s", outcome.name, extra=attrs)
+        return note_detail(outcome)
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions as-is
+    except SQLAlchemyError as e:
+        logger.error("Database error while locking note %s: %s", uuid, e, extra=attrs)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while locking note %s: %s", uuid, e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.delete("/{uuid}", response_model=dict)
+async def delete_note(
+    uuid: str,
+    if_match: Annotated[Optional[str], Header()] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    attrs = {"operation": "delete_note", "note.uuid": uuid}
+    logger.info("Deleting note with UUID: %s", uuid, extra=attrs)
+    try:
+        expected = expected_versions(if_match)
+        outcome = (await db.execute(*delete_unlocked_note(uuid, expected))).one()
+        if outcome.uuid is None:
+            state = outcome
+            if state.current_version is not None and not state.current_locked:
+                # A stale version, or a concurrent write: read what is committed now
+                state = (await db.execute(*select_note_state(uuid))).first()
+            status = missed_write_status(state)
+            if status == 404:
+                logger.warning("Note not found for deletion, UUID: %s", uuid, extra=attrs)
+                raise HTTPException(status_code=404, detail="Note not found")
+            if status == 412:
+                logger.warning("Stale version for note %s", uuid, extra=attrs)
+                raise HTTPException(status_code=412, detail="Note has been modified since it was fetched.")
+            logger.warning("Attempted to delete locked note: %s", uuid, extra=attrs)
+            raise HTTPException(status_code=409, detail="Note is locked and cannot be deleted.")
+
+        await db.commit()
+        note_detail_cache.invalidate(uuid)
+        logger.info("Successfully deleted note: %s", outcome.name, extra=attrs)
+        return {"detail": "Note deleted"}
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions as-is
+    except SQLAlchemyError as e:
+        logger.error("Database error while deleting note %s: %s", uuid, e, extra=attrs)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        logger.error("Unexpected error while deleting note %s: %s", uuid, e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Internal server error")
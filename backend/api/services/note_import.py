@@ -0,0 +1,171 @@
+from pydantic import ValidationError
+from api.schemas.note import NoteCreate
+from api.services.note_statements import NOTES_IMPORT_COPY, notes_import, insert_notes_from_import
+from sqlalchemy.schema import CreateTable, DropTable
+from typing import Literal
+import anyio
+import csv
+import io
+import json
+import os
+
+# Bulk import pipeline behind POST /notes/import:
+#
+#   request body (streamed) -> rows parsed line by line -> NoteCreate validation
+#   -> COPY FROM STDIN into a temporary staging table, one batch at a time
+#   -> a single INSERT ... SELECT into notes, which assigns uuids with
+#      gen_random_uuid() (random version 4 uuids, like Note.uuid's default)
+#
+# Only one batch of rows and at most NOTES_IMPORT_MAX_REPORTED_ERRORS error
+# entries are held in memory, whatever the size of the upload.
+
+NOTES_IMPORT_BATCH_ROWS = int(os.getenv("NOTES_IMPORT_BATCH_ROWS", "5000"))
+NOTES_IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("NOTES_IMPORT_MAX_REPORTED_ERRORS", "100"))
+
+ImportFormat = Literal["ndjson", "csv"]
+
+
+class ImportFormatError(ValueError):
+    """The upload as a whole cannot be read, e.g. a CSV without a name column."""
+
+
+class BodyStream(io.RawIOBase):
+    """
+    Read-only file over an iterator of byte chunks, so the request body can be
+    wrapped in a TextIOWrapper and read line by line.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def iter_request_body(request):
+    """
+    Yields the body of `request` chunk by chunk. Must be called from the
+    threadpool worker running a sync endpoint; each chunk is awaited on the
+    event loop.
+    """
+    stream = request.stream()
+
+    async def next_chunk():
+        async for chunk in stream:
+            return chunk
+        return None
+
+    while (chunk := anyio.from_thread.run(next_chunk)) is not None:
+        if chunk:
+            yield chunk
+
+
+def open_body_text(chunks):
+    # newline="" leaves line endings alone, which csv needs for quoted newlines
+    return io.TextIOWrapper(io.BufferedReader(BodyStream(chunks)), encoding="utf-8-sig", newline="")
+
+
+def parse_ndjson(lines):
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError:
+            yield line_no, None, "Invalid JSON"
+
+
+def parse_csv(lines):
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None:
+        return
+    if "name" not in reader.fieldnames:
+        raise ImportFormatError("CSV header must include a name column")
+    for record in reader:
+        # Empty description cells are read as missing, matching the CSV export
+        data = {"name": record["name"]}
+        if record.get("description"):
+            data["description"] = record["description"]
+        yield reader.line_num, data, None
+
+
+def parse_rows(text, import_format: ImportFormat):
+    return parse_csv(text) if import_format == "csv" else parse_ndjson(text)
+
+
+def validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+
+def validated_batches(records, summary, batch_rows=NOTES_IMPORT_BATCH_ROWS):
+    """
+    Validates parsed rows against NoteCreate and yields the valid ones in lists of
+    at most `batch_rows`. Rejected rows are counted in `summary`.
+    """
+    batch = []
+    for line_no, data, error in records:
+        if error is None:
+            try:
+                note = NoteCreate.model_validate(data)
+                if "\x00" in note.name or "\x00" in (note.description or ""):
+                    error = "Text must not contain NUL characters"
+            except ValidationError as e:
+                error = validation_error(e)
+        if error is not None:
+            summary["rejected"] += 1
+            if len(summary["errors"]) < NOTES_IMPORT_MAX_REPORTED_ERRORS:
+                summary["errors"].append({"line": line_no, "detail": error})
+            continue
+        batch.append(note)
+        if len(batch) >= batch_rows:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def copy_field(value) -> str:
+    # In COPY's CSV format an unquoted empty field is NULL and a quoted one is text
+    return "" if value is None else '"' + value.replace('"', '""') + '"'
+
+
+def copy_rows(notes) -> io.StringIO:
+    buffer = io.StringIO()
+    for note in notes:
+        buffer.write(f"{copy_field(note.name)},{copy_field(note.description)}\n")
+    buffer.seek(0)
+    return buffer
+
+
+def import_note_rows(db, text, import_format: ImportFormat, batch_rows=NOTES_IMPORT_BATCH_ROWS):
+    """
+    Runs the import inside the session's transaction and returns the summary.
+    The caller commits.
+    """
+    summary = {"accepted": 0, "rejected": 0, "errors": []}
+    db.execute(DropTable(notes_import, if_exists=True))
+    db.execute(CreateTable(notes_import))
+
+    cursor = db.connection().connection.cursor()
+    try:
+        for batch in validated_batches(parse_rows(text, import_format), summary, batch_rows):
+            cursor.copy_expert(NOTES_IMPORT_COPY, copy_rows(batch))
+    finally:
+        cursor.close()
+
+    summary["accepted"] = db.execute(insert_notes_from_import()).rowcount
+    return summary
@@ -0,0 +1,292 @@
+from functools import lru_cache
+from sqlalchemy import (
+    BigInteger, Column, Double, Integer, MetaData, String, Table, and_, any_, bindparam, cast, delete, false, func,
+    insert, literal, or_, outerjoin, select, true, update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG
+from models.note import Note, SEARCH_CONFIG
+from models.notes_revision import NotesRevision
+from models.note_stats import NoteStats
+
+# Per-note version for ETags and If-Match checks. Every mutation below bumps it
+# in the same statement that checks it, so writers never read-then-write: a
+# writer that waited on another's row lock (held until that transaction
+# commits) re-checks the version it left and gets a 412.
+ROW_VERSION = Note.version
+
+DETAIL_COLUMNS = (Note.uuid, Note.name, Note.description, Note.locked, Note.version)
+
+
+# The single-note statements are on every detail, update, lock and delete
+# request, so they are built once, with the note's uuid (and any other values)
+# as bound parameters. Their builders return (statement, parameters) for
+# Session.execute: a request then neither constructs the statement nor
+# recomputes its cache key, and the compiled SQL comes from the engine's
+# cache. The SQL text is identical on every request, which is what lets
+# asyncpg reuse its server-side prepared statements (see
+# DB_PREPARED_STATEMENT_CACHE_SIZE in database.py).
+
+# Not named "uuid": an UPDATE would read a parameter named after a column as a
+# new value for it
+NOTE_UUID = bindparam("note_uuid", type_=Note.uuid.type)
+
+SELECT_NOTE_DETAIL = select(*DETAIL_COLUMNS).where(Note.uuid == NOTE_UUID)
+
+SELECT_NOTE_VERSION = select(ROW_VERSION).select_from(Note).where(Note.uuid == NOTE_UUID)
+
+SELECT_NOTE_STATE = select(
+    ROW_VERSION.label("current_version"), Note.locked.label("current_locked"),
+).where(Note.uuid == NOTE_UUID)
+
+
+def select_note_detail(uuid):
+    return SELECT_NOTE_DETAIL, {"note_uuid": uuid}
+
+
+def select_note_version(uuid):
+    return SELECT_NOTE_VERSION, {"note_uuid": uuid}
+
+
+def select_note_state(uuid):
+    return SELECT_NOTE_STATE, {"note_uuid": uuid}
+
+
+# One array parameter rather than an IN list, so the SQL is the same however
+# many notes are asked for
+SELECT_NOTE_DETAILS = select(*DETAIL_COLUMNS).where(
+    Note.uuid == any_(bindparam("note_uuids", type_=ARRAY(Note.uuid.type)))
+)
+
+
+def select_note_details(uuids):
+    return SELECT_NOTE_DETAILS, {"note_uuids": uuids}
+
+
+SELECT_NOTE_STATES = select(
+    Note.uuid.label("found_uuid"), ROW_VERSION.label("current_version"), Note.locked.label("current_locked"),
+).where(Note.uuid == any_(bindparam("note_uuids", type_=ARRAY(Note.uuid.type))))
+
+
+def select_note_states(uuids):
+    return SELECT_NOTE_STATES, {"note_uuids": uuids}
+
+
+def select_notes_revision():
+    return select(cast(func.coalesce(func.sum(NotesRevision.revision), 0), BigInteger))
+
+
+def select_note_stats():
+    return select(
+        NoteStats.total, NoteStats.locked, (NoteStats.total - NoteStats.locked).label("unlocked"),
+    ).where(NoteStats.id == 1)
+
+
+def select_note_count():
+    return select(NoteStats.total).where(NoteStats.id == 1)
+
+
+def select_unlocked_note_count():
+    return select(NoteStats.total - NoteStats.locked).where(NoteStats.id == 1)
+
+
+def select_export_rows(chunk_rows):
+    """
+    Every note in id order, fetched `chunk_rows` at a time through a server-side
+    cursor (yield_per turns on stream_results) instead of being buffered whole.
+    """
+    return (
+        select(Note.uuid, Note.name, Note.description, Note.locked)
+        .order_by(Note.id.asc())
+        .execution_options(yield_per=chunk_rows)
+    )
+
+
+def select_matching_notes(q, limit, after=None):
+    """
+    Notes whose search vector matches the web-search style query `q`, best match
+    first. The `@@` filter is answered from the GIN index on search_vector; only
+    the matches are ranked. `after` is the (rank, id) of the last note of the
+    previous page. The rank is cast to double precision so the value sent back in
+    a cursor compares equal to the one Postgres computes.
+    """
+    query = func.websearch_to_tsquery(cast(literal(SEARCH_CONFIG), REGCONFIG), q)
+    rank = cast(func.ts_rank_cd(Note.search_vector, query), Double)
+    stmt = (
+        select(Note.id, Note.uuid, Note.name, rank.label("rank"))
+        .where(Note.search_vector.op("@@")(query))
+        .order_by(rank.desc(), Note.id.asc())
+        .limit(limit)
+    )
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(or_(rank < after_rank, and_(rank == after_rank, Note.id > after_id)))
+    return stmt
+
+
+# Single-statement mutations for the notes routers.
+#
+# Each builder wraps a conditional UPDATE/DELETE ... RETURNING in a CTE and
+# selects it next to a probe of the note's current version and locked flag, so
+# one round trip returns exactly one row:
+#   - changed columns are set          -> the mutation was applied
+#   - `current_version` is NULL        -> no such note (404)
+#   - changed columns are NULL and
+#     `current_locked` is true         -> the note is locked (409)
+#   - changed columns are NULL and
+#     `current_locked` is false        -> the version guard failed, or a
+#                                         concurrent write got there first
+# The `locked = false` and version guards are evaluated by Postgres under the
+# row lock, so there is no window between the checks and the write. The probe,
+# though, reads the snapshot taken when the statement started, from before any
+# write the mutation waited on. In the last case the caller reads the note
+# again with select_note_state, in a new statement that sees what such a write
+# committed: gone (404), locked (409) or changed (412).
+
+def _single_row_outcome(mutation, guarded):
+    if guarded:
+        # One array parameter, so the SQL is the same however many versions If-Match lists
+        mutation = mutation.where(ROW_VERSION == any_(bindparam("expected_versions", type_=ARRAY(Integer))))
+    changed = mutation.cte("changed")
+    one = select(literal(1).label("one")).subquery("one")
+    probe = SELECT_NOTE_STATE.subquery("probe")
+    return (
+        select(probe.c.current_version, probe.c.current_locked, *changed.c)
+        .select_from(one.outerjoin(probe, true()).outerjoin(changed, true()))
+    )
+
+
+def _mutation_parameters(uuid, expected_versions, **values):
+    parameters = {"note_uuid": uuid, **{f"new_{column}": value for column, value in values.items()}}
+    if expected_versions is not None:
+        parameters["expected_versions"] = expected_versions
+    return parameters
+
+
+# One statement per combination of updated columns and version guard
+@lru_cache(maxsize=None)
+def _update_unlocked_note(columns, guarded):
+    values = {column: bindparam(f"new_{column}") for column in columns}
+    values["version"] = Note.version + 1
+    mutation = (
+        update(Note)
+        .where(Note.uuid == NOTE_UUID, Note.locked == False)
+        .values(**values)
+        .returning(*DETAIL_COLUMNS)
+    )
+    return _single_row_outcome(mutation, guarded)
+
+
+@lru_cache(maxsize=None)
+def _delete_unlocked_note(guarded):
+    mutation = (
+        delete(Note)
+        .where(Note.uuid == NOTE_UUID, Note.locked == False)
+        .returning(*DETAIL_COLUMNS)
+    )
+    return _single_row_outcome(mutation, guarded)
+
+
+def update_unlocked_note(uuid, values, expected_versions=None):
+    """
+    UPDATE notes SET <values> WHERE uuid = :uuid AND NOT locked RETURNING <detail columns>.
+    `values` must not be empty: the version is bumped even if nothing else changes.
+    """
+    statement = _update_unlocked_note(tuple(sorted(values)), expected_versions is not None)
+    return statement, _mutation_parameters(uuid, expected_versions, **values)
+
+
+def lock_unlocked_note(uuid, expected_versions=None):
+    """
+    UPDATE notes SET locked = true WHERE uuid = :uuid AND NOT locked RETURNING <detail columns>.
+    """
+    return update_unlocked_note(uuid, {"locked": True}, expected_versions)
+
+
+def delete_unlocked_note(uuid, expected_versions=None):
+    """
+    DELETE FROM notes WHERE uuid = :uuid AND NOT locked RETURNING <detail columns>.
+    """
+    statement = _delete_unlocked_note(expected_versions is not None)
+    return statement, _mutation_parameters(uuid, expected_versions)
+
+
+# Batch variants. The outer SELECT reads `notes` from the snapshot taken before
+# the mutation, so it yields one row per requested note that existed then,
+# with its version and locked flag as `current_version` and `current_locked`:
+#   - changed columns are set  -> applied
+#   - changed columns are NULL -> classified like a single-note miss: locked
+#                                 (409), or read again with select_note_states
+# Requested uuids without a row do not exist (404).
+
+def _per_note_outcome(uuids, mutation):
+    changed = mutation.cte("changed")
+    return (
+        select(
+            Note.uuid.label("found_uuid"), ROW_VERSION.label("current_version"), Note.locked.label("current_locked"),
+            *changed.c,
+        )
+        .select_from(outerjoin(Note, changed, Note.uuid == changed.c.uuid))
+        .where(Note.uuid.in_(uuids))
+    )
+
+
+def insert_notes():
+    """
+    Multi-row INSERT ... RETURNING <detail columns>, executed with a list of
+    parameter sets. Rows come back in the order the parameter sets were given.
+    """
+    return insert(Note).returning(*DETAIL_COLUMNS, sort_by_parameter_order=True)
+
+
+def lock_unlocked_notes(uuids):
+    """
+    UPDATE notes SET locked = true WHERE uuid IN (:uuids) AND NOT locked RETURNING <detail columns>.
+    """
+    mutation = (
+        update(Note)
+        .where(Note.uuid.in_(uuids), Note.locked == False)
+        .values(locked=True, version=Note.version + 1)
+        .returning(*DETAIL_COLUMNS)
+    )
+    return _per_note_outcome(uuids, mutation)
+
+
+def delete_unlocked_notes(uuids):
+    """
+    DELETE FROM notes WHERE uuid IN (:uuids) AND NOT locked RETURNING <detail columns>.
+    """
+    mutation = (
+        delete(Note)
+        .where(Note.uuid.in_(uuids), Note.locked == False)
+        .returning(*DETAIL_COLUMNS)
+    )
+    return _per_note_outcome(uuids, mutation)
+
+
+# Bulk import. Validated rows are COPYed into a per-transaction temporary table
+# and moved into notes with one INSERT ... SELECT, so the notes triggers fire
+# once per import rather than once per batch.
+
+notes_import = Table(
+    "notes_import",
+    MetaData(),
+    Column("name", String, nullable=False),
+    Column("description", String, nullable=True),
+    schema="pg_temp",  # never resolves to a permanent table of the same name
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+NOTES_IMPORT_COPY = "COPY pg_temp.notes_import (name, description) FROM STDIN WITH (FORMAT csv)"
+
+
+def insert_notes_from_import():
+    """
+    INSERT INTO notes (uuid, name, description, locked, version)
+    SELECT gen_random_uuid(), name, description, false, 1 FROM pg_temp.notes_import.
+    SQLAlchemy adds the version from the column's Python default.
+    """
+    return insert(Note).from_select(
+        [Note.uuid, Note.name, Note.description, Note.locked],
+        select(func.gen_random_uuid(), notes_import.c.name, notes_import.c.description, false()),
+    )
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from models.note import Note
-from api.database import get_db
-from typing import Dict, Any
+from api.database import SessionLocal, get_db
+from api.services.note_statements import select_note_count, select_unlocked_note_count
+from api.services.memory_pressure import MemoryProbe, allocate, held_memory, release, rss_bytes, to_mb
+from concurrent.futures import ThreadPoolExecutor
+from database import pool_settings_from_env
+from typing import Annotated, Dict, Any, Literal, Optional
+import math
+import os
 import time
 import random
 import asyncio
@@ -14,16 +21,102 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/simulation", tags=["simulation"])
 
+MemoryAllocation = Literal["strings", "bytearray", "mmap"]
+
+# Query mix for /database-load. Each query type maps to a statement and a
+# one-line summary of its result for sample_results. The counts come from the
+# note_stats row, so they cost the same however many notes there are.
+DATABASE_LOAD_QUERIES = {
+    "count": (
+        select_note_count,
+        lambda i, result: f"count_{i}: {result.scalar_one()}",
+    ),
+    "ordered": (
+        lambda: select(Note).order_by(Note.id.desc()).limit(5),
+        lambda i, result: f"ordered_{i}: {len(result.all())} notes",
+    ),
+    "filtered": (
+        select_unlocked_note_count,
+        lambda i, result: f"filtered_{i}: {result.scalar_one()} unlocked notes",
+    ),
+}
+DATABASE_LOAD_DEFAULT_MIX = "count,ordered,filtered"
+# A connection per worker; by default no more than the pool can hand out
+_pool_settings = pool_settings_from_env()
+DATABASE_LOAD_MAX_CONCURRENCY = int(os.getenv(
+    "DATABASE_LOAD_MAX_CONCURRENCY", str(_pool_settings["pool_size"] + _pool_settings["max_overflow"])
+))
+
+
+def parse_query_mix(mix: str):
+    query_types = [name.strip() for name in mix.split(",") if name.strip()]
+    unknown = sorted(set(query_types) - set(DATABASE_LOAD_QUERIES))
+    if not query_types or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"mix must list query types from: {', '.join(DATABASE_LOAD_QUERIES)}",
+        )
+    return query_types
+
+
+def run_load_queries(db, query_types, indexes, pause):
+    """
+    Runs the queries at the given indexes of the mix on one session. Returns
+    (index, query type, latency in seconds, result summary) per query.
+    """
+    samples = []
+    for i in indexes:
+        query_type = query_types[i % len(query_types)]
+        statement, summarize = DATABASE_LOAD_QUERIES[query_type]
+        started = time.perf_counter()
+        summary = summarize(i, db.execute(statement()))
+        samples.append((i, query_type, time.perf_counter() - started, summary))
+        if pause:
+            time.sleep(pause)
+    return samples
+
+
+def percentile(sorted_values, p):
+    # Nearest rank
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def load_result(queries, concurrency, query_types, samples, elapsed):
+    samples = sorted(samples)
+    latencies = {}
+    for _, query_type, latency, _ in samples:
+        latencies.setdefault(query_type, []).append(latency * 1000)
+    latency_ms = {}
+    for query_type, values in latencies.items():
+        values.sort()
+        latency_ms[query_type] = {
+            "count": len(values),
+            **{f"p{p}": round(percentile(values, p), 2) for p in (50, 95, 99)},
+        }
+    return {
+        "message": "Database load test completed",
+        "queries_executed": queries,
+        "concurrency": concurrency,
+        "mix": query_types,
+        "duration": round(elapsed, 2),
+        "throughput_qps": round(queries / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": latency_ms,
+        "sample_results": [summary for *_, summary in samples[:5]],  # First 5 results
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @router.get("/slow", response_model=Dict[str, Any])
 def simulate_slow_response(delay: int = None, db: Session = Depends(get_db)):
     """
     Simulates slow database queries with configurable delay.
     Use ?delay=X to specify delay in seconds (default: random 2-5 seconds)
     """
+    attrs = {"operation": "simulate_slow_response"}
     if delay is None:
         delay = random.randint(2, 5)
     
-    logger.info(f"Starting slow response simulation with {delay}s delay")
+    logger.info("Starting slow response simulation with %ss delay", delay, extra=attrs)
     start_time = time.time()
     
     # Simulate slow database operation
@@ -31,7 +124,7 @@ def simulate_slow_response(delay: int = None, db: Session = Depends(get_db)):
     
     try:
         # Perform actual database query to generate realistic telemetry
-        note_count = db.query(Note).count()
+        note_count = db.execute(select_note_count()).scalar_one()
         
         end_time = time.time()
         actual_delay = round(end_time - start_time, 2)
@@ -44,10 +137,10 @@ def simulate_slow_response(delay: int = None, db: Session = Depends(get_db)):
             "timestamp": datetime.now().isoformat()
         }
         
-        logger.info(f"Slow response simulation completed: {actual_delay}s delay, {note_count} notes")
+        logger.info("Slow response simulation completed: %ss delay, %s notes", actual_delay, note_count, extra=attrs)
         return result
     except Exception as e:
-        logger.error(f"Error in slow response simulation: {str(e)}")
+        logger.error("Error in slow response simulation: %s", e, extra=attrs)
         raise HTTPException(status_code=500, detail="Simulation error")
 
 @router.get("/error", response_model=Dict[str, Any])
@@ -56,7 +149,8 @@ def simulate_error(error_rate: float = 0.5, db: Session = Depends(get_db)):
     Generates random errors based on error_rate (0.0-1.0).
     Default 50% chance of error.
     """
-    logger.info(f"Starting error simulation with error rate: {error_rate}")
+    attrs = {"operation": "simulate_error"}
+    logger.info("Starting error simulation with error rate: %s", error_rate, extra=attrs)
     
     if random.random() < error_rate:
         error_type = random.choice([
@@ -80,7 +174,7 @@ def simulate_error(error_rate: float = 0.5, db: Session = Depends(get_db)):
             "timeout": 504
         }
         
-        logger.error(f"Simulated error triggered: {error_type} - {error_messages[error_type]}")
+        logger.error("Simulated error triggered: %s - %s", error_type, error_messages[error_type], extra=attrs)
         raise HTTPException(
             status_code=status_codes[error_type],
             detail=error_messages[error_type]
@@ -88,112 +182,169 @@ def simulate_error(error_rate: float = 0.5, db: Session = Depends(get_db)):
     
     try:
         # Success case - perform actual database operation
-        note_count = db.query(Note).count()
+        note_count = db.execute(select_note_count()).scalar_one()
         result = {
             "message": "Error simulation passed - no error generated",
             "error_rate": error_rate,
             "note_count": note_count,
             "timestamp": datetime.now().isoformat()
         }
-        logger.info(f"Error simulation completed successfully with {note_count} notes")
+        logger.info("Error simulation completed successfully with %s notes", note_count, extra=attrs)
         return result
     except Exception as e:
-        logger.error(f"Unexpected error in error simulation: {str(e)}")
+        logger.error("Unexpected error in error simulation: %s", e, extra=attrs)
         raise HTTPException(status_code=500, detail="Simulation error")
 
 @router.get("/memory", response_model=Dict[str, Any])
-def simulate_memory_intensive(size_mb: int = None):
+def simulate_memory_intensive(
+    size_mb: Annotated[Optional[int], Query(ge=1)] = None,
+    allocation: MemoryAllocation = "strings",
+    hold: Annotated[float, Query(ge=0)] = 1,
+):
     """
     Simulates memory-intensive operations.
-    Use ?size_mb=X to specify memory allocation in MB (default: random 10-50 MB)
+    Use ?size_mb=X to specify memory allocation in MB (default: random 10-50 MB),
+    ?allocation=bytearray or mmap to allocate exactly that much in one block
+    (default: strings, 10KB Python strings) and ?hold=X to hold it for X seconds.
+    Reports RSS before, while allocated and after release, the tracemalloc peak
+    and how long the release took.
     """
+    attrs = {"operation": "simulate_memory_intensive"}
     if size_mb is None:
         size_mb = random.randint(10, 50)
-    
-    logger.info(f"Starting memory simulation with {size_mb}MB allocation")
+
+    logger.info("Starting memory simulation with %sMB %s allocation", size_mb, allocation, extra=attrs)
     start_time = time.time()
-    
-    # Simulate memory allocation
-    data = []
+
     try:
-        # Allocate memory (1MB = 1024*1024 bytes, using list of strings)
-        for _ in range(size_mb * 100):  # Approximate memory usage
-            data.append("x" * 10240)  # 10KB strings
-        
-        # Hold memory for a moment
-        time.sleep(1)
-        
-        # Clean up
-        del data
-        
-        end_time = time.time()
-        duration = round(end_time - start_time, 2)
-        
+        with MemoryProbe() as probe:
+            data = allocate(size_mb, allocation)
+            probe.allocated()
+
+            # Hold memory for a moment
+            time.sleep(hold)
+
+            release_start = time.perf_counter()
+            release(data)
+            del data
+            release_seconds = time.perf_counter() - release_start
+
+        duration = round(time.time() - start_time, 2)
         result = {
-            "message": f"Memory operation completed",
+            "message": "Memory operation completed",
             "allocated_mb": size_mb,
+            "allocation": allocation,
             "duration": duration,
+            **probe.report(),
+            "release_seconds": round(release_seconds, 4),
             "timestamp": datetime.now().isoformat()
         }
-        
-        logger.info(f"Memory simulation completed: {size_mb}MB allocated in {duration}s")
+
+        logger.info("Memory simulation completed: %sMB allocated in %ss", size_mb, duration, extra=attrs)
         return result
-        
+
     except MemoryError as e:
-        logger.error(f"Memory error in simulation with {size_mb}MB: {str(e)}")
+        logger.error("Memory error in simulation with %sMB: %s", size_mb, e, extra=attrs)
         raise HTTPException(status_code=507, detail="Insufficient memory")
     except Exception as e:
-        logger.error(f"Unexpected error in memory simulation: {str(e)}")
+        logger.error("Unexpected error in memory simulation: %s", e, extra=attrs)
         raise HTTPException(status_code=500, detail="Memory simulation error")
 
+def memory_pressure_status():
+    return {
+        "held_mb": held_memory.held_mb,
+        "cap_mb": held_memory.cap_mb,
+        "rss_mb": to_mb(rss_bytes()),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/memory/pressure", response_model=Dict[str, Any])
+def get_memory_pressure():
+    """
+    Shows how much memory this worker holds for the sustained-pressure simulation.
+    """
+    return memory_pressure_status()
+
+@router.post("/memory/pressure", response_model=Dict[str, Any])
+def add_memory_pressure(
+    size_mb: Annotated[int, Query(ge=1)] = 50,
+    allocation: MemoryAllocation = "bytearray",
+):
+    """
+    Allocates size_mb more and keeps it across requests, up to
+    MEMORY_PRESSURE_CAP_MB per worker; 409 when the cap would be exceeded.
+    Call repeatedly to ramp a worker towards its memory limit.
+    """
+    attrs = {"operation": "add_memory_pressure"}
+    logger.info("Holding %sMB more memory (%sMB held)", size_mb, held_memory.held_mb, extra=attrs)
+    try:
+        if not held_memory.hold(size_mb, allocation):
+            logger.warning("Memory pressure cap of %sMB reached", held_memory.cap_mb, extra=attrs)
+            raise HTTPException(
+                status_code=409,
+                detail=f"Holding {size_mb}MB more would exceed the {held_memory.cap_mb}MB cap",
+            )
+    except MemoryError as e:
+        logger.error("Memory error while holding %sMB: %s", size_mb, e, extra=attrs)
+        raise HTTPException(status_code=507, detail="Insufficient memory")
+    return memory_pressure_status()
+
+@router.delete("/memory/pressure", response_model=Dict[str, Any])
+def release_memory_pressure():
+    """
+    Frees everything held by the sustained-pressure simulation in this worker.
+    """
+    attrs = {"operation": "release_memory_pressure"}
+    rss_before = rss_bytes()
+    released_mb, release_seconds = held_memory.release_all()
+    logger.info("Released %sMB of held memory in %.3fs", released_mb, release_seconds, extra=attrs)
+    return {
+        **memory_pressure_status(),
+        "released_mb": released_mb,
+        "rss_before_mb": to_mb(rss_before),
+        "release_seconds": round(release_seconds, 4),
+    }
+
 @router.get("/database-load", response_model=Dict[str, Any])
-def simulate_database_load(queries: int = None, db: Session = Depends(get_db)):
+def simulate_database_load(
+    queries: int = None,
+    concurrency: Annotated[int, Query(ge=1, le=DATABASE_LOAD_MAX_CONCURRENCY)] = 1,
+    mix: str = DATABASE_LOAD_DEFAULT_MIX,
+    pause: Annotated[float, Query(ge=0)] = 0.1,
+    db: Session = Depends(get_db),
+):
     """
     Creates heavy database load with multiple queries.
-    Use ?queries=X to specify number of queries (default: random 10-50)
+    Use ?queries=X to specify number of queries (default: random 10-50),
+    ?concurrency=N to spread them over N pooled connections,
+    ?mix=count,filtered to choose the query types (cycled in order; repeat a
+    type to weight it) and ?pause=0 to drop the 0.1s pause between queries.
     """
+    attrs = {"operation": "simulate_database_load"}
     if queries is None:
         queries = random.randint(10, 50)
-    
-    logger.info(f"Starting database load simulation with {queries} queries")
+    query_types = parse_query_mix(mix)
+
+    logger.info("Starting database load simulation with %s queries over %s connections", queries, concurrency, extra=attrs)
     start_time = time.time()
-    results = []
-    
+
     try:
-        for i in range(queries):
-            # Mix of different query types to stress the database
-            if i % 3 == 0:
-                # Count query
-                count = db.query(Note).count()
-                results.append(f"count_{i}: {count}")
-            elif i % 3 == 1:
-                # Order by query
-                notes = db.query(Note).order_by(Note.id.desc()).limit(5).all()
-                results.append(f"ordered_{i}: {len(notes)} notes")
-            else:
-                # Filter query
-                notes = db.query(Note).filter(Note.locked == False).all()
-                results.append(f"filtered_{i}: {len(notes)} unlocked notes")
-            
-            # Small delay between queries
-            time.sleep(0.1)
-        
-        end_time = time.time()
-        duration = round(end_time - start_time, 2)
-        
-        result = {
-            "message": f"Database load test completed",
-            "queries_executed": queries,
-            "duration": duration,
-            "sample_results": results[:5],  # First 5 results
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        logger.info(f"Database load simulation completed: {queries} queries in {duration}s")
+        if concurrency == 1:
+            samples = run_load_queries(db, query_types, range(queries), pause)
+        else:
+            # One session, and so one pooled connection, per worker
+            def worker(offset):
+                with SessionLocal() as session:
+                    return run_load_queries(session, query_types, range(offset, queries, concurrency), pause)
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                samples = [sample for part in executor.map(worker, range(concurrency)) for sample in part]
+
+        result = load_result(queries, concurrency, query_types, samples, time.time() - start_time)
+        logger.info("Database load simulation completed: %s queries in %ss", queries, result["duration"], extra=attrs)
         return result
-        
+
     except Exception as e:
-        logger.error(f"Error in database load simulation: {str(e)}")
+        logger.error("Error in database load simulation: %s", e, extra=attrs)
         raise HTTPException(status_code=500, detail="Database load simulation error")
 
 @router.get("/timeout", response_model=Dict[str, Any])
@@ -202,11 +353,12 @@ def simulate_timeout(timeout_chance: float = 0.3):
     Simulates connection timeouts.
     Use ?timeout_chance=X (0.0-1.0) to set timeout probability (default: 30%)
     """
-    logger.info(f"Starting timeout simulation with {timeout_chance} chance")
+    attrs = {"operation": "simulate_timeout"}
+    logger.info("Starting timeout simulation with %s chance", timeout_chance, extra=attrs)
     
     try:
         if random.random() < timeout_chance:
-            logger.warning(f"Timeout simulation triggered - sleeping for 10s")
+            logger.warning("Timeout simulation triggered - sleeping for 10s", extra=attrs)
             # Simulate a very long operation that would timeout
             time.sleep(10)  # This will likely cause a timeout in most clients
             return {"message": "This shouldn't be reached due to timeout"}
@@ -222,11 +374,11 @@ def simulate_timeout(timeout_chance: float = 0.3):
             "timestamp": datetime.now().isoformat()
         }
         
-        logger.info(f"Timeout simulation completed successfully with {delay:.2f}s delay")
+        logger.info("Timeout simulation completed successfully with %.2fs delay", delay, extra=attrs)
         return result
         
     except Exception as e:
-        logger.error(f"Error in timeout simulation: {str(e)}")
+        logger.error("Error in timeout simulation: %s", e, extra=attrs)
         raise HTTPException(status_code=500, detail="Timeout simulation error")
 
 @router.get("/random", response_model=Dict[str, Any])
@@ -235,7 +387,8 @@ def simulate_random_behavior(db: Session = Depends(get_db)):
     Randomly selects one of the above simulation behaviors.
     Useful for generating varied telemetry data.
     """
-    logger.info("Starting random behavior simulation")
+    attrs = {"operation": "simulate_random_behavior"}
+    logger.info("Starting random behavior simulation", extra=attrs)
     
     behaviors = [
         ("slow", lambda: simulate_slow_response(db=db)),
@@ -246,18 +399,18 @@ def simulate_random_behavior(db: Session = Depends(get_db)):
     ]
     
     behavior_name, behavior_func = random.choice(behaviors)
-    logger.info(f"Random simulation selected: {behavior_name}")
+    logger.info("Random simulation selected: %s", behavior_name, extra=attrs)
     
     try:
         result = behavior_func()
         result["simulation_type"] = behavior_name
-        logger.info(f"Random simulation completed successfully: {behavior_name}")
+        logger.info("Random simulation completed successfully: %s", behavior_name, extra=attrs)
         return result
     except HTTPException as e:
-        logger.warning(f"HTTP exception in random simulation ({behavior_name}): {e.detail}")
+        logger.warning("HTTP exception in random simulation (%s): %s", behavior_name, e.detail, extra=attrs)
         raise e  # Re-raise HTTP exceptions
     except Exception as e:
-        logger.error(f"Unexpected error in random simulation ({behavior_name}): {str(e)}")
+        logger.error("Unexpected error in random simulation (%s): %s", behavior_name, e, extra=attrs)
         raise HTTPException(status_code=500, detail=f"Random simulation error: {str(e)}")
 
 @router.get("/status", response_model=Dict[str, Any])
@@ -265,24 +418,30 @@ def simulation_status():
     """
     Returns information about available simulation endpoints.
     """
-    logger.info("Simulation status endpoint accessed")
+    attrs = {"operation": "simulation_status"}
+    logger.info("Simulation status endpoint accessed", extra=attrs)
     return {
         "message": "Simulation service is running",
         "available_endpoints": {
             "/slow": "Simulates slow database operations (2-5 sec delay)",
             "/error": "Generates random errors (50% chance by default)",
             "/memory": "Simulates memory-intensive operations (10-50 MB)",
+            "/memory/pressure": "POST holds memory across requests up to a cap, DELETE releases it",
             "/database-load": "Creates heavy database load (10-50 queries)",
             "/timeout": "Simulates connection timeouts (30% chance)",
             "/random": "Randomly selects one of the above behaviors",
-            "/status": "This endpoint - shows simulation service status"
+            "/status": "This endpoint - shows simulation service status",
+            "/async/slow": "Like /slow, but waits on the event loop instead of a worker thread",
+            "/async/database-load": "Like /database-load, on the async database engine",
+            "/async/timeout": "Like /timeout, but waits on the event loop instead of a worker thread"
         },
         "usage_tips": {
             "slow": "Use ?delay=5 to set specific delay",
             "error": "Use ?error_rate=0.8 for 80% error rate",
-            "memory": "Use ?size_mb=100 for 100MB allocation",
-            "database_load": "Use ?queries=25 for 25 database queries",
-            "timeout": "Use ?timeout_chance=0.5 for 50% timeout chance"
+            "memory": "Use ?size_mb=100&allocation=bytearray for exactly 100MB of resident memory",
+            "database_load": "Use ?queries=25 for 25 database queries, ?concurrency=8&pause=0 for a capacity probe",
+            "timeout": "Use ?timeout_chance=0.5 for 50% timeout chance",
+            "async": "Use /async/slow etc. for high-concurrency latency that does not occupy the threadpool"
         },
         "timestamp": datetime.now().isoformat()
     }
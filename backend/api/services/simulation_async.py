@@ -0,0 +1,139 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.database import AsyncSessionLocal, get_async_db
+from api.services.note_statements import select_note_count
+from api.services.simulation import (
+    DATABASE_LOAD_QUERIES, DATABASE_LOAD_DEFAULT_MIX, DATABASE_LOAD_MAX_CONCURRENCY, parse_query_mix, load_result,
+)
+from typing import Annotated, Dict, Any
+import time
+import random
+import asyncio
+from datetime import datetime
+import logging
+
+# Async variants of the sleeping simulations in api.services.simulation. They
+# wait with asyncio.sleep and query through the asyncpg engine, so concurrent
+# synthetic latency costs the worker nothing but open sockets and leaves the
+# threadpool to the real endpoints. Pick them per request by calling
+# /simulation/async/<name> instead of /simulation/<name>.
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/simulation/async", tags=["simulation"])
+
+@router.get("/slow", response_model=Dict[str, Any])
+async def simulate_slow_response(delay: int = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Simulates slow database queries with configurable delay, without blocking a thread.
+    Use ?delay=X to specify delay in seconds (default: random 2-5 seconds)
+    """
+    attrs = {"operation": "simulate_slow_response_async"}
+    if delay is None:
+        delay = random.randint(2, 5)
+
+    logger.info("Starting async slow response simulation with %ss delay", delay, extra=attrs)
+    start_time = time.time()
+
+    # No connection is checked out until the query below
+    await asyncio.sleep(delay)
+
+    try:
+        note_count = await db.scalar(select_note_count())
+
+        actual_delay = round(time.time() - start_time, 2)
+        result = {
+            "message": "Simulated slow operation completed",
+            "requested_delay": delay,
+            "actual_delay": actual_delay,
+            "note_count": note_count,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        logger.info("Async slow response simulation completed: %ss delay, %s notes", actual_delay, note_count, extra=attrs)
+        return result
+    except Exception as e:
+        logger.error("Error in async slow response simulation: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Simulation error")
+
+async def run_load_queries(db, query_types, indexes, pause):
+    """
+    Async counterpart of api.services.simulation.run_load_queries.
+    """
+    samples = []
+    for i in indexes:
+        query_type = query_types[i % len(query_types)]
+        statement, summarize = DATABASE_LOAD_QUERIES[query_type]
+        started = time.perf_counter()
+        summary = summarize(i, await db.execute(statement()))
+        samples.append((i, query_type, time.perf_counter() - started, summary))
+        if pause:
+            await asyncio.sleep(pause)
+    return samples
+
+@router.get("/database-load", response_model=Dict[str, Any])
+async def simulate_database_load(
+    queries: int = None,
+    concurrency: Annotated[int, Query(ge=1, le=DATABASE_LOAD_MAX_CONCURRENCY)] = 1,
+    mix: str = DATABASE_LOAD_DEFAULT_MIX,
+    pause: Annotated[float, Query(ge=0)] = 0.1,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Creates database load with multiple queries on the async engine.
+    Takes the same parameters as /simulation/database-load; concurrent
+    queries run as tasks on the event loop rather than in threads.
+    """
+    attrs = {"operation": "simulate_database_load_async"}
+    if queries is None:
+        queries = random.randint(10, 50)
+    query_types = parse_query_mix(mix)
+
+    logger.info("Starting async database load simulation with %s queries over %s connections", queries, concurrency, extra=attrs)
+    start_time = time.time()
+
+    try:
+        if concurrency == 1:
+            samples = await run_load_queries(db, query_types, range(queries), pause)
+        else:
+            # One session, and so one pooled connection, per worker
+            async def worker(offset):
+                async with AsyncSessionLocal() as session:
+                    return await run_load_queries(session, query_types, range(offset, queries, concurrency), pause)
+            parts = await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+            samples = [sample for part in parts for sample in part]
+
+        result = load_result(queries, concurrency, query_types, samples, time.time() - start_time)
+        logger.info("Async database load simulation completed: %s queries in %ss", queries, result["duration"], extra=attrs)
+        return result
+
+    except Exception as e:
+        logger.error("Error in async database load simulation: %s", e, extra=attrs)
+        raise HTTPException(status_code=500, detail="Database load simulation error")
+
+@router.get("/timeout", response_model=Dict[str, Any])
+async def simulate_timeout(timeout_chance: float = 0.3):
+    """
+    Simulates connection timeouts without blocking a thread.
+    Use ?timeout_chance=X (0.0-1.0) to set timeout probability (default: 30%)
+    """
+    attrs = {"operation": "simulate_timeout_async"}
+    logger.info("Starting async timeout simulation with %s chance", timeout_chance, extra=attrs)
+
+    if random.random() < timeout_chance:
+        logger.warning("Async timeout simulation triggered - sleeping for 10s", extra=attrs)
+        await asyncio.sleep(10)
+        return {"message": "This shouldn't be reached due to timeout"}
+
+    delay = random.uniform(0.5, 2.0)
+    await asyncio.sleep(delay)
+
+    result = {
+        "message": "Operation completed without timeout",
+        "timeout_chance": timeout_chance,
+        "actual_delay": round(delay, 2),
+        "timestamp": datetime.now().isoformat()
+    }
+
+    logger.info("Async timeout simulation completed successfully with %.2fs delay", delay, extra=attrs)
+    return result
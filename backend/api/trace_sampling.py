@@ -0,0 +1,142 @@
+from opentelemetry import metrics
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, Decision, ParentBased, Sampler, SamplingResult, TraceIdRatioBased
+from opentelemetry.trace import SpanContext, SpanKind, StatusCode, TraceFlags
+import os
+
+# Trace sampling. Imported by api.otel_setup when tracing is set up, so the
+# SDK stays out of the import path when telemetry is disabled.
+#
+#   TRACE_SAMPLE_RATIO    share of new traces to sample, 0.0-1.0 (default 1.0).
+#                         Requests that carry a traceparent follow the caller's
+#                         decision, and child spans follow their parent's.
+#   TRACE_SAMPLE_ERRORS   keep the request span of failed requests outside the
+#                         ratio (default true)
+#   TRACE_SAMPLE_SLOW_MS  keep the request span of requests slower than this
+#                         outside the ratio (default 0, off)
+#
+# Requests outside the ratio are only recorded when one of the two rules is on,
+# and then only their request span: database and other child spans are never
+# created for them, which is where the saving is. The batch processor's queue
+# and batch sizes come from the standard OTEL_BSP_* variables.
+#
+# trace.spans.dropped counts spans that were not exported because of sampling,
+# by reason (ratio or parent); trace.spans.kept counts request spans exported
+# by the error and slow rules.
+
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+TRACE_SAMPLE_ERRORS = os.getenv("TRACE_SAMPLE_ERRORS", "true").lower() == "true"
+TRACE_SAMPLE_SLOW_MS = float(os.getenv("TRACE_SAMPLE_SLOW_MS", "0"))
+
+meter = metrics.get_meter(__name__)
+dropped_spans = meter.create_counter(
+    "trace.spans.dropped", unit="{span}", description="Spans not exported because of trace sampling"
+)
+kept_spans = meter.create_counter(
+    "trace.spans.kept", unit="{span}", description="Request spans outside the sample ratio exported by the error and slow rules"
+)
+
+
+class CountingSampler(Sampler):
+    """
+    Delegates to another sampler and counts the spans it drops.
+    """
+
+    def __init__(self, sampler, reason):
+        self.sampler = sampler
+        self.reason = reason
+
+    def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None, links=None, trace_state=None):
+        result = self.sampler.should_sample(parent_context, trace_id, name, kind, attributes, links, trace_state)
+        if result.decision is Decision.DROP:
+            dropped_spans.add(1, {"reason": self.reason})
+        return result
+
+    def get_description(self):
+        return self.sampler.get_description()
+
+
+class RootRatioSampler(Sampler):
+    """
+    TraceIdRatioBased for new traces. With record_unsampled, request (server)
+    spans outside the ratio are recorded but not sampled, so
+    SampledSpanProcessor can still export them; anything else is dropped.
+    """
+
+    def __init__(self, ratio, record_unsampled=False):
+        self.ratio = TraceIdRatioBased(ratio)
+        self.record_unsampled = record_unsampled
+
+    def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None, links=None, trace_state=None):
+        result = self.ratio.should_sample(parent_context, trace_id, name, kind, attributes, links, trace_state)
+        if result.decision is not Decision.DROP:
+            return result
+        if self.record_unsampled and kind is SpanKind.SERVER:
+            # Counted by SampledSpanProcessor once the span ends
+            return SamplingResult(Decision.RECORD_ONLY, attributes, result.trace_state)
+        dropped_spans.add(1, {"reason": "ratio"})
+        return result
+
+    def get_description(self):
+        return f"RootRatioSampler{{{self.ratio.rate}, record_unsampled={self.record_unsampled}}}"
+
+
+def build_sampler(ratio=TRACE_SAMPLE_RATIO, sample_errors=TRACE_SAMPLE_ERRORS, slow_ms=TRACE_SAMPLE_SLOW_MS):
+    if not 0.0 <= ratio <= 1.0:
+        raise ValueError(f"TRACE_SAMPLE_RATIO must be between 0.0 and 1.0, got {ratio}")
+    unsampled_parent = CountingSampler(ALWAYS_OFF, "parent")
+    return ParentBased(
+        root=RootRatioSampler(ratio, record_unsampled=sample_errors or slow_ms > 0),
+        remote_parent_not_sampled=unsampled_parent,
+        local_parent_not_sampled=unsampled_parent,
+    )
+
+
+def _as_sampled(span):
+    context = span.context
+    return ReadableSpan(
+        name=span.name,
+        context=SpanContext(context.trace_id, context.span_id, context.is_remote,
+                            TraceFlags(TraceFlags.SAMPLED), context.trace_state),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class SampledSpanProcessor(BatchSpanProcessor):
+    """
+    Batches sampled spans as usual, and also exports recorded-only request
+    spans that failed or ran longer than slow_ms.
+    """
+
+    def __init__(self, span_exporter, sample_errors=TRACE_SAMPLE_ERRORS, slow_ms=TRACE_SAMPLE_SLOW_MS, **kwargs):
+        super().__init__(span_exporter, **kwargs)
+        self.sample_errors = sample_errors
+        self.slow_ns = slow_ms * 1_000_000
+
+    def keep_reason(self, span):
+        if self.sample_errors and span.status.status_code is StatusCode.ERROR:
+            return "error"
+        if self.slow_ns and span.end_time - span.start_time >= self.slow_ns:
+            return "slow"
+        return None
+
+    def on_end(self, span):
+        if span.context.trace_flags.sampled:
+            super().on_end(span)
+            return
+        reason = self.keep_reason(span)
+        if reason is None:
+            dropped_spans.add(1, {"reason": "ratio"})
+            return
+        kept_spans.add(1, {"reason": reason})
+        super().on_end(_as_sampled(span))
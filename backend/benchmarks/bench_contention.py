@@ -0,0 +1,125 @@
+"""
+Write contention benchmark: many writers doing read-modify-write on the same
+notes.
+
+Every writer repeatedly reads a note, treats its description as a counter and
+writes back the counter plus one. Two modes:
+
+    optimistic  the write carries the version that was read; a 412 means
+                another writer got there first, so the writer re-reads and
+                retries
+    blind       the write carries no version, as the handlers used to behave:
+                nothing fails, but concurrent increments overwrite each other
+
+For each mode it reports committed writes/s, conflicts (412s) per committed
+write, write latency percentiles and lost updates: committed increments
+missing from the final counters. Optimistic runs should lose none. The notes
+are never locked, so a 409 is a misclassified conflict: it is retried like a
+412 and counted separately, and should stay at zero.
+
+Like bench_http, it drives the app in-process (run against a scratch
+database) or a running server with --base-url.
+
+    python -m benchmarks.bench_contention --writers 32 --notes 1 --writes 2000
+    python -m benchmarks.bench_contention --base-url http://localhost:8000 --modes optimistic
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+from benchmarks.bench_http import create_notes, percentile
+
+MODES = ("optimistic", "blind")
+
+
+async def writer(client, uuids, mode, counter, stats):
+    for i in counter:
+        if i >= stats["target"]:
+            return
+        note_uuid = uuids[i % len(uuids)]
+        while True:
+            note = (await client.get(f"/notes/{note_uuid}")).json()
+            update = {"description": str(int(note["description"]) + 1)}
+            if mode == "optimistic":
+                update["version"] = note["version"]
+            start = time.perf_counter()
+            response = await client.put(f"/notes/{note_uuid}", json=update)
+            if response.status_code == 412:
+                stats["conflicts"] += 1
+                continue
+            if response.status_code == 409:
+                stats["unexpected_409s"] += 1
+                continue
+            response.raise_for_status()
+            stats["latencies"].append(time.perf_counter() - start)
+            break
+
+
+async def run_mode(client, mode, args):
+    uuids = await create_notes(client, args.notes, f"contention {mode}")
+    for note_uuid in uuids:
+        (await client.put(f"/notes/{note_uuid}", json={"description": "0"})).raise_for_status()
+
+    stats = {"target": args.writes, "conflicts": 0, "unexpected_409s": 0, "latencies": []}
+    counter = itertools.count()
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(client, uuids, mode, counter, stats) for _ in range(args.writers)))
+    elapsed = time.perf_counter() - start
+
+    final = 0
+    for note_uuid in uuids:
+        final += int((await client.get(f"/notes/{note_uuid}")).json()["description"])
+    committed = len(stats["latencies"])
+    latencies_ms = sorted(latency * 1000 for latency in stats["latencies"])
+    return {
+        "writes_per_s": round(committed / elapsed, 1),
+        "conflicts_per_write": round(stats["conflicts"] / committed, 2),
+        **{f"p{p}_ms": round(percentile(latencies_ms, p), 2) for p in (50, 95, 99)},
+        "lost_updates": committed - final,
+        "unexpected_409s": stats["unexpected_409s"],
+    }
+
+
+async def run(args):
+    async def run_all(client):
+        return {mode: await run_mode(client, mode, args) for mode in args.modes}
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            return await run_all(client)
+
+    from api.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await run_all(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--writers", type=int, default=32, help="concurrent writers (default: 32)")
+    parser.add_argument("--notes", type=int, default=1, help="notes the writers share (default: 1)")
+    parser.add_argument("--writes", type=int, default=1000, help="committed writes per mode (default: 1000)")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the app in-process")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = asyncio.run(run(args))
+
+    print(f"{args.writers} writers on {args.notes} note(s), {args.writes} writes per mode")
+    print(f"{'mode':>11} {'writes/s':>9} {'412s/write':>11} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'lost':>6} {'409s':>6}")
+    for mode, result in results.items():
+        print(f"{mode:>11} {result['writes_per_s']:>9.1f} {result['conflicts_per_write']:>11.2f} {result['p50_ms']:>8.2f} "
+              f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['lost_updates']:>6} {result['unexpected_409s']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Throughput and memory benchmark for GET /notes/export.
+
+Seeds notes inside a transaction that is rolled back at the end, then drains
+the export handler's stream for each table size and reports rows/s and the
+peak Python memory allocated while streaming. Peak memory should stay roughly
+the same as the table grows; it is bounded by NOTES_EXPORT_CHUNK_ROWS.
+
+Needs a reachable database (DATABASE_URL), e.g.:
+
+    docker compose exec backend python -m benchmarks.bench_export --rows 10000 100000 500000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from database import engine
+from models.note import Note
+from api.services.note import NOTES_EXPORT_CHUNK_ROWS, export_notes
+
+SEED_NOTES = text(
+    "INSERT INTO notes (uuid, name, description, locked) "
+    "SELECT gen_random_uuid(), 'Benchmark note ' || g, repeat('x', :description_length), false "
+    "FROM generate_series(1, :count) AS g"
+)
+
+
+async def drain(response):
+    exported_bytes = 0
+    async for chunk in response.body_iterator:
+        exported_bytes += len(chunk)
+    return exported_bytes
+
+
+def run_export(session, export_format):
+    return asyncio.run(drain(export_notes(export_format=export_format, db=session)))
+
+
+def measure(session, export_format):
+    rows = session.execute(select(func.count()).select_from(Note)).scalar()
+
+    start = time.perf_counter()
+    exported_bytes = run_export(session, export_format)
+    seconds = time.perf_counter() - start
+
+    # Separate pass: tracemalloc slows allocation-heavy code down noticeably
+    tracemalloc.start()
+    run_export(session, export_format)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else float("inf"),
+        "mb_per_second": exported_bytes / seconds / 1e6 if seconds else float("inf"),
+        "peak_kib": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000],
+                        help="table sizes to measure, ascending (default: 10000 100000)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], nargs="+", default=["ndjson", "csv"])
+    parser.add_argument("--description-length", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"chunk size: {NOTES_EXPORT_CHUNK_ROWS} rows")
+    print(f"{'rows':>10} {'format':>7} {'seconds':>9} {'rows/s':>12} {'MB/s':>8} {'peak KiB':>10}")
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        session = Session(bind=connection)
+        try:
+            seeded = 0
+            for target in sorted(args.rows):
+                session.execute(SEED_NOTES, {"count": target - seeded, "description_length": args.description_length})
+                seeded = target
+                for export_format in args.format:
+                    result = measure(session, export_format)
+                    print(
+                        f"{result['rows']:>10} {export_format:>7} {result['seconds']:>9.2f} "
+                        f"{result['rows_per_second']:>12,.0f} {result['mb_per_second']:>8.1f} {result['peak_kib']:>10,.0f}"
+                    )
+        finally:
+            session.close()
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    main()
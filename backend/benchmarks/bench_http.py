@@ -0,0 +1,255 @@
+"""
+HTTP benchmark for the notes and simulation endpoints, with baseline comparison.
+
+Drives the app in-process through httpx's ASGI transport (the app's lifespan
+runs, so telemetry follows TELEMETRY_MODE), or a running server with
+--base-url. Each scenario sends --requests requests from --concurrency
+workers and reports req/s and p50/p95/p99 latency. In-process runs also
+report allocations from a separate tracemalloc pass (peak and allocated KiB
+per request), since tracing slows everything down.
+
+Notes scenarios create notes (lock leaves them locked), so run them against a
+scratch database. Simulation scenarios use zero delays, so they measure the
+routes' own overhead.
+
+    python -m benchmarks.bench_http --concurrency 16 --requests 2000 --output results.json
+    python -m benchmarks.bench_http --base-url http://localhost:8000 --scenarios list detail
+    python -m benchmarks.bench_http --output run.json --baseline baseline.json --threshold 15   # exits 1 on regression
+    python -m benchmarks.bench_http --save-baseline baseline.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+
+ALLOCATION_PASS_REQUESTS = 200
+
+
+async def create_notes(client, count, prefix):
+    uuids = []
+    for i in range(count):
+        response = await client.post("/notes/", json={"name": f"{prefix} {i}", "description": "benchmark"})
+        response.raise_for_status()
+        uuids.append(response.json()["uuid"])
+    return uuids
+
+
+class Scenario:
+    """
+    A named request pattern. `prepare` runs before timing and may create the
+    notes the requests need; `request` sends request number i.
+    """
+    consumes_notes = False
+
+    def __init__(self, name, method, path, **kwargs):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.kwargs = kwargs
+        self.uuids = []
+
+    async def prepare(self, client, count):
+        if "{uuid}" in self.path:
+            # One note per request when requests change the note's state
+            self.uuids = await create_notes(client, count if self.consumes_notes else 1, f"bench {self.name}")
+
+    def request(self, client, i):
+        path = self.path.format(uuid=self.uuids[i % len(self.uuids)]) if self.uuids else self.path
+        return client.request(self.method, path, **self.kwargs)
+
+
+class ConsumingScenario(Scenario):
+    consumes_notes = True
+
+
+class CreateScenario(Scenario):
+    def request(self, client, i):
+        return client.post(self.path, json={"name": f"bench create {i}", "description": "benchmark"})
+
+
+class UpdateScenario(Scenario):
+    def request(self, client, i):
+        return client.put(self.path.format(uuid=self.uuids[0]), json={"name": f"bench update {i}", "description": "benchmark"})
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in [
+        CreateScenario("create", "POST", "/notes/"),
+        Scenario("list", "GET", "/notes/", params={"limit": 50}),
+        Scenario("detail", "GET", "/notes/{uuid}"),
+        UpdateScenario("update", "PUT", "/notes/{uuid}"),
+        ConsumingScenario("lock", "POST", "/notes/{uuid}/actions/lock"),
+        ConsumingScenario("delete", "DELETE", "/notes/{uuid}"),
+        Scenario("simulation-status", "GET", "/simulation/status"),
+        Scenario("simulation-error", "GET", "/simulation/error", params={"error_rate": 0}),
+        Scenario("simulation-slow", "GET", "/simulation/slow", params={"delay": 0}),
+        Scenario("simulation-async-slow", "GET", "/simulation/async/slow", params={"delay": 0}),
+        Scenario("simulation-database-load", "GET", "/simulation/database-load", params={"queries": 3, "pause": 0}),
+    ]
+}
+
+
+async def drive(client, scenario, requests, concurrency, offset=0):
+    """
+    Sends `requests` requests from `concurrency` workers. Returns the
+    latencies in seconds and the number of non-2xx responses.
+    """
+    counter = itertools.count(offset)
+    end = offset + requests
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            if i >= end:
+                return
+            start = time.perf_counter()
+            response = await scenario.request(client, i)
+            latencies.append(time.perf_counter() - start)
+            if not response.is_success:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def percentile(sorted_values, p):
+    # Nearest rank, as in /simulation/database-load
+    return sorted_values[max(0, -(-p * len(sorted_values) // 100) - 1)]
+
+
+async def measure_allocations(client, scenario, concurrency, offset):
+    requests = ALLOCATION_PASS_REQUESTS
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    await drive(client, scenario, requests, concurrency, offset)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0)
+    return {"alloc_peak_kib": round(peak / 1024, 1), "alloc_kib_per_request": round(allocated / 1024 / requests, 2)}
+
+
+async def run_scenario(client, scenario, requests, concurrency, in_process):
+    allocation_requests = ALLOCATION_PASS_REQUESTS if in_process else 0
+    await scenario.prepare(client, requests + allocation_requests)
+
+    start = time.perf_counter()
+    latencies, errors = await drive(client, scenario, requests, concurrency)
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies_ms), 2),
+        **{f"p{p}_ms": round(percentile(latencies_ms, p), 2) for p in (50, 95, 99)},
+    }
+    if in_process:
+        result.update(await measure_allocations(client, scenario, concurrency, offset=requests))
+    return result
+
+
+async def run(args):
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            return {name: await run_scenario(client, SCENARIOS[name], args.requests, args.concurrency, False)
+                    for name in args.scenarios}
+
+    from api.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return {name: await run_scenario(client, SCENARIOS[name], args.requests, args.concurrency, True)
+                    for name in args.scenarios}
+
+
+# Metric: (direction, label). Higher rps is better; lower latency is better.
+COMPARED_METRICS = {"rps": (1, "req/s"), "p95_ms": (-1, "p95"), "p99_ms": (-1, "p99")}
+
+
+def regressions(results, baseline, threshold):
+    """
+    Messages for every metric that got worse than the baseline by more than
+    `threshold` percent. Scenarios missing from either side are skipped.
+    """
+    found = []
+    for name, result in results.items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        for metric, (direction, label) in COMPARED_METRICS.items():
+            old, new = reference.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            if change * direction < -threshold:
+                found.append(f"{name}: {label} {old} -> {new} ({change:+.1f}%)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000, help="timed requests per scenario (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent workers (default: 8)")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the app in-process")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=10,
+                        help="percent change in req/s, p95 or p99 that counts as a regression (default: 10)")
+    parser.add_argument("--save-baseline", help="also write the results to this file as the new baseline")
+    args = parser.parse_args()
+
+    # The client's own per-request INFO lines are not part of what is measured
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "target": args.base_url or "in-process",
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+
+    print(f"{'scenario':>26} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'alloc KiB/req':>14}")
+    for name, result in results.items():
+        alloc = result.get("alloc_kib_per_request")
+        print(f"{name:>26} {result['rps']:>9.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f} {result['errors']:>7} {'-' if alloc is None else alloc:>14}")
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.threshold)
+        if found:
+            print(f"regressions beyond {args.threshold:.0f}% against {args.baseline}:")
+            for message in found:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0f}% against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Logging overhead benchmark: time spent on the request thread logging one request.
+
+Replays the log calls of a successful note update (two INFO lines) against
+two setups, both writing the console output to /dev/null and exporting OTel
+records to an in-memory exporter:
+
+    before  eager f-strings; console and OTel handlers on the root logger,
+            both running on the calling thread
+    after   %-style calls with attributes through api.logging_setup: the
+            calling thread only queues records, the listener does the rest
+
+The "after" figure is the request-path cost; the listener's own time is
+reported separately as drain time per request.
+
+    python -m benchmarks.bench_logging --requests 20000
+    python -m benchmarks.bench_logging --rate-limit 100   # also cap api.services.note
+"""
+import argparse
+import logging
+import os
+import queue
+import time
+from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+from opentelemetry.sdk._logs.export import InMemoryLogExporter, SimpleLogRecordProcessor
+from api import logging_setup
+
+logger = logging.getLogger("api.services.note")
+
+
+class Outcome:
+    uuid = "3f2b6c1e-8a4d-4c2e-9b1a-2d5e7f0a1b3c"
+    name = "Quarterly planning"
+
+
+def request_before(outcome):
+    logger.info(f"Updating note with UUID: {outcome.uuid}")
+    logger.info(f"Successfully updated note: {outcome.name}")
+
+
+def request_after(outcome):
+    attrs = {"operation": "update_note", "note.uuid": outcome.uuid}
+    logger.info("Updating note with UUID: %s", outcome.uuid, extra=attrs)
+    logger.info("Successfully updated note: %s", outcome.name, extra=attrs)
+
+
+def handlers(devnull):
+    console = logging.StreamHandler(devnull)
+    console.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    provider = LoggerProvider()
+    exporter = InMemoryLogExporter()
+    provider.add_log_record_processor(SimpleLogRecordProcessor(exporter))
+    return [console, LoggingHandler(logger_provider=provider)], exporter
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    return root
+
+
+def run_before(requests, devnull):
+    root = reset_root()
+    sync_handlers, exporter = handlers(devnull)
+    for handler in sync_handlers:
+        root.addHandler(handler)
+    outcome = Outcome()
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_before(outcome)
+    elapsed = time.perf_counter() - start
+    return elapsed, 0.0, len(exporter.get_finished_logs())
+
+
+def run_after(requests, devnull, rate_limit):
+    root = reset_root()
+    listener_handlers, exporter = handlers(devnull)
+    queue_handler = logging_setup.ContextQueueHandler(queue.Queue(requests * 2))
+    if rate_limit:
+        queue_handler.addFilter(logging_setup.RateLimitFilter({logger.name: rate_limit}))
+    root.addHandler(queue_handler)
+    listener = logging_setup.ContextQueueListener(queue_handler.queue, *listener_handlers)
+    outcome = Outcome()
+
+    # Queue everything first so the request-path figure is not competing with
+    # the listener thread for the GIL, then time the drain on its own
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_after(outcome)
+    elapsed = time.perf_counter() - start
+    drain_start = time.perf_counter()
+    listener.start()
+    listener.stop()
+    drained = time.perf_counter() - drain_start
+    return elapsed, drained, len(exporter.get_finished_logs())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000, help="simulated requests per setup (default: 20000)")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="records per second allowed for the note logger in the 'after' setup (default: no limit)")
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        results = {
+            "before": run_before(args.requests, devnull),
+            "after": run_after(args.requests, devnull, args.rate_limit),
+        }
+    reset_root()
+
+    print(f"{'setup':>7} {'request path us/req':>20} {'listener us/req':>16} {'records exported':>17}")
+    for name, (elapsed, drained, exported) in results.items():
+        print(f"{name:>7} {elapsed / args.requests * 1e6:>20.1f} {drained / args.requests * 1e6:>16.1f} {exported:>17}")
+
+
+if __name__ == "__main__":
+    main()
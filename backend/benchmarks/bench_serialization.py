@@ -0,0 +1,88 @@
+"""
+Response serialization microbenchmark: per-row cost of the note list and
+detail payloads.
+
+Compares, for the same rows:
+
+    validated  what FastAPI does with a returned dict: validate it against the
+               response_model, then dump it to JSON with pydantic
+    stdlib     jsonable_encoder + json.dumps, FastAPI's path for routes
+               without a response_model
+    trusted    api.responses.trusted_json: orjson straight from the rows, no
+               validation (what list_notes, search_notes and get_note_detail use)
+
+No database is needed.
+
+    python -m benchmarks.bench_serialization --rows 1 100 1000 10000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from collections import namedtuple
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from api.responses import trusted_json
+from api.schemas.note import NoteDetail, NoteSummary
+
+SummaryRow = namedtuple("SummaryRow", "id uuid name")
+DetailRow = namedtuple("DetailRow", "uuid name description locked")
+
+summary_adapter = TypeAdapter(List[NoteSummary])
+detail_adapter = TypeAdapter(NoteDetail)
+
+
+def list_paths(rows):
+    return {
+        "validated": lambda: summary_adapter.dump_json(
+            summary_adapter.validate_python([{"uuid": str(row.uuid), "name": row.name} for row in rows])
+        ),
+        "stdlib": lambda: json.dumps(jsonable_encoder([{"uuid": str(row.uuid), "name": row.name} for row in rows])).encode(),
+        "trusted": lambda: trusted_json([{"uuid": row.uuid, "name": row.name} for row in rows]).body,
+    }
+
+
+def detail_paths(row):
+    def detail():
+        return {"uuid": str(row.uuid), "name": row.name, "description": row.description, "locked": row.locked}
+    return {
+        "validated": lambda: detail_adapter.dump_json(detail_adapter.validate_python(detail())),
+        "stdlib": lambda: json.dumps(jsonable_encoder(detail())).encode(),
+        "trusted": lambda: trusted_json(detail()).body,
+    }
+
+
+def per_call_seconds(fn, budget=0.5):
+    number, _ = timeit.Timer(fn).autorange()
+    number = max(1, int(number * budget / 0.2))
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000, 10000], help="list sizes to measure")
+    args = parser.parse_args()
+
+    row = DetailRow(uuid.uuid4(), "Benchmark note", "x" * 200, False)
+    cases = [("detail", 1, detail_paths(row))]
+    for count in args.rows:
+        rows = [SummaryRow(i, uuid.uuid4(), f"Benchmark note {i}") for i in range(count)]
+        cases.append(("list", count, list_paths(rows)))
+
+    print(f"{'payload':>8} {'rows':>7} {'validated ns/row':>17} {'stdlib ns/row':>14} {'trusted ns/row':>15} {'speedup':>8}")
+    for payload, count, paths in cases:
+        # Every path must produce the same document
+        assert len({json.dumps(json.loads(fn()), sort_keys=True) for fn in paths.values()}) == 1
+        per_row = {name: per_call_seconds(fn) / count * 1e9 for name, fn in paths.items()}
+        print(f"{payload:>8} {count:>7} {per_row['validated']:>17.0f} {per_row['stdlib']:>14.0f} "
+              f"{per_row['trusted']:>15.0f} {per_row['validated'] / per_row['trusted']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Startup benchmark: import time of api.main and time to the first response.
+
+Each run starts a fresh interpreter, imports the app, runs its lifespan
+startup and serves GET /test in-process, so the numbers include telemetry
+setup for the selected TELEMETRY_MODE. No database is needed; exporters point
+at otel-collector as configured and simply fail to deliver without one.
+
+    python -m benchmarks.bench_startup --runs 5 --modes disabled deferred enabled
+    python -m benchmarks.bench_startup --modes enabled --budget-ms 2500   # exits 1 when over budget
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import api.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(api.main.app) as client:
+    client.get("/test").raise_for_status()
+    first_response = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "first_response_ms": (first_response - start) * 1000}))
+"""
+
+
+def probe(mode):
+    env = {**os.environ, "TELEMETRY_MODE": mode, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"startup probe failed for {mode}:\n{result.stderr}")
+    # The last line is the probe's; anything before it is app output
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per mode (default: 5)")
+    parser.add_argument("--modes", nargs="+", choices=["enabled", "deferred", "disabled"],
+                        default=["disabled", "deferred", "enabled"])
+    parser.add_argument("--budget-ms", type=float,
+                        help="fail when the median time to first response of any mode exceeds this")
+    args = parser.parse_args()
+
+    print(f"{'mode':>9} {'import ms':>10} {'first response ms':>18}   (median of {args.runs})")
+    over_budget = []
+    for mode in args.modes:
+        samples = [probe(mode) for _ in range(args.runs)]
+        import_ms = statistics.median(s["import_ms"] for s in samples)
+        first_response_ms = statistics.median(s["first_response_ms"] for s in samples)
+        print(f"{mode:>9} {import_ms:>10.0f} {first_response_ms:>18.0f}")
+        if args.budget_ms is not None and first_response_ms > args.budget_ms:
+            over_budget.append(mode)
+
+    if over_budget:
+        print(f"over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Statement overhead microbenchmark: Python time SQLAlchemy spends per request
+on the single-note queries, with the database taken out of the picture.
+
+Statements are executed through a Session on the real psycopg2 dialect, but
+the DBAPI connection is a stub that answers every query with one canned row,
+so the figures are only construction, cache key, compiled cache lookup,
+parameter processing and result handling. Three ways of issuing each query:
+
+    orm       db.query(Note).filter_by(uuid=uuid).first(), the original handlers
+    rebuilt   the statement built afresh on every request
+    cached    api.services.note_statements: the statement built once and
+              executed with its values as parameters
+
+    python -m benchmarks.bench_statements --requests 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from models.note import Note
+from api.services import note_statements
+from api.services.note_statements import DETAIL_COLUMNS, select_note_detail, update_unlocked_note
+
+
+class StubCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = 1
+        self._rows = []
+
+    def execute(self, statement, parameters=None):
+        names, row = self.connection.result
+        self.description = [(name, None, None, None, None, None, None) for name in names]
+        self._rows = [row]
+
+    def fetchone(self):
+        return self._rows.pop() if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=None):
+        return self.fetchall()
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    notices = []
+    result = ((), ())
+
+    def cursor(self, *args, **kwargs):
+        return StubCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def scenarios(note_uuid):
+    detail = (note_uuid, "Quarterly planning", "Agenda and owners", False, 7)
+    detail_names = ("uuid", "name", "description", "locked", "version")
+    outcome_names = ("current_version", "current_locked") + detail_names
+    rebuild_update = note_statements._update_unlocked_note.__wrapped__
+    return {
+        "detail": (detail_names, detail, {
+            "orm": lambda db: db.query(Note).filter_by(uuid=note_uuid).first(),
+            "rebuilt": lambda db: db.execute(select(*DETAIL_COLUMNS).where(Note.uuid == note_uuid)).first(),
+            "cached": lambda db: db.execute(*select_note_detail(note_uuid)).first(),
+        }),
+        "update": (outcome_names, (7, False) + detail, {
+            "rebuilt": lambda db: db.execute(
+                rebuild_update(("name",), True), {"note_uuid": note_uuid, "new_name": "Renamed", "expected_versions": [7]}
+            ).one(),
+            "cached": lambda db: db.execute(*update_unlocked_note(note_uuid, {"name": "Renamed"}, [7])).one(),
+        }),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000, help="queries per measurement (default: 20000)")
+    args = parser.parse_args()
+
+    connection = StubConnection()
+    # _initialize skips the server version queries a real first connect runs
+    engine = create_engine("postgresql+psycopg2://", creator=lambda: connection, _initialize=False)
+
+    print(f"{'query':>8} {'path':>8} {'us/request':>11}")
+    with Session(engine) as db:
+        for query, (names, row, paths) in scenarios(uuid.uuid4()).items():
+            # The ORM path loads every mapped column that is not deferred
+            orm_names = ("id",) + names
+            timings = {}
+            for path, run in paths.items():
+                connection.result = (orm_names, (1,) + row) if path == "orm" else (names, row)
+                run(db)  # warm the compiled cache
+                timings[path] = min(timeit.repeat(lambda: run(db), number=args.requests, repeat=3)) / args.requests
+                print(f"{query:>8} {path:>8} {timings[path] * 1e6:>11.1f}")
+            baseline = timings.get("orm", timings["rebuilt"])
+            print(f"{query:>8} {'speedup':>8} {baseline / timings['cached']:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,148 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
 import os
+import time
+
+# Single place where database engines are built. The API (api.database),
+# scripts importing this module and Alembic (alembic/env.py) all go through
+# create_db_engine, so every process has one pool per engine and the pool is
+# tuned from the same environment variables:
+#
+#   DB_POOL_SIZE        connections kept open in the pool (default 5)
+#   DB_MAX_OVERFLOW     extra connections allowed above the pool size (default 10)
+#   DB_POOL_TIMEOUT     seconds to wait for a free connection (default 30)
+#   DB_POOL_RECYCLE     seconds after which a connection is replaced (default -1, never)
+#   DB_POOL_PRE_PING    "true" to test connections on checkout (default false)
+#   DB_CONNECT_TIMEOUT  seconds allowed for establishing a new connection (optional)
+#   DB_PREPARED_STATEMENT_CACHE_SIZE
+#                       server-side prepared statements asyncpg keeps per
+#                       connection (async engines only; default 100, 0 disables).
+#                       psycopg2 has no server-side prepared statements.
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# OpenTelemetry SQLAlchemy tracing instrumentation
-from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
-SQLAlchemyInstrumentor().instrument(engine=engine)
+
+def pool_settings_from_env():
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+    }
+
+
+# Pool telemetry. Observable gauges read the live pool counters on every
+# collection; checkout wait time is recorded by the pool classes below.
+meter = metrics.get_meter(__name__)
+_observed_engines = {}
+
+
+def _observe(read):
+    def callback(options):
+        # Read engine.pool each time: dispose() swaps in a recreated pool
+        return [
+            Observation(read(db_engine.pool), {"pool.name": name})
+            for name, db_engine in _observed_engines.items()
+        ]
+    return callback
+
+
+meter.create_observable_gauge(
+    "db.client.connections.checked_out",
+    callbacks=[_observe(lambda pool: pool.checkedout())],
+    unit="{connection}",
+    description="Connections currently checked out of the pool",
+)
+meter.create_observable_gauge(
+    "db.client.connections.idle",
+    callbacks=[_observe(lambda pool: pool.checkedin())],
+    unit="{connection}",
+    description="Idle connections currently held in the pool",
+)
+meter.create_observable_gauge(
+    "db.client.connections.overflow",
+    callbacks=[_observe(lambda pool: max(pool.overflow(), 0))],
+    unit="{connection}",
+    description="Connections open above the configured pool size",
+)
+checkout_wait_time = meter.create_histogram(
+    "db.client.connections.wait_time",
+    unit="ms",
+    description="Time spent waiting to check a connection out of the pool",
+)
+
+
+class _TimedCheckoutMixin:
+    pool_name = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            checkout_wait_time.record(
+                (time.perf_counter() - start) * 1000, {"pool.name": self.pool_name}
+            )
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.pool_name = self.pool_name
+        return new_pool
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def create_db_engine(url=DATABASE_URL, *, is_async=False, pool_name=None, poolclass=None, **kwargs):
+    """
+    Creates a sync (or, with is_async, an async) engine configured from the DB_* environment
+    variables. Engines given a pool_name use a timed queue pool and are reported in the
+    db.client.connections.* metrics. Passing a non-queue poolclass (e.g. NullPool for
+    Alembic) skips the pool sizing options.
+    """
+    options = {}
+    if poolclass is None:
+        poolclass = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+    if issubclass(poolclass, QueuePool):
+        options.update(pool_settings_from_env())
+    else:
+        options["pool_pre_ping"] = pool_settings_from_env()["pool_pre_ping"]
+
+    connect_args = {}
+    connect_timeout = os.getenv("DB_CONNECT_TIMEOUT")
+    if connect_timeout:
+        # asyncpg and psycopg2 name the connect timeout differently
+        key = "timeout" if is_async else "connect_timeout"
+        connect_args[key] = int(connect_timeout)
+    statement_cache_size = os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE")
+    if is_async and statement_cache_size:
+        connect_args["prepared_statement_cache_size"] = int(statement_cache_size)
+    if connect_args:
+        options["connect_args"] = connect_args
+
+    options.update(kwargs)
+    factory = create_async_engine if is_async else create_engine
+    db_engine = factory(url, poolclass=poolclass, **options)
+
+    sync_engine = db_engine.sync_engine if is_async else db_engine
+    if pool_name is not None and isinstance(sync_engine.pool, _TimedCheckoutMixin):
+        sync_engine.pool.pool_name = pool_name
+        _observed_engines[pool_name] = sync_engine
+    return db_engine
+
+
+engine = create_db_engine(pool_name="sync")
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
     db = SessionLocal()
@@ -1,2 +1,4 @@
 from .base import Base
 from .note import Note
+from .notes_revision import NotesRevision
+from .note_stats import NoteStats
@@ -1,12 +1,34 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Computed, Index, Integer, String, Boolean
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 from .base import Base
 
+# Text search configuration used for the search vector and for parsing queries
+SEARCH_CONFIG = "english"
+
 class Note(Base):
     __tablename__ = "notes"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     uuid = Column(UUID(as_uuid=True), unique=True, nullable=False, default=uuid.uuid4, index=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     locked = Column(Boolean, nullable=False, default=False)
+    # Bumped by every write through api.services.note_statements; the note's ETag
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Maintained by Postgres; name matches rank above description. Deferred so
+    # ORM loads of a note don't pull the vector along.
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+    ))
+
+    __table_args__ = (
+        Index("ix_notes_search_vector", search_vector, postgresql_using="gin"),
+        # Index-only scans for id-ordered pages of summaries
+        Index("ix_notes_id_covering", id, postgresql_include=["uuid", "name"]),
+    )
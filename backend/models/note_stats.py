@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, BigInteger
+from .base import Base
+
+class NoteStats(Base):
+    """
+    Single-row, trigger-maintained note counts. Every committed insert, update,
+    delete or truncate on notes adjusts `total` and `locked`, so counting notes
+    is a primary key lookup instead of a table scan.
+    """
+    __tablename__ = "note_stats"
+    id = Column(Integer, primary_key=True)
+    total = Column(BigInteger, nullable=False, default=0)
+    locked = Column(BigInteger, nullable=False, default=0)
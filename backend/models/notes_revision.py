@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, BigInteger
+from .base import Base
+
+class NotesRevision(Base):
+    """
+    Trigger-maintained change counter for the notes table, spread over a few
+    slot rows so that concurrent writers do not queue on one row lock. Any
+    committed insert, update or delete on notes bumps the `revision` of one
+    slot; the sum over all slots is a cheap ETag for note listings.
+    """
+    __tablename__ = "notes_revision"
+    id = Column(Integer, primary_key=True)
+    revision = Column(BigInteger, nullable=False, default=0)
@@ -3,3 +3,16 @@ import os
 
 # Ensure the backend root is on the Python path so 'api' can be imported
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Tests never export telemetry unless they opt in; api.main reads this on import
+os.environ.setdefault("TELEMETRY_MODE", "disabled")
+
+import pytest
+
+@pytest.fixture(autouse=True)
+def clear_note_detail_cache():
+    # The note detail cache is process-wide; keep tests independent of each other
+    from api.cache import note_detail_cache
+    note_detail_cache.clear()
+    yield
+    note_detail_cache.clear()
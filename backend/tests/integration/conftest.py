@@ -18,6 +18,7 @@ if DEBUG_MODE:
     print("Debugger attached!")
 
 TEST_DATABASE_URL = "postgresql://testuser:testpass@db_test:5432/testdb"
+SEEDED_NOTES = 20000
 
 engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(bind=engine)
@@ -65,3 +66,43 @@ def client(db_session):
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+
+@pytest.fixture
+def committed_sessions():
+    """
+    Opens sessions on connections of their own, whose commits the others see,
+    for racing writes against each other. Deletes the notes afterwards.
+    """
+    from sqlalchemy import text
+    sessions = []
+
+    def open_session():
+        session = TestingSessionLocal()
+        sessions.append(session)
+        return session
+
+    yield open_session
+    for session in sessions:
+        session.close()
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM notes"))
+
+@pytest.fixture(scope="module")
+def seeded_notes():
+    """
+    A committed, vacuumed and analyzed notes table of SEEDED_NOTES rows, one in
+    ten unlocked, for checking query plans. Yields an autocommit connection and
+    empties the table afterwards.
+    """
+    from sqlalchemy import text
+    connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    connection.execute(text("""
+        INSERT INTO notes (uuid, name, description, locked)
+        SELECT gen_random_uuid(), 'Seeded ' || i, 'Seeded note ' || i, i % 10 <> 0
+        FROM generate_series(1, :count) AS i
+    """), {"count": SEEDED_NOTES})
+    # Sets the visibility map, which index-only scans need, and the statistics
+    connection.execute(text("VACUUM ANALYZE notes"))
+    yield connection
+    connection.execute(text("TRUNCATE notes"))
+    connection.close()
@@ -1,3 +1,45 @@
+import threading
+from fastapi import HTTPException, Response
+from sqlalchemy import text
+from api.schemas.note import NoteCreate, NoteUpdate
+from api.services import note as notes
+
+
+def hold_concurrent_write(committed_sessions, sql):
+    """
+    Commits a new note, then runs `sql` against it in another session and
+    leaves that transaction open, holding the row lock. Returns the note's
+    uuid and the open session.
+    """
+    note_uuid = notes.create_note(NoteCreate(name="Original"), db=committed_sessions())["uuid"]
+    other = committed_sessions()
+    other.execute(text(f"{sql} WHERE uuid = :uuid"), {"uuid": note_uuid})
+    return note_uuid, other
+
+
+def race_write(write, committed_sessions, other):
+    """
+    Runs `write(db)` in a thread until it waits on the row lock held by
+    `other`, then commits `other`. Returns what the write returned, or the
+    status of the HTTPException it raised.
+    """
+    statuses = []
+
+    def run():
+        try:
+            statuses.append(write(committed_sessions()))
+        except HTTPException as e:
+            statuses.append(e.status_code)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(timeout=1)
+    assert thread.is_alive(), "the write did not wait on the row lock"
+    other.commit()
+    thread.join(timeout=10)
+    return statuses[0]
+
+
 class TestNoteIntegration:
     """Comprehensive integration tests for the Note API endpoints."""
     
@@ -64,6 +106,42 @@ class TestNoteIntegration:
         assert notes[1]["uuid"] == note2_uuid
         assert notes[1]["name"] == "Second Note"
 
+    def test_list_notes_paginated_with_cursor(self, client):
+        """Test walking the note list page by page using the next cursor."""
+        # Arrange
+        created_uuids = [
+            client.post("/notes/", json={"name": f"Page Note {i}"}).json()["uuid"]
+            for i in range(5)
+        ]
+        
+        # Act
+        seen_uuids = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/notes/", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 2
+            seen_uuids.extend(note["uuid"] for note in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        
+        # Assert
+        assert seen_uuids == created_uuids
+
+    def test_list_notes_invalid_cursor(self, client):
+        """Test that a malformed cursor is rejected."""
+        # Act
+        response = client.get("/notes/", params={"limit": 2, "cursor": "garbage!"})
+        
+        # Assert
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
     # ===== GET NOTE DETAIL TESTS =====
     
     def test_get_note_detail_success(self, client):
@@ -304,8 +382,361 @@ class TestNoteIntegration:
         assert response.status_code == 404
         assert response.json()["detail"] == "Note not found"
 
+    # ===== BATCH TESTS =====
+    
+    def test_create_notes_batch(self, client):
+        """Test creating several notes in one request."""
+        # Arrange
+        payload = [{"name": "Batch 1", "description": "First"}, {"name": "Batch 2"}]
+        
+        # Act
+        response = client.post("/notes/batch", json=payload)
+        
+        # Assert
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["status"] for r in results] == [200, 200]
+        assert [r["note"]["name"] for r in results] == ["Batch 1", "Batch 2"]
+        
+        # Verify
+        list_response = client.get("/notes/")
+        assert [n["uuid"] for n in list_response.json()] == [r["uuid"] for r in results]
+
+    def test_lock_notes_batch(self, client):
+        """Test locking several notes, including locked and missing ones."""
+        # Arrange
+        first_uuid = client.post("/notes/", json={"name": "To Lock"}).json()["uuid"]
+        locked_uuid = client.post("/notes/", json={"name": "Already Locked"}).json()["uuid"]
+        client.post(f"/notes/{locked_uuid}/actions/lock")
+        missing_uuid = "00000000-0000-0000-0000-000000000000"
+        
+        # Act
+        response = client.post("/notes/actions/lock-batch", json=[first_uuid, locked_uuid, missing_uuid])
+        
+        # Assert
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["status"] for r in results] == [200, 409, 404]
+        assert results[0]["note"]["locked"] is True
+        assert results[1]["detail"] == "Note is already locked."
+        
+        # Verify
+        assert client.get(f"/notes/{first_uuid}").json()["locked"] is True
+
+    def test_delete_notes_batch(self, client):
+        """Test deleting several notes while locked notes are kept."""
+        # Arrange
+        unlocked_uuid = client.post("/notes/", json={"name": "To Delete"}).json()["uuid"]
+        locked_uuid = client.post("/notes/", json={"name": "Keep"}).json()["uuid"]
+        client.post(f"/notes/{locked_uuid}/actions/lock")
+        
+        # Act
+        response = client.request("DELETE", "/notes/batch", json=[unlocked_uuid, locked_uuid, "not-a-uuid"])
+        
+        # Assert
+        assert response.status_code == 200
+        assert [r["status"] for r in response.json()] == [200, 409, 422]
+        
+        # Verify
+        assert client.get(f"/notes/{unlocked_uuid}").status_code == 404
+        assert client.get(f"/notes/{locked_uuid}").status_code == 200
+
+    # ===== MULTI-GET TESTS =====
+
+    def test_get_note_details_in_one_request(self, client):
+        """Test fetching several notes by uuid, with unknown uuids reported as missing."""
+        # Arrange
+        first = client.post("/notes/", json={"name": "First"}).json()
+        second = client.post("/notes/", json={"name": "Second", "description": "Two"}).json()
+        missing = "00000000-0000-4000-8000-000000000000"
+
+        # Act
+        response = client.get("/notes/details", params={"uuid": [second["uuid"], missing, first["uuid"]]})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"notes": {first["uuid"]: first, second["uuid"]: second}, "missing": [missing]}
+
+    def test_get_note_details_rejects_malformed_uuid(self, client):
+        """Test that one malformed uuid fails the whole request."""
+        # Act
+        response = client.get("/notes/details", params={"uuid": ["not-a-uuid"]})
+
+        # Assert
+        assert response.status_code == 422
+
+    # ===== STATS TESTS =====
+
+    def test_note_stats_follow_writes(self, client):
+        """Test that the trigger-maintained counts track creates, locks and deletes."""
+        # Arrange
+        before = client.get("/notes/stats").json()
+        uuids = [r["uuid"] for r in client.post("/notes/batch", json=[{"name": f"Stats {i}"} for i in range(3)]).json()]
+
+        # Act
+        client.post(f"/notes/{uuids[0]}/actions/lock")
+        client.delete(f"/notes/{uuids[1]}")
+        response = client.get("/notes/stats")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {
+            "total": before["total"] + 2,
+            "locked": before["locked"] + 1,
+            "unlocked": before["unlocked"] + 1,
+        }
+
+    # ===== SEARCH TESTS =====
+
+    def test_search_notes_ranks_name_matches_first(self, client):
+        """Test that search matches name and description, with name matches ranked higher."""
+        # Arrange
+        in_description = client.post("/notes/", json={"name": "Groceries", "description": "Buy apples"}).json()["uuid"]
+        in_name = client.post("/notes/", json={"name": "Apples", "description": "Varieties"}).json()["uuid"]
+        client.post("/notes/", json={"name": "Unrelated"})
+
+        # Act
+        response = client.get("/notes/search", params={"q": "apple"})
+
+        # Assert
+        assert response.status_code == 200
+        assert [n["uuid"] for n in response.json()] == [in_name, in_description]
+
+    def test_search_notes_pagination(self, client):
+        """Test walking search results page by page with the X-Next-Cursor header."""
+        # Arrange
+        created = {client.post("/notes/", json={"name": f"Project {i}"}).json()["uuid"] for i in range(5)}
+
+        # Act
+        seen = []
+        params = {"q": "project", "limit": 2}
+        while True:
+            response = client.get("/notes/search", params=params)
+            assert response.status_code == 200
+            seen.extend(n["uuid"] for n in response.json())
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+
+        # Assert
+        assert len(seen) == 5
+        assert set(seen) == created
+
+    def test_search_notes_requires_query(self, client):
+        """Test that a missing search query is rejected."""
+        response = client.get("/notes/search")
+        assert response.status_code == 422
+
+    # ===== EXPORT TESTS =====
+
+    def test_export_notes_ndjson(self, client):
+        """Test exporting every note as newline-delimited JSON."""
+        # Arrange
+        import json
+        created = [client.post("/notes/", json={"name": f"Export {i}"}).json()["uuid"] for i in range(3)]
+
+        # Act
+        response = client.get("/notes/export", params={"format": "ndjson"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        exported = [json.loads(line)["uuid"] for line in response.text.splitlines()]
+        assert exported[-3:] == created
+
+    def test_export_notes_csv(self, client):
+        """Test exporting notes as CSV with a header row."""
+        # Arrange
+        import csv
+        client.post("/notes/", json={"name": "Quoted, name", "description": "Line"})
+
+        # Act
+        response = client.get("/notes/export", params={"format": "csv"})
+
+        # Assert
+        assert response.status_code == 200
+        rows = list(csv.DictReader(response.text.splitlines()))
+        assert rows[-1]["name"] == "Quoted, name"
+        assert rows[-1]["locked"] == "false"
+
+    def test_export_notes_rejects_unknown_format(self, client):
+        """Test that an unsupported export format is rejected."""
+        response = client.get("/notes/export", params={"format": "xml"})
+        assert response.status_code == 422
+
+    # ===== IMPORT TESTS =====
+
+    def test_import_notes_ndjson(self, client):
+        """Test bulk importing notes, skipping and reporting invalid rows."""
+        # Arrange
+        body = '{"name": "Imported A"}\n{"description": "missing name"}\n{"name": "Imported B", "description": "B"}\n'
+
+        # Act
+        response = client.post("/notes/import", params={"format": "ndjson"}, content=body)
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["accepted"] == 2
+        assert response.json()["rejected"] == 1
+        assert response.json()["errors"][0]["line"] == 2
+
+        # Verify
+        notes = {n["name"]: n["uuid"] for n in client.get("/notes/").json()}
+        assert {"Imported A", "Imported B"} <= set(notes)
+        assert client.get(f"/notes/{notes['Imported B']}").json()["description"] == "B"
+
+    def test_import_notes_csv_round_trips_export(self, client):
+        """Test that a CSV export can be imported again."""
+        # Arrange
+        client.post("/notes/", json={"name": "Round, trip", "description": "With \"quotes\""})
+        client.post("/notes/", json={"name": "No description"})
+        exported = client.get("/notes/export", params={"format": "csv"}).text
+
+        # Act
+        response = client.post("/notes/import", params={"format": "csv"}, content=exported)
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["accepted"] == 2
+        imported = [n for n in client.get("/notes/").json() if n["name"] == "Round, trip"]
+        assert len(imported) == 2
+        copy = client.get(f"/notes/{imported[-1]['uuid']}").json()
+        assert copy["description"] == "With \"quotes\""
+        assert copy["locked"] is False
+
+    # ===== CONDITIONAL REQUEST TESTS =====
+
+    def test_get_note_detail_not_modified(self, client):
+        """Test that a matching If-None-Match returns 304 without a body."""
+        # Arrange
+        note_uuid = client.post("/notes/", json={"name": "Cached"}).json()["uuid"]
+        etag = client.get(f"/notes/{note_uuid}").headers["ETag"]
+
+        # Act
+        response = client.get(f"/notes/{note_uuid}", headers={"If-None-Match": etag})
+
+        # Assert
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    def test_list_notes_etag_changes_after_write(self, client):
+        """Test that the list ETag is revalidated until a note is written."""
+        # Arrange
+        client.post("/notes/", json={"name": "First"})
+        etag = client.get("/notes/").headers["ETag"]
+        assert client.get("/notes/", headers={"If-None-Match": etag}).status_code == 304
+
+        # Act
+        client.post("/notes/", json={"name": "Second"})
+        response = client.get("/notes/", headers={"If-None-Match": etag})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_update_note_with_stale_if_match(self, client):
+        """Test that an If-Match that no longer matches returns 412 and leaves the note alone."""
+        # Arrange
+        note_uuid = client.post("/notes/", json={"name": "Original"}).json()["uuid"]
+
+        # Act
+        response = client.put(f"/notes/{note_uuid}", json={"name": "Changed"}, headers={"If-Match": '"0"'})
+
+        # Assert
+        assert response.status_code == 412
+        assert client.get(f"/notes/{note_uuid}").json()["name"] == "Original"
+
+    def test_update_note_with_current_if_match(self, client):
+        """Test that an update guarded by the current ETag is applied."""
+        # Arrange
+        note_uuid = client.post("/notes/", json={"name": "Original"}).json()["uuid"]
+        etag = client.get(f"/notes/{note_uuid}").headers["ETag"]
+
+        # Act
+        response = client.put(f"/notes/{note_uuid}", json={"name": "Changed"}, headers={"If-Match": etag})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["name"] == "Changed"
+
     # ===== EDGE CASE TESTS =====
     
+    def test_update_note_bumps_version(self, client):
+        """Test that every write bumps the version, which is also the ETag."""
+        # Arrange
+        created = client.post("/notes/", json={"name": "Original"}).json()
+
+        # Act
+        response = client.put(f"/notes/{created['uuid']}", json={"name": "Changed"})
+
+        # Assert
+        assert created["version"] == 1
+        assert response.json()["version"] == 2
+        assert response.headers["ETag"] == '"2"'
+
+    def test_update_note_with_stale_body_version(self, client):
+        """Test that a body version that no longer matches returns 412, like If-Match."""
+        # Arrange
+        note_uuid = client.post("/notes/", json={"name": "Original"}).json()["uuid"]
+        client.put(f"/notes/{note_uuid}", json={"name": "First writer", "version": 1})
+
+        # Act
+        response = client.put(f"/notes/{note_uuid}", json={"name": "Second writer", "version": 1})
+
+        # Assert
+        assert response.status_code == 412
+        assert client.get(f"/notes/{note_uuid}").json()["name"] == "First writer"
+
+    def test_update_note_without_changes_writes_nothing(self, client):
+        """Test that an update with no fields returns the note without bumping its version or the list ETag."""
+        # Arrange
+        note_uuid = client.post("/notes/", json={"name": "Original"}).json()["uuid"]
+        list_etag = client.get("/notes/").headers["ETag"]
+
+        # Act
+        response = client.put(f"/notes/{note_uuid}", json={})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["version"] == 1
+        assert client.get("/notes/").headers["ETag"] == list_etag
+
+    def test_update_note_after_waiting_on_concurrent_write(self, committed_sessions):
+        """Test that an update that waited on a concurrent write to the same version returns 412, not 409."""
+        # Arrange
+        note_uuid, other = hold_concurrent_write(committed_sessions, "UPDATE notes SET version = version + 1")
+
+        # Act
+        status = race_write(lambda db: notes.update_note(
+            note_uuid, NoteUpdate(name="Second writer"), response=Response(), if_match='"1"', db=db,
+        ), committed_sessions, other)
+
+        # Assert
+        assert status == 412
+
+    def test_delete_note_after_waiting_on_concurrent_delete(self, committed_sessions):
+        """Test that a delete that waited on a concurrent delete of the same note returns 404, not 409."""
+        # Arrange
+        note_uuid, other = hold_concurrent_write(committed_sessions, "DELETE FROM notes")
+
+        # Act
+        status = race_write(lambda db: notes.delete_note(note_uuid, if_match='"1"', db=db), committed_sessions, other)
+
+        # Assert
+        assert status == 404
+
+    def test_delete_notes_batch_after_waiting_on_concurrent_delete(self, committed_sessions):
+        """Test that a batch item deleted by a concurrent transaction is reported as 404, not 409."""
+        # Arrange
+        note_uuid, other = hold_concurrent_write(committed_sessions, "DELETE FROM notes")
+
+        # Act
+        results = race_write(lambda db: notes.delete_notes_batch([note_uuid], db=db), committed_sessions, other)
+
+        # Assert
+        assert [r["status"] for r in results] == [404]
+
     def test_create_note_with_empty_strings(self, client):
         """Test creating note with empty strings."""
         # Arrange
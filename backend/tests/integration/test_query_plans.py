@@ -0,0 +1,77 @@
+import json
+import uuid
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from models.note import Note
+from api.services.note_statements import select_note_detail
+
+
+def plan_nodes(connection, statement):
+    """Every node of the EXPLAIN plan of `statement`, outermost first."""
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes, pending = [], [plan[0]["Plan"]]
+    while pending:
+        node = pending.pop(0)
+        nodes.append(node)
+        pending.extend(node.get("Plans", []))
+    return nodes
+
+
+def scans(connection, statement):
+    return [
+        (node["Node Type"], node.get("Index Name"))
+        for node in plan_nodes(connection, statement)
+        if node["Node Type"].endswith("Scan")
+    ]
+
+
+class TestNoteQueryPlans:
+    """Plans of the notes queries on a seeded table, so an index change that breaks them shows up."""
+
+    def test_list_page_is_index_only(self, seeded_notes):
+        """Test that a page of summaries is read from the covering index alone."""
+        # Arrange
+        statement = select(Note.id, Note.uuid, Note.name).order_by(Note.id.asc()).limit(51)
+
+        # Act
+        result = scans(seeded_notes, statement)
+
+        # Assert
+        assert result == [("Index Only Scan", "ix_notes_id_covering")]
+
+    def test_list_cursor_page_is_index_only(self, seeded_notes):
+        """Test that a later page seeks into the covering index."""
+        # Arrange
+        statement = (
+            select(Note.id, Note.uuid, Note.name).where(Note.id > 10000).order_by(Note.id.asc()).limit(51)
+        )
+
+        # Act
+        result = scans(seeded_notes, statement)
+
+        # Assert
+        assert result == [("Index Only Scan", "ix_notes_id_covering")]
+
+    def test_detail_uses_uuid_index(self, seeded_notes):
+        """Test that a note is looked up through the unique uuid index."""
+        # Arrange
+        statement, params = select_note_detail(uuid.uuid4())
+
+        # Act
+        result = scans(seeded_notes, statement.params(params))
+
+        # Assert
+        assert result == [("Index Scan", "ix_notes_uuid")]
+
+    def test_redundant_id_index_is_gone(self, seeded_notes):
+        """Test that only the primary key and the covering index lead with id."""
+        # Act
+        indexes = seeded_notes.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'notes' ORDER BY indexname"
+        )).scalars().all()
+
+        # Assert
+        assert indexes == ["ix_notes_id_covering", "ix_notes_search_vector", "ix_notes_uuid", "notes_pkey"]
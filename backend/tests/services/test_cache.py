@@ -0,0 +1,208 @@
+import pytest
+from unittest.mock import MagicMock
+from api import cache as sut
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeRedis:
+    """Minimal in-process stand-in for the redis-py calls the cache backend uses."""
+    def __init__(self, clock):
+        self.clock = clock
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= self.clock():
+            self.data.pop(key)
+            return None
+        return value
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self.get(key) is not None:
+            return None
+        self.data[key] = (value.encode(), self.clock() + ex if ex is not None else None)
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        return [key for key in list(self.data) if key.startswith(prefix)]
+
+UUID_A = "6f1c2f7e-0000-4000-8000-000000000001"
+UUID_B = "6f1c2f7e-0000-4000-8000-000000000002"
+UUID_C = "6f1c2f7e-0000-4000-8000-000000000003"
+
+def detail(uuid, locked=False):
+    return {"uuid": uuid, "name": "Note", "description": None, "locked": locked}
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_memory_cache_expires_unlocked_notes_after_ttl(clock):
+    # Arrange
+    cache = sut.NoteDetailCache(sut.InMemoryCacheBackend(clock=clock), ttl_seconds=10)
+    cache.put(detail(UUID_A))
+
+    # Act & Assert
+    assert cache.get(UUID_A)["detail"] == detail(UUID_A)
+    clock.now = 11
+    assert cache.get(UUID_A) is None
+
+def test_memory_cache_keeps_locked_notes_without_expiry(clock):
+    # Arrange
+    cache = sut.NoteDetailCache(sut.InMemoryCacheBackend(clock=clock), ttl_seconds=10)
+    cache.put(detail(UUID_A, locked=True))
+
+    # Act
+    clock.now = 10_000
+
+    # Assert
+    assert cache.get(UUID_A)["detail"]["locked"] is True
+
+def test_memory_cache_evicts_least_recently_used(clock):
+    # Arrange
+    cache = sut.NoteDetailCache(sut.InMemoryCacheBackend(max_entries=2, clock=clock))
+    cache.put(detail(UUID_A))
+    cache.put(detail(UUID_B))
+    cache.get(UUID_A)
+
+    # Act
+    cache.put(detail(UUID_C))
+
+    # Assert
+    assert cache.get(UUID_B) is None
+    assert cache.get(UUID_A) is not None
+    assert cache.get(UUID_C) is not None
+
+def test_cache_keys_are_normalised_uuids():
+    # Arrange
+    cache = sut.NoteDetailCache(sut.InMemoryCacheBackend())
+    cache.put(detail(UUID_A))
+
+    # Act
+    cache.invalidate(UUID_A.upper())
+
+    # Assert
+    assert cache.get(UUID_A) is None
+
+def test_cache_counts_hits_and_misses(monkeypatch):
+    # Arrange
+    hits, misses = MagicMock(), MagicMock()
+    monkeypatch.setattr(sut, "cache_hits", hits)
+    monkeypatch.setattr(sut, "cache_misses", misses)
+    cache = sut.NoteDetailCache(sut.InMemoryCacheBackend())
+
+    # Act
+    cache.get(UUID_A)
+    cache.put(detail(UUID_A))
+    cache.get(UUID_A)
+
+    # Assert
+    hits.add.assert_called_once_with(1)
+    misses.add.assert_called_once_with(1)
+
+def test_redis_backend_shares_entries_and_invalidations_between_workers(clock):
+    # Arrange
+    client = FakeRedis(clock)
+    worker_1 = sut.NoteDetailCache(sut.RedisCacheBackend(client), ttl_seconds=10)
+    worker_2 = sut.NoteDetailCache(sut.RedisCacheBackend(client), ttl_seconds=10)
+    worker_1.put(detail(UUID_A))
+
+    # Act & Assert
+    assert worker_2.get(UUID_A)["detail"] == detail(UUID_A)
+    worker_2.invalidate(UUID_A)
+    assert worker_1.get(UUID_A) is None
+
+def test_memory_cache_ignores_reads_that_began_before_an_invalidation(clock):
+    # Arrange: a read misses and loads the note, then a write invalidates it
+    cache = sut.NoteDetailCache(sut.InMemoryCacheBackend(clock=clock), ttl_seconds=10, tombstone_seconds=5)
+    stale = detail(UUID_A)
+    cache.invalidate(UUID_A)
+
+    # Act
+    cache.put(stale, etag='"1"')
+
+    # Assert
+    assert cache.get(UUID_A) is None
+    clock.now = 6
+    cache.put(detail(UUID_A, locked=True), etag='"2"')
+    assert cache.get(UUID_A)["etag"] == '"2"'
+
+def test_redis_backend_ignores_reads_that_began_before_an_invalidation(clock):
+    # Arrange
+    client = FakeRedis(clock)
+    worker_1 = sut.NoteDetailCache(sut.RedisCacheBackend(client), ttl_seconds=10, tombstone_seconds=5)
+    worker_2 = sut.NoteDetailCache(sut.RedisCacheBackend(client), ttl_seconds=10, tombstone_seconds=5)
+    worker_2.invalidate(UUID_A)
+
+    # Act
+    worker_1.put(detail(UUID_A), etag='"1"')
+
+    # Assert
+    assert worker_1.get(UUID_A) is None
+    clock.now = 6
+    worker_1.put(detail(UUID_A), etag='"2"')
+    assert worker_2.get(UUID_A)["etag"] == '"2"'
+
+def test_reads_do_not_replace_a_cached_entry(clock):
+    # Arrange
+    cache = sut.NoteDetailCache(sut.InMemoryCacheBackend(clock=clock), ttl_seconds=10)
+    cache.put(detail(UUID_A), etag='"2"')
+
+    # Act
+    cache.put(detail(UUID_A), etag='"1"')
+
+    # Assert
+    assert cache.get(UUID_A)["etag"] == '"2"'
+
+def test_redis_backend_stores_locked_notes_without_expiry(clock):
+    # Arrange
+    client = FakeRedis(clock)
+    cache = sut.NoteDetailCache(sut.RedisCacheBackend(client), ttl_seconds=10)
+    cache.put(detail(UUID_A, locked=True))
+
+    # Act
+    clock.now = 10_000
+
+    # Assert
+    assert cache.get(UUID_A)["detail"]["locked"] is True
+
+def test_backend_errors_are_treated_as_misses():
+    # Arrange
+    backend = MagicMock()
+    backend.get.side_effect = ConnectionError("redis down")
+    backend.set.side_effect = ConnectionError("redis down")
+    backend.add.side_effect = ConnectionError("redis down")
+    cache = sut.NoteDetailCache(backend)
+
+    # Act & Assert
+    cache.put(detail(UUID_A))
+    assert cache.get(UUID_A) is None
+
+def test_disabled_cache_never_stores():
+    # Arrange
+    cache = sut.NoteDetailCache(sut.InMemoryCacheBackend(), enabled=False)
+
+    # Act
+    cache.put(detail(UUID_A))
+
+    # Assert
+    assert cache.get(UUID_A) is None
+
+def test_cache_entries_carry_the_etag():
+    # Arrange
+    cache = sut.NoteDetailCache(sut.InMemoryCacheBackend())
+
+    # Act
+    cache.put(detail(UUID_A), etag='"42"')
+
+    # Assert
+    assert cache.get(UUID_A) == {"detail": detail(UUID_A), "etag": '"42"'}
@@ -1,14 +1,39 @@
+import json
 import pytest
+from fastapi import Response
 from unittest.mock import MagicMock
 from api.services import note as sut
 from api.schemas.note import NoteCreate
 
+def body(response):
+    """Decoded content of a response returned directly by a handler."""
+    return json.loads(response.body)
+
 class DummyNote:
-    def __init__(self, uuid, name, description, locked=False):
+    def __init__(self, uuid, name, description, locked=False, version=1):
         self.uuid = uuid
         self.name = name
         self.description = description
         self.locked = locked
+        self.version = version
+
+class NoteState:
+    """Row shape returned by select_note_state."""
+    def __init__(self, current_version, current_locked=False):
+        self.current_version = current_version
+        self.current_locked = current_locked
+
+class MutationOutcome:
+    """Row shape returned by the single-statement mutations in note_statements."""
+    def __init__(self, note=None, found=True, current_version=1, current_locked=None):
+        self.current_version = current_version if found else None
+        # A note that was found but not written is locked unless stated otherwise
+        self.current_locked = (note is None if current_locked is None else current_locked) if found else None
+        self.version = 2 if note else None
+        self.uuid = note.uuid if note else None
+        self.name = note.name if note else None
+        self.description = note.description if note else None
+        self.locked = note.locked if note else None
 
 @pytest.fixture
 def mock_db():
@@ -50,26 +75,32 @@ def test_list_notes_success(mock_db):
         DummyNote(uuid="2", name="Note 2", description="Desc 2"),
     ]
     mock_db.query.return_value.order_by.return_value.all.return_value = dummy_notes
+    mock_db.execute.return_value.scalar_one.return_value = 5
 
     # Act
-    result = sut.list_notes(db=mock_db)
+    response = sut.list_notes(response=Response(), db=mock_db)
+    revalidated = sut.list_notes(response=Response(), if_none_match='"5"', db=mock_db)
 
     # Assert
+    result = body(response)
     assert isinstance(result, list)
     assert len(result) == 2
     assert result[0]["uuid"] == "1"
     assert result[0]["name"] == "Note 1"
     assert result[1]["uuid"] == "2"
     assert result[1]["name"] == "Note 2"
+    assert response.headers["ETag"] == '"5"'
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == '"5"'
 
 def test_get_note_detail_success(mock_db):
     # Arrange
     dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=False)
 
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.first.return_value = dummy_note
 
     # Act
-    result = sut.get_note_detail("1", db=mock_db)
+    result = body(sut.get_note_detail("1", response=Response(), db=mock_db))
 
     # Assert
     assert isinstance(result, dict)
@@ -80,11 +111,11 @@ def test_get_note_detail_success(mock_db):
 
 def test_get_note_detail_raises_404_when_note_not_found(mock_db):
     # Arrange
-    mock_db.query.return_value.filter_by.return_value.first.return_value = None
+    mock_db.execute.return_value.first.return_value = None
 
     # Act & Assert
     with pytest.raises(Exception) as exc_info:
-        sut.get_note_detail("nonexistent", db=mock_db)
+        sut.get_note_detail("nonexistent", response=Response(), db=mock_db)
     assert exc_info.value.status_code == 404
     assert "Note not found" in str(exc_info.value)
 
@@ -92,106 +123,109 @@ def test_get_note_detail_raises_404_when_note_not_found(mock_db):
 def test_update_note_success(mock_db):
     # Arrange
     from api.schemas.note import NoteUpdate
-    dummy_note = DummyNote(uuid="1", name="Old Name", description="Old Desc", locked=False)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    updated_note = DummyNote(uuid="1", name="New Name", description="New Desc", locked=False)
+    mock_db.execute.return_value.one.return_value = MutationOutcome(note=updated_note)
     update = NoteUpdate(name="New Name", description="New Desc")
 
     # Act
-    result = sut.update_note("1", update, db=mock_db)
+    result = sut.update_note("1", update, response=Response(), db=mock_db)
 
     # Assert
     assert result["uuid"] == "1"
     assert result["name"] == "New Name"
     assert result["description"] == "New Desc"
     assert result["locked"] is False
+    mock_db.execute.assert_called_once()
     mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(dummy_note)
+    mock_db.refresh.assert_not_called()
 
 
 def test_update_note_raises_404_when_note_not_found(mock_db):
     # Arrange
     from api.schemas.note import NoteUpdate
-    mock_db.query.return_value.filter_by.return_value.first.return_value = None
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=False)
     update = NoteUpdate(name="New Name", description="New Desc")
 
     # Act & Assert
     with pytest.raises(Exception) as exc_info:
-        sut.update_note("nonexistent", update, db=mock_db)
+        sut.update_note("nonexistent", update, response=Response(), db=mock_db)
     assert exc_info.value.status_code == 404
     assert "Note not found" in str(exc_info.value)
+    mock_db.commit.assert_not_called()
 
 
 def test_update_note_raises_409_when_note_locked(mock_db):
     # Arrange
     from api.schemas.note import NoteUpdate
-    dummy_note = DummyNote(uuid="1", name="Old Name", description="Old Desc", locked=True)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True)
     update = NoteUpdate(name="New Name", description="New Desc")
 
     # Act & Assert
     with pytest.raises(Exception) as exc_info:
-        sut.update_note("1", update, db=mock_db)
+        sut.update_note("1", update, response=Response(), db=mock_db)
     assert exc_info.value.status_code == 409
     assert "locked" in str(exc_info.value).lower()
+    mock_db.commit.assert_not_called()
 
 
 def test_lock_note_success(mock_db):
     # Arrange
-    dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=False)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    locked_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=True)
+    mock_db.execute.return_value.one.return_value = MutationOutcome(note=locked_note)
 
     # Act
-    result = sut.lock_note("1", db=mock_db)
+    result = sut.lock_note("1", response=Response(), db=mock_db)
 
     # Assert
     assert result["uuid"] == "1"
     assert result["name"] == "Note 1"
     assert result["description"] == "Desc 1"
     assert result["locked"] is True
+    mock_db.execute.assert_called_once()
     mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(dummy_note)
+    mock_db.refresh.assert_not_called()
 
 
 def test_lock_note_raises_404_when_note_not_found(mock_db):
     # Arrange
-    mock_db.query.return_value.filter_by.return_value.first.return_value = None
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=False)
 
     # Act & Assert
     with pytest.raises(Exception) as exc_info:
-        sut.lock_note("nonexistent", db=mock_db)
+        sut.lock_note("nonexistent", response=Response(), db=mock_db)
     assert exc_info.value.status_code == 404
     assert "Note not found" in str(exc_info.value)
 
 
 def test_lock_note_raises_409_when_note_already_locked(mock_db):
     # Arrange
-    dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=True)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True)
 
     # Act & Assert
     with pytest.raises(Exception) as exc_info:
-        sut.lock_note("1", db=mock_db)
+        sut.lock_note("1", response=Response(), db=mock_db)
     assert exc_info.value.status_code == 409
     assert "already locked" in str(exc_info.value).lower()
 
 
 def test_delete_note_success(mock_db):
     # Arrange
-    dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=False)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    deleted_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=False)
+    mock_db.execute.return_value.one.return_value = MutationOutcome(note=deleted_note)
 
     # Act
     result = sut.delete_note("1", db=mock_db)
 
     # Assert
     assert result["detail"] == "Note deleted"
-    mock_db.delete.assert_called_once_with(dummy_note)
+    mock_db.execute.assert_called_once()
+    mock_db.delete.assert_not_called()
     mock_db.commit.assert_called_once()
 
 
 def test_delete_note_raises_404_when_note_not_found(mock_db):
     # Arrange
-    mock_db.query.return_value.filter_by.return_value.first.return_value = None
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=False)
 
     # Act & Assert
     with pytest.raises(Exception) as exc_info:
@@ -202,11 +236,598 @@ def test_delete_note_raises_404_when_note_not_found(mock_db):
 
 def test_delete_note_raises_409_when_note_locked(mock_db):
     # Arrange
-    dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=True)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True)
 
     # Act & Assert
     with pytest.raises(Exception) as exc_info:
         sut.delete_note("1", db=mock_db)
     assert exc_info.value.status_code == 409
     assert "locked" in str(exc_info.value).lower()
+    mock_db.commit.assert_not_called()
+
+
+class DummyRow:
+    def __init__(self, id, uuid, name):
+        self.id = id
+        self.uuid = uuid
+        self.name = name
+
+
+def test_list_notes_selects_only_summary_columns(mock_db):
+    # Arrange
+    mock_db.query.return_value.order_by.return_value.all.return_value = []
+
+    # Act
+    sut.list_notes(response=Response(), db=mock_db)
+
+    # Assert
+    mock_db.query.assert_called_once_with(sut.Note.id, sut.Note.uuid, sut.Note.name)
+
+
+def test_list_notes_with_limit_sets_next_cursor(mock_db):
+    # Arrange
+    from fastapi import Response
+    rows = [DummyRow(id=i, uuid=str(i), name=f"Note {i}") for i in (1, 2, 3)]
+    mock_db.query.return_value.order_by.return_value.limit.return_value.all.return_value = rows
+    response = Response()
+
+    # Act
+    result = body(sut.list_notes(response=response, limit=2, db=mock_db))
+
+    # Assert
+    assert [n["uuid"] for n in result] == ["1", "2"]
+    mock_db.query.return_value.order_by.return_value.limit.assert_called_once_with(3)
+    assert sut.decode_cursor(response.headers[sut.NEXT_CURSOR_HEADER]) == 2
+
+
+def test_list_notes_last_page_has_no_next_cursor(mock_db):
+    # Arrange
+    from fastapi import Response
+    rows = [DummyRow(id=5, uuid="5", name="Note 5")]
+    query = mock_db.query.return_value.order_by.return_value
+    query.filter.return_value.limit.return_value.all.return_value = rows
+    response = Response()
+
+    # Act
+    result = body(sut.list_notes(response=response, limit=2, cursor=sut.encode_cursor(4), db=mock_db))
+
+    # Assert
+    assert result == [{"uuid": "5", "name": "Note 5"}]
+    query.filter.assert_called_once()
+    assert sut.NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_list_notes_raises_400_for_invalid_cursor(mock_db):
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.list_notes(cursor="not-a-cursor!", response=Response(), db=mock_db)
+    assert exc_info.value.status_code == 400
+
+
+class SearchRow(DummyRow):
+    def __init__(self, id, uuid, name, rank):
+        super().__init__(id, uuid, name)
+        self.rank = rank
+
+
+def test_search_notes_returns_page_and_next_cursor(mock_db):
+    # Arrange
+    rows = [SearchRow(1, "1", "Best", 0.9), SearchRow(2, "2", "Good", 0.25), SearchRow(3, "3", "Fair", 0.1)]
+    mock_db.execute.return_value.all.return_value = rows
+    response = Response()
+
+    # Act
+    result = body(sut.search_notes("best", response=response, limit=2, db=mock_db))
+
+    # Assert
+    assert result == [{"uuid": "1", "name": "Best"}, {"uuid": "2", "name": "Good"}]
+    assert sut.decode_search_cursor(response.headers[sut.NEXT_CURSOR_HEADER]) == (0.25, 2)
+
+
+def test_search_notes_raises_400_for_invalid_cursor(mock_db):
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.search_notes("best", response=Response(), cursor=sut.encode_cursor(4), db=mock_db)
+    assert exc_info.value.status_code == 400
+    mock_db.execute.assert_not_called()
+
+
+def test_search_cursor_round_trips_rank_exactly():
+    rank = 0.060792699456214905
+    assert sut.decode_search_cursor(sut.encode_search_cursor(rank, 7)) == (rank, 7)
+
+
+class BatchOutcome:
+    """Row shape returned by the batch mutations in note_statements."""
+    def __init__(self, found_uuid, note=None, current_locked=None):
+        self.found_uuid = found_uuid
+        self.current_version = 1
+        # A note that was found but not written is locked unless stated otherwise
+        self.current_locked = note is None if current_locked is None else current_locked
+        self.uuid = note.uuid if note else None
+        self.name = note.name if note else None
+        self.description = note.description if note else None
+        self.locked = note.locked if note else None
+        self.version = note.version if note else None
+
+
+def test_create_notes_batch_inserts_all_rows_in_one_statement(mock_db):
+    # Arrange
+    notes = [NoteCreate(name="A"), NoteCreate(name="B", description="b")]
+    mock_db.execute.return_value.all.return_value = [
+        DummyNote(uuid="1", name="A", description=None),
+        DummyNote(uuid="2", name="B", description="b"),
+    ]
+
+    # Act
+    result = sut.create_notes_batch(notes, db=mock_db)
+
+    # Assert
+    mock_db.execute.assert_called_once()
+    params = mock_db.execute.call_args[0][1]
+    assert params == [{"name": "A", "description": None}, {"name": "B", "description": "b"}]
+    mock_db.commit.assert_called_once()
+    assert [r["status"] for r in result] == [200, 200]
+    assert result[1]["note"]["description"] == "b"
+
+
+def test_create_notes_batch_rejects_oversized_batch(mock_db, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(sut, "NOTES_BATCH_MAX_ITEMS", 2)
+    notes = [NoteCreate(name=str(i)) for i in range(3)]
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.create_notes_batch(notes, db=mock_db)
+    assert exc_info.value.status_code == 413
+    mock_db.execute.assert_not_called()
+
+
+def test_lock_notes_batch_reports_per_item_results(mock_db):
+    # Arrange
+    import uuid
+    unlocked, locked, missing = (str(uuid.uuid4()) for _ in range(3))
+    mock_db.execute.return_value.all.return_value = [
+        BatchOutcome(uuid.UUID(unlocked), DummyNote(uuid=unlocked, name="A", description=None, locked=True)),
+        BatchOutcome(uuid.UUID(locked)),
+    ]
+
+    # Act
+    result = sut.lock_notes_batch([unlocked, locked, missing, "not-a-uuid"], db=mock_db)
+
+    # Assert
+    assert [r["status"] for r in result] == [200, 409, 404, 422]
+    assert result[0]["note"]["locked"] is True
+    mock_db.execute.assert_called_once()
+    mock_db.commit.assert_called_once()
+
+
+def test_delete_notes_batch_reports_per_item_results(mock_db):
+    # Arrange
+    import uuid
+    unlocked, locked = (str(uuid.uuid4()) for _ in range(2))
+    mock_db.execute.return_value.all.return_value = [
+        BatchOutcome(uuid.UUID(unlocked), DummyNote(uuid=unlocked, name="A", description=None)),
+        BatchOutcome(uuid.UUID(locked)),
+    ]
+
+    # Act
+    result = sut.delete_notes_batch([unlocked, locked], db=mock_db)
+
+    # Assert
+    assert [r["status"] for r in result] == [200, 409]
+    assert result[1]["detail"] == "Note is locked and cannot be deleted."
+    mock_db.commit.assert_called_once()
+
+
+def test_delete_notes_batch_reports_404_for_note_deleted_mid_batch(mock_db):
+    # Arrange: the batch's snapshot still shows the note unlocked, but a
+    # concurrent delete committed before the batch could delete it
+    import uuid
+    deleted, gone = (str(uuid.uuid4()) for _ in range(2))
+    mutation, fresh = MagicMock(), MagicMock()
+    mutation.all.return_value = [
+        BatchOutcome(uuid.UUID(deleted), DummyNote(uuid=deleted, name="A", description=None)),
+        BatchOutcome(uuid.UUID(gone), current_locked=False),
+    ]
+    fresh.all.return_value = []
+    mock_db.execute.side_effect = [mutation, fresh]
+
+    # Act
+    result = sut.delete_notes_batch([deleted, gone], db=mock_db)
+
+    # Assert
+    assert [r["status"] for r in result] == [200, 404]
+    assert mock_db.execute.call_args.args == sut.select_note_states([uuid.UUID(gone)])
+
+
+def test_lock_notes_batch_reports_409_for_note_locked_mid_batch(mock_db):
+    # Arrange
+    import uuid
+    note_uuid = uuid.uuid4()
+    mutation, fresh = MagicMock(), MagicMock()
+    mutation.all.return_value = [BatchOutcome(note_uuid, current_locked=False)]
+    fresh.all.return_value = [MagicMock(found_uuid=note_uuid, current_version=2, current_locked=True)]
+    mock_db.execute.side_effect = [mutation, fresh]
+
+    # Act
+    result = sut.lock_notes_batch([str(note_uuid)], db=mock_db)
+
+    # Assert
+    assert result == [{"uuid": str(note_uuid), "status": 409, "detail": "Note is already locked."}]
+
+
+def test_delete_notes_batch_skips_database_when_no_valid_uuids(mock_db):
+    # Act
+    result = sut.delete_notes_batch(["bad"], db=mock_db)
+
+    # Assert
+    assert result == [{"uuid": "bad", "status": 422, "detail": "Invalid UUID"}]
+    mock_db.execute.assert_not_called()
+
+
+def test_get_note_detail_is_served_from_cache_on_second_call(mock_db):
+    # Arrange
+    dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=False)
+    mock_db.execute.return_value.first.return_value = dummy_note
+
+    # Act
+    first = body(sut.get_note_detail("1", response=Response(), db=mock_db))
+    second = body(sut.get_note_detail("1", response=Response(), db=mock_db))
+
+    # Assert
+    assert first == second
+    mock_db.execute.assert_called_once()
+
+
+def test_get_note_detail_reports_cache_status(mock_db):
+    # Arrange
+    mock_db.execute.return_value.first.return_value = DummyNote(uuid="1", name="Note 1", description=None)
+
+    # Act
+    first = sut.get_note_detail("1", response=Response(), db=mock_db)
+    second = sut.get_note_detail("1", response=Response(), db=mock_db)
+
+    # Assert
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+
+
+def test_update_note_invalidates_cached_detail(mock_db):
+    # Arrange
+    from api.schemas.note import NoteUpdate
+    sut.note_detail_cache.put({"uuid": "1", "name": "Old Name", "description": None, "locked": False})
+    updated_note = DummyNote(uuid="1", name="New Name", description=None, locked=False)
+    mock_db.execute.return_value.one.return_value = MutationOutcome(note=updated_note)
+
+    # Act
+    sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), db=mock_db)
+
+    # Assert
+    assert sut.note_detail_cache.get("1") is None
+
+
+def test_update_note_keeps_cache_when_note_locked(mock_db):
+    # Arrange
+    from api.schemas.note import NoteUpdate
+    cached = {"uuid": "1", "name": "Name", "description": None, "locked": True}
+    sut.note_detail_cache.put(cached)
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True)
+
+    # Act
+    with pytest.raises(Exception):
+        sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), db=mock_db)
+
+    # Assert
+    assert sut.note_detail_cache.get("1")["detail"] == cached
+
+
+def test_get_note_detail_sets_etag_from_version(mock_db):
+    # Arrange
+    mock_db.execute.return_value.first.return_value = DummyNote(uuid="1", name="Note 1", description=None, version=42)
+    response = Response()
+
+    # Act
+    sut.get_note_detail("1", response=response, db=mock_db)
+
+    # Assert
+    assert response.headers["ETag"] == '"42"'
+
+
+def test_get_note_detail_returns_304_when_etag_matches(mock_db):
+    # Arrange
+    mock_db.execute.return_value.scalar.return_value = "42"
+
+    # Act
+    result = sut.get_note_detail("1", response=Response(), if_none_match='W/"42"', db=mock_db)
+
+    # Assert
+    assert result.status_code == 304
+    assert result.headers["ETag"] == '"42"'
+    mock_db.execute.return_value.first.assert_not_called()
+
+
+def test_get_note_detail_returns_304_from_cache(mock_db):
+    # Arrange
+    sut.note_detail_cache.put({"uuid": "1", "name": "Note 1", "description": None, "locked": False}, '"42"')
+
+    # Act
+    result = sut.get_note_detail("1", response=Response(), if_none_match='"42"', db=mock_db)
+
+    # Assert
+    assert result.status_code == 304
+    mock_db.execute.assert_not_called()
+
+
+def test_list_notes_returns_304_when_revision_unchanged(mock_db):
+    # Arrange
+    mock_db.execute.return_value.scalar_one.return_value = 7
+
+    # Act
+    result = sut.list_notes(response=Response(), if_none_match='"7"', db=mock_db)
+
+    # Assert
+    assert result.status_code == 304
+    mock_db.query.assert_not_called()
+
+
+def test_list_notes_sets_etag_from_revision(mock_db):
+    # Arrange
+    mock_db.execute.return_value.scalar_one.return_value = 8
+    mock_db.query.return_value.order_by.return_value.all.return_value = []
+    response = Response()
+
+    # Act
+    sut.list_notes(response=response, if_none_match='"7"', db=mock_db)
+
+    # Assert
+    assert response.headers["ETag"] == '"8"'
+
+
+def test_update_note_raises_412_when_if_match_is_stale(mock_db):
+    # Arrange
+    from api.schemas.note import NoteUpdate
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True, current_version=43, current_locked=False)
+    mock_db.execute.return_value.first.return_value = NoteState(current_version=43)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), if_match='"42"', db=mock_db)
+    assert exc_info.value.status_code == 412
+    mock_db.commit.assert_not_called()
+
+
+def test_update_note_raises_412_when_body_version_is_stale(mock_db):
+    # Arrange
+    from api.schemas.note import NoteUpdate
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True, current_version=43, current_locked=False)
+    mock_db.execute.return_value.first.return_value = NoteState(current_version=43)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.update_note("1", NoteUpdate(name="New Name", version=42), response=Response(), db=mock_db)
+    assert exc_info.value.status_code == 412
+    statement, params = mock_db.execute.call_args_list[0].args
+    assert params["expected_versions"] == [42]
+
+
+def test_update_note_raises_409_when_locked_note_matches_if_match(mock_db):
+    # Arrange
+    from api.schemas.note import NoteUpdate
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True, current_version=42)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), if_match='"42"', db=mock_db)
+    assert exc_info.value.status_code == 409
+
+
+def test_update_note_without_values_returns_note_without_writing(mock_db):
+    # Arrange
+    from api.schemas.note import NoteUpdate
+    mock_db.execute.return_value.first.return_value = DummyNote(uuid="1", name="Name", description=None, version=3)
+    response = Response()
+
+    # Act
+    result = sut.update_note("1", NoteUpdate(), response=response, db=mock_db)
+
+    # Assert
+    assert result["name"] == "Name"
+    assert response.headers["ETag"] == '"3"'
+    assert mock_db.execute.call_args.args == sut.select_note_detail("1")
+    mock_db.commit.assert_not_called()
+
+
+def test_update_note_without_values_raises_412_when_version_is_stale(mock_db):
+    # Arrange
+    from api.schemas.note import NoteUpdate
+    mock_db.execute.return_value.first.return_value = DummyNote(uuid="1", name="Name", description=None, version=3)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.update_note("1", NoteUpdate(version=2), response=Response(), db=mock_db)
+    assert exc_info.value.status_code == 412
+    mock_db.commit.assert_not_called()
+
+
+def test_update_note_raises_409_for_locked_note_without_reading_it_again(mock_db):
+    # Arrange
+    from api.schemas.note import NoteUpdate
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True, current_version=43)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), if_match='"42"', db=mock_db)
+    assert exc_info.value.status_code == 409
+    mock_db.execute.assert_called_once()
+
+
+def test_update_note_raises_412_when_concurrent_write_bumped_version(mock_db):
+    # Arrange: the probe still saw version 42, the write waited and lost to version 43
+    from api.schemas.note import NoteUpdate
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True, current_version=42, current_locked=False)
+    mock_db.execute.return_value.first.return_value = NoteState(current_version=43)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), if_match='"42"', db=mock_db)
+    assert exc_info.value.status_code == 412
+    statement, params = mock_db.execute.call_args.args
+    assert (statement, params) == sut.select_note_state("1")
+
+
+def test_lock_note_raises_409_when_concurrent_write_locked_note(mock_db):
+    # Arrange
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True, current_locked=False)
+    mock_db.execute.return_value.first.return_value = NoteState(current_version=2, current_locked=True)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.lock_note("1", response=Response(), db=mock_db)
+    assert exc_info.value.status_code == 409
+
+
+def test_delete_note_raises_404_when_concurrent_write_deleted_note(mock_db):
+    # Arrange
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True, current_locked=False)
+    mock_db.execute.return_value.first.return_value = None
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.delete_note("1", if_match='"1"', db=mock_db)
+    assert exc_info.value.status_code == 404
+    mock_db.commit.assert_not_called()
+
+
+def test_expected_versions_parses_if_match():
+    assert sut.expected_versions(None) is None
+    assert sut.expected_versions("*") is None
+    assert sut.expected_versions('"1", W/"2", "3", "abc"') == [1, 3]
+
+
+def test_expected_versions_combines_if_match_and_body_version():
+    assert sut.expected_versions(None, 4) == [4]
+    assert sut.expected_versions('"4", "5"', 5) == [5]
+    assert sut.expected_versions('"4"', 5) == []
+
+
+def read_stream(response):
+    import asyncio
+
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+    return asyncio.run(collect())
+
+
+def test_export_notes_streams_one_chunk_per_partition(mock_db):
+    # Arrange
+    import json
+    result = mock_db.execute.return_value
+    result.partitions.return_value = iter([
+        [DummyNote(uuid="1", name="A", description=None), DummyNote(uuid="2", name="B", description="b")],
+        [DummyNote(uuid="3", name="C", description=None, locked=True)],
+    ])
+
+    # Act
+    response = sut.export_notes(export_format="ndjson", db=mock_db)
+    chunks = read_stream(response)
+
+    # Assert
+    assert response.media_type == "application/x-ndjson"
+    assert chunks[0] == ""
+    assert len(chunks) == 3
+    lines = "".join(chunks).splitlines()
+    assert [json.loads(line)["uuid"] for line in lines] == ["1", "2", "3"]
+    assert json.loads(lines[2])["locked"] is True
+    result.close.assert_called_once()
+
+
+def test_export_notes_writes_csv_with_header(mock_db):
+    # Arrange
+    mock_db.execute.return_value.partitions.return_value = iter([
+        [DummyNote(uuid="1", name="Comma, inside", description=None)],
+    ])
+
+    # Act
+    response = sut.export_notes(export_format="csv", db=mock_db)
+    body = "".join(read_stream(response))
+
+    # Assert
+    assert response.media_type == "text/csv"
+    assert body == 'uuid,name,description,locked\r\n1,"Comma, inside",,false\r\n'
+
+
+def test_export_notes_raises_500_when_query_fails(mock_db):
+    # Arrange
+    from sqlalchemy.exc import SQLAlchemyError
+    mock_db.execute.side_effect = SQLAlchemyError("DB error")
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.export_notes(export_format="csv", db=mock_db)
+    assert exc_info.value.status_code == 500
+
+
+def test_get_note_detail_returns_trusted_json_with_etag(mock_db):
+    # Arrange
+    mock_db.execute.return_value.first.return_value = DummyNote(uuid="1", name="Note 1", description=None, version=7)
+
+    # Act
+    result = sut.get_note_detail("1", response=Response(), db=mock_db)
+
+    # Assert
+    assert result.media_type == "application/json"
+    assert result.headers["ETag"] == '"7"'
+    assert result.headers["content-length"] == str(len(result.body))
+
+
+def test_get_note_stats_reads_counter_row(mock_db):
+    # Arrange
+    mock_db.execute.return_value.one.return_value = MagicMock(total=5, locked=2, unlocked=3)
+
+    # Act
+    result = sut.get_note_stats(db=mock_db)
+
+    # Assert
+    assert result == {"total": 5, "locked": 2, "unlocked": 3}
+    mock_db.query.assert_not_called()
+
+
+def test_get_note_details_keys_found_notes_and_reports_missing(mock_db):
+    # Arrange
+    import uuid
+    found = "3f2b6c1e-8a4d-4c2e-9b1a-2d5e7f0a1b3c"
+    missing = "9d0e2f4a-1b3c-4d5e-8f6a-7b8c9d0e1f2a"
+    mock_db.execute.return_value.all.return_value = [
+        DummyNote(uuid=uuid.UUID(found), name="Note 1", description=None),
+    ]
+
+    # Act
+    result = body(sut.get_note_details([found, missing, found], response=Response(), db=mock_db))
+
+    # Assert
+    assert result == {
+        "notes": {found: {"uuid": found, "name": "Note 1", "description": None, "locked": False, "version": 1}},
+        "missing": [missing],
+    }
+    statement, params = mock_db.execute.call_args.args
+    assert params == {"note_uuids": [uuid.UUID(found), uuid.UUID(missing)]}
+
+
+def test_get_note_details_rejects_malformed_uuids(mock_db):
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.get_note_details(["not-a-uuid"], response=Response(), db=mock_db)
+    assert exc_info.value.status_code == 422
+    mock_db.execute.assert_not_called()
+
+
+def test_get_note_details_rejects_too_many_uuids(monkeypatch, mock_db):
+    # Arrange
+    import uuid
+    monkeypatch.setattr(sut, "NOTES_DETAILS_MAX_ITEMS", 2)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        sut.get_note_details([str(uuid.uuid4()) for _ in range(3)], response=Response(), db=mock_db)
+    assert exc_info.value.status_code == 413
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import pytest
+import uuid
+from fastapi import Response
+from unittest.mock import AsyncMock, MagicMock
+from api.services import note_async as sut
+from api.schemas.note import NoteCreate, NoteUpdate
+
+def body(response):
+    """Decoded content of a response returned directly by a handler."""
+    return json.loads(response.body)
+
+class DummyNote:
+    def __init__(self, uuid, name, description, locked=False, version=1):
+        self.uuid = uuid
+        self.name = name
+        self.description = description
+        self.locked = locked
+        self.version = version
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.add = MagicMock()
+    db.commit = AsyncMock()
+    db.refresh = AsyncMock()
+    db.rollback = AsyncMock()
+    db.delete = AsyncMock()
+    db.execute = AsyncMock(return_value=MagicMock())
+    return db
+
+class NoteState:
+    """Row shape returned by select_note_state."""
+    def __init__(self, current_version, current_locked=False):
+        self.current_version = current_version
+        self.current_locked = current_locked
+
+class MutationOutcome:
+    """Row shape returned by the single-statement mutations in note_statements."""
+    def __init__(self, note=None, found=True, current_version=1, current_locked=None):
+        self.current_version = current_version if found else None
+        # A note that was found but not written is locked unless stated otherwise
+        self.current_locked = (note is None if current_locked is None else current_locked) if found else None
+        self.version = 2 if note else None
+        self.uuid = note.uuid if note else None
+        self.name = note.name if note else None
+        self.description = note.description if note else None
+        self.locked = note.locked if note else None
+
+def returns_outcome(mock_db, outcome):
+    mock_db.execute.return_value.one.return_value = outcome
+
+def returns_note(mock_db, note):
+    mock_db.execute.return_value.first.return_value = note
+
+def test_create_note_success(mock_db):
+    # Arrange
+    note_data = NoteCreate(name="Test Note", description="A test note")
+    dummy_note = DummyNote(uuid="1234-abcd", name=note_data.name, description=note_data.description)
+    original_Note = sut.Note
+    sut.Note = lambda name, description: dummy_note
+
+    # Act
+    try:
+        result = asyncio.run(sut.create_note(note_data, db=mock_db))
+    finally:
+        sut.Note = original_Note
+
+    # Assert
+    assert result["uuid"] == "1234-abcd"
+    assert result["locked"] is False
+    mock_db.add.assert_called_once_with(dummy_note)
+    mock_db.commit.assert_awaited_once()
+    mock_db.refresh.assert_awaited_once_with(dummy_note)
+
+def test_list_notes_success(mock_db):
+    # Arrange
+    rows = [DummyNote(uuid="1", name="Note 1", description=None), DummyNote(uuid="2", name="Note 2", description=None)]
+    mock_db.execute.return_value.all.return_value = rows
+
+    # Act
+    result = body(asyncio.run(sut.list_notes(response=Response(), db=mock_db)))
+
+    # Assert
+    assert result == [{"uuid": "1", "name": "Note 1"}, {"uuid": "2", "name": "Note 2"}]
+
+def test_get_note_detail_success(mock_db):
+    # Arrange
+    returns_note(mock_db, DummyNote(uuid="1", name="Note 1", description="Desc 1"))
+
+    # Act
+    result = body(asyncio.run(sut.get_note_detail("1", response=Response(), db=mock_db)))
+
+    # Assert
+    assert result == {"uuid": "1", "name": "Note 1", "description": "Desc 1", "locked": False, "version": 1}
+
+def test_get_note_detail_raises_404_when_note_not_found(mock_db):
+    # Arrange
+    returns_note(mock_db, None)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        asyncio.run(sut.get_note_detail("nonexistent", response=Response(), db=mock_db))
+    assert exc_info.value.status_code == 404
+
+def test_update_note_success(mock_db):
+    # Arrange
+    returns_outcome(mock_db, MutationOutcome(note=DummyNote(uuid="1", name="New Name", description="Old Desc")))
+
+    # Act
+    result = asyncio.run(sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), db=mock_db))
+
+    # Assert
+    assert result["name"] == "New Name"
+    assert result["description"] == "Old Desc"
+    mock_db.execute.assert_awaited_once()
+    mock_db.commit.assert_awaited_once()
+
+def test_update_note_raises_409_when_note_locked(mock_db):
+    # Arrange
+    returns_outcome(mock_db, MutationOutcome(found=True))
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        asyncio.run(sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), db=mock_db))
+    assert exc_info.value.status_code == 409
+    mock_db.commit.assert_not_awaited()
+
+def test_lock_note_success(mock_db):
+    # Arrange
+    returns_outcome(mock_db, MutationOutcome(note=DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=True)))
+
+    # Act
+    result = asyncio.run(sut.lock_note("1", response=Response(), db=mock_db))
+
+    # Assert
+    assert result["locked"] is True
+    mock_db.commit.assert_awaited_once()
+
+def test_lock_note_raises_409_when_note_already_locked(mock_db):
+    # Arrange
+    returns_outcome(mock_db, MutationOutcome(found=True))
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        asyncio.run(sut.lock_note("1", response=Response(), db=mock_db))
+    assert exc_info.value.status_code == 409
+    assert "already locked" in str(exc_info.value).lower()
+
+def test_delete_note_success(mock_db):
+    # Arrange
+    returns_outcome(mock_db, MutationOutcome(note=DummyNote(uuid="1", name="Note 1", description="Desc 1")))
+
+    # Act
+    result = asyncio.run(sut.delete_note("1", db=mock_db))
+
+    # Assert
+    assert result["detail"] == "Note deleted"
+    mock_db.delete.assert_not_awaited()
+    mock_db.commit.assert_awaited_once()
+
+def test_delete_note_raises_404_when_note_not_found(mock_db):
+    # Arrange
+    returns_outcome(mock_db, MutationOutcome(found=False))
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        asyncio.run(sut.delete_note("nonexistent", db=mock_db))
+    assert exc_info.value.status_code == 404
+
+def test_update_note_raises_412_when_if_match_is_stale(mock_db):
+    # Arrange
+    returns_outcome(mock_db, MutationOutcome(found=True, current_version=43, current_locked=False))
+    returns_note(mock_db, NoteState(current_version=43))
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        asyncio.run(sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), if_match='"42"', db=mock_db))
+    assert exc_info.value.status_code == 412
+    mock_db.commit.assert_not_awaited()
+
+def test_update_note_without_values_returns_note_without_writing(mock_db):
+    # Arrange
+    returns_note(mock_db, DummyNote(uuid="1", name="Name", description=None, version=3))
+    response = Response()
+
+    # Act
+    result = asyncio.run(sut.update_note("1", NoteUpdate(), response=response, db=mock_db))
+
+    # Assert
+    assert result["name"] == "Name"
+    assert response.headers["ETag"] == '"3"'
+    assert mock_db.execute.await_args.args == sut.select_note_detail("1")
+    mock_db.commit.assert_not_awaited()
+
+def test_update_note_raises_412_when_concurrent_write_bumped_version(mock_db):
+    # Arrange: the probe still saw version 42, the write waited and lost to version 43
+    returns_outcome(mock_db, MutationOutcome(found=True, current_version=42, current_locked=False))
+    returns_note(mock_db, NoteState(current_version=43))
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        asyncio.run(sut.update_note("1", NoteUpdate(name="New Name"), response=Response(), if_match='"42"', db=mock_db))
+    assert exc_info.value.status_code == 412
+    assert mock_db.execute.await_args.args == sut.select_note_state("1")
+
+def test_delete_note_raises_404_when_concurrent_write_deleted_note(mock_db):
+    # Arrange
+    returns_outcome(mock_db, MutationOutcome(found=True, current_locked=False))
+    returns_note(mock_db, None)
+
+    # Act & Assert
+    with pytest.raises(Exception) as exc_info:
+        asyncio.run(sut.delete_note("1", if_match='"1"', db=mock_db))
+    assert exc_info.value.status_code == 404
+    mock_db.commit.assert_not_awaited()
+
+def test_get_note_stats_reads_counter_row(mock_db):
+    # Arrange
+    mock_db.execute.return_value.one.return_value = MagicMock(total=5, locked=2, unlocked=3)
+
+    # Act
+    result = asyncio.run(sut.get_note_stats(db=mock_db))
+
+    # Assert
+    assert result == {"total": 5, "locked": 2, "unlocked": 3}
+
+def test_get_note_details_reports_missing(mock_db):
+    # Arrange
+    found, missing = "3f2b6c1e-8a4d-4c2e-9b1a-2d5e7f0a1b3c", "9d0e2f4a-1b3c-4d5e-8f6a-7b8c9d0e1f2a"
+    mock_db.execute.return_value.all.return_value = [DummyNote(uuid=uuid.UUID(found), name="Note 1", description=None)]
+
+    # Act
+    result = body(asyncio.run(sut.get_note_details([found, missing], response=Response(), db=mock_db)))
+
+    # Assert
+    assert list(result["notes"]) == [found]
+    assert result["missing"] == [missing]
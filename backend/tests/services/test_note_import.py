@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.database import get_db
+from api.schemas.note import NoteCreate
+from api.services import note_import as sut
+from api.services import note as note_service
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.copied = []
+    cursor = db.connection.return_value.connection.cursor.return_value
+    cursor.copy_expert.side_effect = lambda sql, buffer: db.copied.append(buffer.read())
+    return db
+
+@pytest.fixture
+def client(mock_db):
+    app = FastAPI()
+    app.include_router(note_service.router)
+    app.dependency_overrides[get_db] = lambda: mock_db
+    return TestClient(app)
+
+def test_body_text_reads_lines_across_chunk_boundaries():
+    # Arrange
+    chunks = [b"\xef\xbb", b'\xbf{"name": "a"}\n{"na', b'me": "b"}']
+
+    # Act
+    lines = list(sut.open_body_text(chunks))
+
+    # Assert
+    assert lines == ['{"name": "a"}\n', '{"name": "b"}']
+
+def test_parse_csv_keeps_quoted_newlines_and_line_numbers():
+    # Arrange
+    text = sut.open_body_text([b'name,description\n"two\nlines",\nplain,desc\n'])
+
+    # Act
+    rows = list(sut.parse_csv(text))
+
+    # Assert
+    assert rows == [(3, {"name": "two\nlines"}, None), (4, {"name": "plain", "description": "desc"}, None)]
+
+def test_parse_csv_requires_name_column():
+    with pytest.raises(sut.ImportFormatError):
+        list(sut.parse_csv(["title\n", "x\n"]))
+
+def test_validated_batches_splits_and_counts_rejections():
+    # Arrange
+    records = [(1, {"name": "a"}, None), (2, {}, None), (3, None, "Invalid JSON"), (4, {"name": "b"}, None), (5, {"name": "c"}, None)]
+    summary = {"accepted": 0, "rejected": 0, "errors": []}
+
+    # Act
+    batches = list(sut.validated_batches(records, summary, batch_rows=2))
+
+    # Assert
+    assert [[note.name for note in batch] for batch in batches] == [["a", "b"], ["c"]]
+    assert summary["rejected"] == 2
+    assert summary["errors"] == [{"line": 2, "detail": "name: Field required"}, {"line": 3, "detail": "Invalid JSON"}]
+
+def test_validated_batches_caps_reported_errors(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(sut, "NOTES_IMPORT_MAX_REPORTED_ERRORS", 1)
+    summary = {"accepted": 0, "rejected": 0, "errors": []}
+
+    # Act
+    list(sut.validated_batches([(1, None, "Invalid JSON"), (2, None, "Invalid JSON")], summary))
+
+    # Assert
+    assert summary["rejected"] == 2
+    assert len(summary["errors"]) == 1
+
+def test_copy_rows_distinguishes_null_from_empty_text():
+    # Act
+    buffer = sut.copy_rows([NoteCreate(name='say "hi"'), NoteCreate(name="", description="")])
+
+    # Assert
+    assert buffer.read() == '"say ""hi""",\n"",""\n'
+
+def test_import_notes_copies_valid_rows_and_reports_rejected(client, mock_db):
+    # Arrange
+    mock_db.execute.return_value.rowcount = 2
+    body = b'{"name": "a"}\n{"bad"\n{"name": "b", "description": "d"}\n'
+
+    # Act
+    response = client.post("/notes/import", content=iter([body[:10], body[10:]]))
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 2, "rejected": 1, "errors": [{"line": 2, "detail": "Invalid JSON"}]}
+    assert mock_db.copied == ['"a",\n"b","d"\n']
+    mock_db.commit.assert_called_once()
+
+def test_import_notes_rejects_csv_without_name_column(client, mock_db):
+    # Act
+    response = client.post("/notes/import", params={"format": "csv"}, content=b"title\nx\n")
+
+    # Assert
+    assert response.status_code == 422
+    mock_db.rollback.assert_called_once()
+    mock_db.commit.assert_not_called()
@@ -1,14 +1,33 @@
 import pytest
+from fastapi import Response
 from unittest.mock import patch, MagicMock
 from api.services import note as sut
 from api.schemas.note import NoteCreate, NoteUpdate
 
 class DummyNote:
-    def __init__(self, uuid, name, description, locked=False):
+    def __init__(self, uuid, name, description, locked=False, version=1):
         self.uuid = uuid
         self.name = name
         self.description = description
         self.locked = locked
+        self.version = version
+
+class MutationOutcome:
+    """Row shape returned by the single-statement mutations in note_statements."""
+    def __init__(self, note=None, found=True, current_version=1, current_locked=None):
+        self.current_version = current_version if found else None
+        # A note that was found but not written is locked unless stated otherwise
+        self.current_locked = (note is None if current_locked is None else current_locked) if found else None
+        self.version = 2 if note else None
+        self.uuid = note.uuid if note else None
+        self.name = note.name if note else None
+        self.description = note.description if note else None
+        self.locked = note.locked if note else None
+
+def rendered(mock_log):
+    """The message of the last logging call with its %-style arguments applied."""
+    args = mock_log.call_args[0]
+    return args[0] % args[1:]
 
 @pytest.fixture
 def mock_db():
@@ -22,103 +41,107 @@ def mock_db():
 # --- update_note ---
 def test_update_note_logs_warning_when_not_found(mock_db):
     update = NoteUpdate(name="New Name", description="New Desc")
-    mock_db.query.return_value.filter_by.return_value.first.return_value = None
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=False)
     with patch.object(sut.logger, "warning") as mock_warning:
         with pytest.raises(Exception):
-            sut.update_note("nonexistent", update, db=mock_db)
+            sut.update_note("nonexistent", update, response=Response(), db=mock_db)
         mock_warning.assert_called_once()
-        assert "not found" in mock_warning.call_args[0][0].lower()
+        assert "not found" in rendered(mock_warning).lower()
 
 def test_update_note_logs_warning_when_locked(mock_db):
     update = NoteUpdate(name="New Name", description="New Desc")
-    dummy_note = DummyNote(uuid="1", name="Old Name", description="Old Desc", locked=True)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True)
     with patch.object(sut.logger, "warning") as mock_warning:
         with pytest.raises(Exception):
-            sut.update_note("1", update, db=mock_db)
+            sut.update_note("1", update, response=Response(), db=mock_db)
         mock_warning.assert_called_once()
-        assert "locked" in mock_warning.call_args[0][0].lower()
+        assert "locked" in rendered(mock_warning).lower()
 
 def test_update_note_logs_error_on_db_error(mock_db):
     update = NoteUpdate(name="New Name", description="New Desc")
     dummy_note = DummyNote(uuid="1", name="Old Name", description="Old Desc", locked=False)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.one.return_value = MutationOutcome(note=dummy_note)
     mock_db.commit.side_effect = Exception("DB error")
     with patch.object(sut.logger, "error") as mock_error:
         with pytest.raises(Exception):
-            sut.update_note("1", update, db=mock_db)
+            sut.update_note("1", update, response=Response(), db=mock_db)
         mock_error.assert_called()
-        assert "db error" in mock_error.call_args[0][0].lower()
+        assert "db error" in rendered(mock_error).lower()
 
 # --- get_note_detail ---
 def test_get_note_detail_logs_warning_when_not_found(mock_db):
-    mock_db.query.return_value.filter_by.return_value.first.return_value = None
+    mock_db.execute.return_value.first.return_value = None
     with patch.object(sut.logger, "warning") as mock_warning:
         with pytest.raises(Exception):
-            sut.get_note_detail("nonexistent", db=mock_db)
+            sut.get_note_detail("nonexistent", response=Response(), db=mock_db)
         mock_warning.assert_called_once()
-        assert "not found" in mock_warning.call_args[0][0].lower()
+        assert "not found" in rendered(mock_warning).lower()
 
 def test_get_note_detail_logs_error_on_db_error(mock_db):
-    mock_db.query.return_value.filter_by.return_value.first.side_effect = Exception("DB error")
+    mock_db.execute.return_value.first.side_effect = Exception("DB error")
     with patch.object(sut.logger, "error") as mock_error:
         with pytest.raises(Exception):
-            sut.get_note_detail("1", db=mock_db)
+            sut.get_note_detail("1", response=Response(), db=mock_db)
         mock_error.assert_called()
-        assert "db error" in mock_error.call_args[0][0].lower()
+        assert "db error" in rendered(mock_error).lower()
 
 # --- lock_note ---
 def test_lock_note_logs_warning_when_not_found(mock_db):
-    mock_db.query.return_value.filter_by.return_value.first.return_value = None
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=False)
     with patch.object(sut.logger, "warning") as mock_warning:
         with pytest.raises(Exception):
-            sut.lock_note("nonexistent", db=mock_db)
+            sut.lock_note("nonexistent", response=Response(), db=mock_db)
         mock_warning.assert_called_once()
-        assert "not found" in mock_warning.call_args[0][0].lower()
+        assert "not found" in rendered(mock_warning).lower()
 
 def test_lock_note_logs_warning_when_already_locked(mock_db):
-    dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=True)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True)
     with patch.object(sut.logger, "warning") as mock_warning:
         with pytest.raises(Exception):
-            sut.lock_note("1", db=mock_db)
+            sut.lock_note("1", response=Response(), db=mock_db)
         mock_warning.assert_called_once()
-        assert "already locked" in mock_warning.call_args[0][0].lower()
+        assert "already locked" in rendered(mock_warning).lower()
 
 def test_lock_note_logs_error_on_db_error(mock_db):
     dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=False)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.one.return_value = MutationOutcome(note=dummy_note)
     mock_db.commit.side_effect = Exception("DB error")
     with patch.object(sut.logger, "error") as mock_error:
         with pytest.raises(Exception):
-            sut.lock_note("1", db=mock_db)
+            sut.lock_note("1", response=Response(), db=mock_db)
         mock_error.assert_called()
-        assert "db error" in mock_error.call_args[0][0].lower()
+        assert "db error" in rendered(mock_error).lower()
 
 # --- delete_note ---
 def test_delete_note_logs_warning_when_not_found(mock_db):
-    mock_db.query.return_value.filter_by.return_value.first.return_value = None
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=False)
     with patch.object(sut.logger, "warning") as mock_warning:
         with pytest.raises(Exception):
             sut.delete_note("nonexistent", db=mock_db)
         mock_warning.assert_called_once()
-        assert "not found" in mock_warning.call_args[0][0].lower()
+        assert "not found" in rendered(mock_warning).lower()
 
 def test_delete_note_logs_warning_when_locked(mock_db):
-    dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=True)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=True)
     with patch.object(sut.logger, "warning") as mock_warning:
         with pytest.raises(Exception):
             sut.delete_note("1", db=mock_db)
         mock_warning.assert_called_once()
-        assert "locked" in mock_warning.call_args[0][0].lower()
+        assert "locked" in rendered(mock_warning).lower()
 
 def test_delete_note_logs_error_on_db_error(mock_db):
     dummy_note = DummyNote(uuid="1", name="Note 1", description="Desc 1", locked=False)
-    mock_db.query.return_value.filter_by.return_value.first.return_value = dummy_note
+    mock_db.execute.return_value.one.return_value = MutationOutcome(note=dummy_note)
     mock_db.commit.side_effect = Exception("DB error")
     with patch.object(sut.logger, "error") as mock_error:
         with pytest.raises(Exception):
             sut.delete_note("1", db=mock_db)
         mock_error.assert_called()
-        assert "db error" in mock_error.call_args[0][0].lower()
+        assert "db error" in rendered(mock_error).lower()
+
+def test_note_logs_carry_operation_and_uuid_attributes(mock_db):
+    mock_db.execute.return_value.one.return_value = MutationOutcome(found=False)
+    with patch.object(sut.logger, "warning") as mock_warning:
+        with pytest.raises(Exception):
+            sut.delete_note("abc", db=mock_db)
+        assert mock_warning.call_args.kwargs["extra"] == {"operation": "delete_note", "note.uuid": "abc"}
@@ -0,0 +1,55 @@
+from sqlalchemy.dialects import postgresql
+from api.services import note_statements as sut
+
+def compile_sql(stmt, params=None):
+    # Compiling with the parameter names shows what execution will send
+    column_keys = list(params) if params is not None else None
+    return " ".join(str(stmt.compile(dialect=postgresql.dialect(), column_keys=column_keys)).split())
+
+def test_update_unlocked_note_is_conditional_update_with_returning():
+    stmt, params = sut.update_unlocked_note("1", {"name": "New Name"})
+    sql = compile_sql(stmt, params)
+    assert "UPDATE notes SET name=%(new_name)s, version=(notes.version + %(version_1)s) WHERE" in sql
+    assert "notes.locked = false" in sql
+    assert "RETURNING notes.uuid, notes.name, notes.description, notes.locked" in sql
+    assert "AS current_version" in sql
+    assert "AS current_locked" in sql
+    assert params == {"note_uuid": "1", "new_name": "New Name"}
+
+def test_lock_unlocked_note_sets_locked():
+    sql = compile_sql(sut.lock_unlocked_note("1")[0])
+    assert "UPDATE notes SET locked=%(new_locked)s, version=(notes.version + %(version_1)s)" in sql
+    assert "notes.locked = false" in sql
+
+def test_delete_unlocked_note_is_conditional_delete_with_returning():
+    sql = compile_sql(sut.delete_unlocked_note("1")[0])
+    assert "DELETE FROM notes WHERE notes.uuid =" in sql
+    assert "notes.locked = false" in sql
+    assert "RETURNING" in sql
+
+def test_expected_versions_guard_the_mutation():
+    stmt, params = sut.delete_unlocked_note("1", [42])
+    sql = compile_sql(stmt)
+    assert "notes.version = ANY (%(expected_versions)s::INTEGER[])" in sql
+    assert "POSTCOMPILE" not in sql
+    assert params == {"note_uuid": "1", "expected_versions": [42]}
+
+def test_single_note_statements_are_built_once_per_shape():
+    assert sut.select_note_detail("1")[0] is sut.select_note_detail("2")[0]
+    assert sut.update_unlocked_note("1", {"name": "A"})[0] is sut.update_unlocked_note("2", {"name": "B"})[0]
+    assert sut.update_unlocked_note("1", {"name": "A"})[0] is not sut.update_unlocked_note("1", {"name": "A"}, ["7"])[0]
+    assert sut.delete_unlocked_note("1")[0] is sut.delete_unlocked_note("2")[0]
+
+def test_select_matching_notes_filters_with_index_and_orders_by_rank():
+    sql = compile_sql(sut.select_matching_notes("term", 21))
+    assert "notes.search_vector @@ websearch_to_tsquery(" in sql
+    assert "DESC, notes.id ASC" in sql
+
+def test_select_matching_notes_continues_after_cursor():
+    sql = compile_sql(sut.select_matching_notes("term", 21, (0.5, 3)))
+    assert "notes.id >" in sql
+
+def test_select_export_rows_streams_in_chunks():
+    stmt = sut.select_export_rows(500)
+    assert stmt.get_execution_options()["yield_per"] == 500
+    assert "ORDER BY notes.id ASC" in compile_sql(stmt)
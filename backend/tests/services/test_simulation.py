@@ -0,0 +1,104 @@
+import pytest
+from fastapi import HTTPException
+from unittest.mock import MagicMock
+from api.services import simulation as sut
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.execute.return_value.scalar_one.return_value = 7
+    db.execute.return_value.all.return_value = ["a", "b"]
+    return db
+
+def test_parse_query_mix_rejects_unknown_types():
+    assert sut.parse_query_mix(" count, count,filtered") == ["count", "count", "filtered"]
+    with pytest.raises(HTTPException) as exc:
+        sut.parse_query_mix("count,drop")
+    assert exc.value.status_code == 400
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert [sut.percentile(values, p) for p in (50, 95, 99)] == [50, 95, 99]
+    assert sut.percentile([4.0], 99) == 4.0
+
+def test_database_load_reports_latency_per_query_type(monkeypatch, mock_db):
+    # Arrange
+    monkeypatch.setattr(sut.time, "sleep", lambda seconds: None)
+
+    # Act
+    result = sut.simulate_database_load(queries=5, concurrency=1, mix="count,ordered,filtered", pause=0.1, db=mock_db)
+
+    # Assert
+    assert result["queries_executed"] == 5
+    assert result["sample_results"] == [
+        "count_0: 7", "ordered_1: 2 notes", "filtered_2: 7 unlocked notes", "count_3: 7", "ordered_4: 2 notes",
+    ]
+    assert {name: stats["count"] for name, stats in result["latency_ms"].items()} == {"count": 2, "ordered": 2, "filtered": 1}
+    assert set(result["latency_ms"]["count"]) == {"count", "p50", "p95", "p99"}
+    assert result["throughput_qps"] > 0
+
+def test_database_load_uses_a_session_per_worker(monkeypatch, mock_db):
+    # Arrange
+    session_local = MagicMock()
+    session_local.return_value.__enter__.return_value = mock_db
+    monkeypatch.setattr(sut, "SessionLocal", session_local)
+    request_db = MagicMock()
+
+    # Act
+    result = sut.simulate_database_load(queries=8, concurrency=4, mix="count", pause=0, db=request_db)
+
+    # Assert
+    assert session_local.call_count == 4
+    assert mock_db.execute.call_count == 8
+    request_db.execute.assert_not_called()
+    assert result["concurrency"] == 4
+    assert result["sample_results"] == [f"count_{i}: 7" for i in range(5)]
+
+def test_database_load_db_error(mock_db):
+    # Arrange
+    mock_db.execute.side_effect = Exception("DB error")
+
+    # Act / Assert
+    with pytest.raises(HTTPException) as exc:
+        sut.simulate_database_load(queries=3, concurrency=1, pause=0, db=mock_db)
+    assert exc.value.status_code == 500
+
+@pytest.mark.parametrize("allocation", ["bytearray", "mmap"])
+def test_exact_allocations_touch_every_page(allocation):
+    # Act
+    buffer = sut.allocate(2, allocation)
+
+    # Assert
+    assert len(buffer) == 2 * 1024 * 1024
+    assert buffer[0] == 1 and buffer[len(buffer) - 1] == 0
+    sut.release(buffer)
+
+def test_memory_simulation_reports_memory(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(sut.time, "sleep", lambda seconds: None)
+
+    # Act
+    result = sut.simulate_memory_intensive(size_mb=8, allocation="bytearray", hold=0)
+
+    # Assert
+    assert result["allocation"] == "bytearray"
+    assert result["tracemalloc_peak_mb"] >= 8
+    if result["rss_before_mb"] is not None:
+        assert result["rss_allocated_mb"] - result["rss_before_mb"] >= 7
+    assert result["release_seconds"] >= 0
+
+def test_memory_pressure_holds_up_to_the_cap(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(sut, "held_memory", sut.held_memory.__class__(cap_mb=3))
+
+    # Act
+    first = sut.add_memory_pressure(size_mb=2, allocation="bytearray")
+    with pytest.raises(HTTPException) as exc:
+        sut.add_memory_pressure(size_mb=2, allocation="bytearray")
+    released = sut.release_memory_pressure()
+
+    # Assert
+    assert first["held_mb"] == 2
+    assert exc.value.status_code == 409
+    assert released["released_mb"] == 2
+    assert released["held_mb"] == 0
@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, MagicMock
+from api.services import simulation_async as sut
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.scalar = AsyncMock(return_value=7)
+    db.execute = AsyncMock(return_value=MagicMock(
+        scalar_one=MagicMock(return_value=7), all=MagicMock(return_value=["a", "b"])
+    ))
+    return db
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+
+    async def fake_sleep(seconds):
+        recorded.append(seconds)
+    monkeypatch.setattr(sut.asyncio, "sleep", fake_sleep)
+    return recorded
+
+def test_slow_response_waits_on_the_event_loop(mock_db, sleeps):
+    # Act
+    result = asyncio.run(sut.simulate_slow_response(delay=3, db=mock_db))
+
+    # Assert
+    assert sleeps == [3]
+    assert result["requested_delay"] == 3
+    assert result["note_count"] == 7
+
+def test_slow_response_db_error(mock_db, sleeps):
+    # Arrange
+    mock_db.scalar.side_effect = Exception("DB error")
+
+    # Act / Assert
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(sut.simulate_slow_response(delay=1, db=mock_db))
+    assert exc.value.status_code == 500
+
+def test_database_load_runs_the_query_mix(mock_db, sleeps):
+    # Act
+    result = asyncio.run(sut.simulate_database_load(queries=4, db=mock_db))
+
+    # Assert
+    assert result["queries_executed"] == 4
+    assert result["sample_results"] == ["count_0: 7", "ordered_1: 2 notes", "filtered_2: 7 unlocked notes", "count_3: 7"]
+    assert sleeps == [0.1] * 4
+    assert result["latency_ms"]["count"]["count"] == 2
+
+def test_database_load_fans_out_over_sessions(monkeypatch, mock_db, sleeps):
+    # Arrange
+    opened = []
+
+    class FakeSessionLocal:
+        async def __aenter__(self):
+            opened.append(self)
+            return mock_db
+
+        async def __aexit__(self, *exc):
+            return False
+    monkeypatch.setattr(sut, "AsyncSessionLocal", FakeSessionLocal)
+
+    # Act
+    result = asyncio.run(sut.simulate_database_load(queries=6, concurrency=3, mix="count", pause=0, db=MagicMock()))
+
+    # Assert
+    assert len(opened) == 3
+    assert mock_db.execute.await_count == 6
+    assert result["sample_results"][0] == "count_0: 7"
+
+def test_timeout_without_timeout(sleeps):
+    # Act
+    result = asyncio.run(sut.simulate_timeout(timeout_chance=0.0))
+
+    # Assert
+    assert 0.5 <= sleeps[0] <= 2.0
+    assert result["actual_delay"] == round(sleeps[0], 2)
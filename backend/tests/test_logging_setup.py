@@ -0,0 +1,106 @@
+import logging
+import queue
+import pytest
+from opentelemetry import context as otel_context
+from api import logging_setup as sut
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def emit(self, record):
+        self.seen.append((record.getMessage(), otel_context.get_value("marker")))
+
+def make_record(name="api.services.note", level=logging.INFO, msg="Fetching note %s", args=("abc",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+@pytest.fixture
+def drops(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(sut.dropped_records, "add", lambda amount, attributes: recorded.append(attributes))
+    return recorded
+
+def test_parse_rate_limits():
+    assert sut.parse_rate_limits(" api.services.note=100, api=2.5 ,") == {"api.services.note": 100.0, "api": 2.5}
+
+def test_rate_limit_filter_caps_info_per_logger_and_refills(drops):
+    # Arrange
+    clock = FakeClock()
+    limiter = sut.RateLimitFilter({"api.services": 2}, clock=clock)
+
+    # Act
+    burst = [limiter.filter(make_record()) for _ in range(3)]
+    clock.now = 0.5
+    refilled = limiter.filter(make_record())
+
+    # Assert
+    assert burst == [True, True, False]
+    assert refilled is True
+    assert drops == [{"logger": "api.services", "reason": "rate_limit"}]
+
+def test_rate_limit_filter_ignores_warnings_and_other_loggers(drops):
+    # Arrange
+    limiter = sut.RateLimitFilter({"api.services.note": 1}, clock=FakeClock())
+
+    # Act
+    warnings = [limiter.filter(make_record(level=logging.WARNING)) for _ in range(3)]
+    others = [limiter.filter(make_record(name="api.cache")) for _ in range(3)]
+
+    # Assert
+    assert all(warnings) and all(others)
+    assert drops == []
+
+def test_queue_handler_defers_formatting_and_captures_context():
+    # Arrange
+    handler = sut.ContextQueueHandler(queue.Queue())
+    record = make_record()
+    token = otel_context.attach(otel_context.set_value("marker", "request-1"))
+
+    # Act
+    try:
+        handler.handle(record)
+    finally:
+        otel_context.detach(token)
+
+    # Assert
+    queued = handler.queue.get_nowait()
+    assert queued.msg == "Fetching note %s" and queued.args == ("abc",)
+    assert otel_context.get_value("marker", queued.otel_context) == "request-1"
+
+def test_queue_handler_drops_and_counts_when_full(drops):
+    # Arrange
+    handler = sut.ContextQueueHandler(queue.Queue(1))
+
+    # Act
+    handler.handle(make_record())
+    handler.handle(make_record())
+
+    # Assert
+    assert handler.queue.qsize() == 1
+    assert drops == [{"logger": "api.services.note", "reason": "queue_full"}]
+
+def test_listener_emits_with_the_logging_threads_context():
+    # Arrange
+    handler = sut.ContextQueueHandler(queue.Queue())
+    recording = RecordingHandler()
+    listener = sut.ContextQueueListener(handler.queue, recording)
+    token = otel_context.attach(otel_context.set_value("marker", "request-1"))
+    try:
+        handler.handle(make_record())
+    finally:
+        otel_context.detach(token)
+
+    # Act
+    listener.start()
+    listener.stop()
+
+    # Assert
+    assert recording.seen == [("Fetching note abc", "request-1")]
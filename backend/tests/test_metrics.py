@@ -0,0 +1,95 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.trace import format_trace_id
+from api import metrics as sut
+
+@pytest.fixture
+def reader(monkeypatch):
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader], views=sut.metric_views()).get_meter(__name__)
+    monkeypatch.setattr(sut, "request_durations", {
+        group: meter.create_histogram(f"{group}.request.duration", unit="ms") for group in sut.ROUTE_GROUP_BUCKETS_MS
+    })
+    return reader
+
+@pytest.fixture
+def traced():
+    # Stands in for the FastAPI instrumentation: a request span around the middleware stack
+    tracer = TracerProvider().get_tracer(__name__)
+    spans = []
+
+    def wrap(asgi_app):
+        async def app(scope, receive, send):
+            if scope["type"] != "http":
+                await asgi_app(scope, receive, send)
+                return
+            with tracer.start_as_current_span("request") as span:
+                spans.append(span)
+                await asgi_app(scope, receive, send)
+        return app
+    wrap.spans = spans
+    return wrap
+
+@pytest.fixture
+def client(traced):
+    app = FastAPI()
+    app.add_middleware(sut.RequestMetricsMiddleware)
+
+    @app.get("/notes/{uuid}")
+    def note(uuid: str):
+        if uuid == "missing":
+            raise HTTPException(status_code=404)
+        return {"uuid": uuid}
+
+    @app.get("/simulation/slow")
+    def slow():
+        return {}
+
+    @app.get("/test")
+    def other():
+        return {}
+
+    return TestClient(traced(app))
+
+def histograms(reader):
+    data = reader.get_metrics_data()
+    return {
+        metric.name: metric.data.data_points
+        for resource in data.resource_metrics
+        for scope in resource.scope_metrics
+        for metric in scope.metrics
+    }
+
+def test_route_group():
+    assert sut.route_group("/notes/{uuid}") == "notes"
+    assert sut.route_group("/simulation/slow") == "simulation"
+    assert sut.route_group("/test") is None
+
+def test_requests_are_recorded_per_route_group_with_their_buckets(reader, client):
+    # Act
+    client.get("/notes/abc")
+    client.get("/notes/missing")
+    client.get("/simulation/slow")
+    client.get("/test")
+
+    # Assert
+    recorded = histograms(reader)
+    assert set(recorded) == {"notes.request.duration", "simulation.request.duration"}
+    notes = {point.attributes["http.response.status_code"]: point for point in recorded["notes.request.duration"]}
+    assert set(notes) == {200, 404}
+    assert notes[200].attributes["http.route"] == "/notes/{uuid}"
+    assert notes[200].explicit_bounds == sut.ROUTE_GROUP_BUCKETS_MS["notes"]
+    assert recorded["simulation.request.duration"][0].explicit_bounds == sut.ROUTE_GROUP_BUCKETS_MS["simulation"]
+
+def test_durations_carry_the_request_trace_as_exemplar(reader, client, traced):
+    # Act
+    client.get("/notes/abc")
+
+    # Assert
+    (point,) = histograms(reader)["notes.request.duration"]
+    (exemplar,) = point.exemplars
+    assert format_trace_id(exemplar.trace_id) == format_trace_id(traced.spans[0].get_span_context().trace_id)
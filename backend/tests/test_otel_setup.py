@@ -0,0 +1,88 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from fastapi import FastAPI
+from api import otel_setup as sut
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+@pytest.fixture
+def calls(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(sut, "setup_otel_providers", lambda: recorded.append("providers"))
+    monkeypatch.setattr(sut, "setup_otel_http_instrumentation", lambda app: recorded.append("http"))
+    return recorded
+
+def run_lifespan(mode, app=None):
+    async def run():
+        async with sut.telemetry_lifespan(app or FastAPI(), mode):
+            await asyncio.sleep(0)
+    asyncio.run(run())
+
+def test_importing_app_does_not_load_exporters():
+    # Act
+    result = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, api.main; print(any(m.startswith('opentelemetry.exporter') for m in sys.modules))"],
+        cwd=BACKEND_DIR, env={**os.environ, "TELEMETRY_MODE": "enabled"},
+        capture_output=True, text=True, timeout=60,
+    )
+
+    # Assert
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
+
+def test_enabled_sets_up_telemetry_before_startup_completes(calls):
+    # Act
+    run_lifespan("enabled")
+
+    # Assert
+    assert calls == ["providers", "http"]
+
+def test_disabled_sets_up_nothing(calls):
+    # Act
+    run_lifespan("disabled")
+
+    # Assert
+    assert calls == []
+
+def test_deferred_does_not_block_startup(monkeypatch, calls):
+    # Arrange
+    release = threading.Event()
+    monkeypatch.setattr(sut, "setup_otel_providers", lambda: release.wait(5) and calls.append("providers"))
+
+    async def run():
+        async with sut.telemetry_lifespan(FastAPI(), "deferred"):
+            # Startup has finished while the providers are still being set up
+            assert calls == []
+            release.set()
+            for _ in range(100):
+                if "http" in calls:
+                    break
+                await asyncio.sleep(0.01)
+
+    # Act
+    asyncio.run(run())
+
+    # Assert
+    assert calls == ["providers", "http"]
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        run_lifespan("sometimes")
+
+def test_http_instrumentation_rebuilds_started_middleware_stack():
+    # Arrange
+    app = FastAPI()
+    app.middleware_stack = app.build_middleware_stack()
+    started_stack = app.middleware_stack
+
+    # Act
+    sut.setup_otel_http_instrumentation(app)
+
+    # Assert
+    assert app._is_instrumented_by_opentelemetry is True
+    assert app.middleware_stack is not started_stack
@@ -0,0 +1,71 @@
+import os
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api import profiling as sut
+
+def busy_handler_work():
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        pass
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(sut, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(sut, "PROFILING_TOKEN", "secret")
+    app = FastAPI()
+    app.add_middleware(sut.ProfilingMiddleware, token="secret", interval_ms=1)
+    app.include_router(sut.router)
+
+    @app.get("/work")
+    def work():
+        busy_handler_work()
+        return {"ok": True}
+
+    return TestClient(app)
+
+def test_requests_without_the_token_are_not_profiled(client, tmp_path):
+    # Act
+    response = client.get("/work", headers={"X-Profile-Token": "wrong"})
+
+    # Assert
+    assert response.status_code == 200
+    assert sut.PROFILE_ID_HEADER not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+def test_profiled_request_stores_a_speedscope_profile(client):
+    # Act
+    response = client.get("/work", headers={"X-Profile-Token": "secret"})
+    profile_id = response.headers[sut.PROFILE_ID_HEADER]
+    profile = client.get(f"/profiles/{profile_id}", headers={"X-Profile-Token": "secret"}).json()
+    collapsed = client.get(f"/profiles/{profile_id}", params={"format": "collapsed"},
+                           headers={"X-Profile-Token": "secret"}).text
+
+    # Assert
+    assert response.json() == {"ok": True}
+    assert profile["profiles"] and all(p["type"] == "sampled" for p in profile["profiles"])
+    assert "busy_handler_work" in {frame["name"] for frame in profile["shared"]["frames"]}
+    assert any("busy_handler_work (test_profiling.py" in line for line in collapsed.splitlines())
+
+def test_profiles_need_the_token(client):
+    # Arrange
+    profile_id = client.get("/work", headers={"X-Profile-Token": "secret"}).headers[sut.PROFILE_ID_HEADER]
+
+    # Act / Assert
+    assert client.get(f"/profiles/{profile_id}").status_code == 403
+    assert client.get("/profiles/not-an-id", headers={"X-Profile-Token": "secret"}).status_code == 404
+
+def test_storing_a_profile_prunes_the_oldest(monkeypatch, tmp_path):
+    # Arrange
+    monkeypatch.setattr(sut, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(sut, "PROFILING_MAX_FILES", 2)
+    for age, profile_id in enumerate(["newer", "older"], start=1):
+        sut.store_profile(profile_id, {})
+        os.utime(sut.profile_path(profile_id), (time.time() - age * 60,) * 2)
+
+    # Act
+    sut.store_profile("newest", {})
+
+    # Assert
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["newer.speedscope.json", "newest.speedscope.json"]
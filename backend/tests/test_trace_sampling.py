@@ -0,0 +1,92 @@
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import NonRecordingSpan, SpanContext, SpanKind, Status, StatusCode, TraceFlags, set_span_in_context
+from api import trace_sampling as sut
+
+@pytest.fixture
+def counted(monkeypatch):
+    recorded = {"dropped": [], "kept": []}
+    monkeypatch.setattr(sut.dropped_spans, "add", lambda amount, attributes: recorded["dropped"].append(attributes["reason"]))
+    monkeypatch.setattr(sut.kept_spans, "add", lambda amount, attributes: recorded["kept"].append(attributes["reason"]))
+    return recorded
+
+def make_tracer(ratio, sample_errors=True, slow_ms=0):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=sut.build_sampler(ratio, sample_errors, slow_ms))
+    processor = sut.SampledSpanProcessor(exporter, sample_errors=sample_errors, slow_ms=slow_ms)
+    provider.add_span_processor(processor)
+    return provider.get_tracer(__name__), processor, exporter
+
+def test_full_ratio_exports_every_span(counted):
+    # Arrange
+    tracer, processor, exporter = make_tracer(1.0)
+
+    # Act
+    with tracer.start_as_current_span("GET /notes", kind=SpanKind.SERVER):
+        with tracer.start_as_current_span("SELECT"):
+            pass
+    processor.force_flush()
+
+    # Assert
+    assert [span.name for span in exporter.get_finished_spans()] == ["SELECT", "GET /notes"]
+    assert counted == {"dropped": [], "kept": []}
+
+def test_unsampled_request_drops_children_and_keeps_errors(counted):
+    # Arrange
+    tracer, processor, exporter = make_tracer(0.0)
+
+    # Act
+    with tracer.start_as_current_span("GET /notes/{uuid}", kind=SpanKind.SERVER) as request_span:
+        with tracer.start_as_current_span("SELECT") as query_span:
+            assert not query_span.is_recording()
+        request_span.set_status(Status(StatusCode.ERROR))
+    with tracer.start_as_current_span("GET /notes", kind=SpanKind.SERVER):
+        pass
+    processor.force_flush()
+
+    # Assert
+    exported = exporter.get_finished_spans()
+    assert [span.name for span in exported] == ["GET /notes/{uuid}"]
+    assert exported[0].context.trace_flags.sampled
+    assert counted == {"dropped": ["parent", "ratio"], "kept": ["error"]}
+
+def test_slow_requests_are_kept_outside_the_ratio(counted):
+    # Arrange
+    tracer, processor, exporter = make_tracer(0.0, sample_errors=False, slow_ms=500)
+
+    # Act
+    tracer.start_span("slow", kind=SpanKind.SERVER, start_time=0).end(end_time=600_000_000)
+    tracer.start_span("fast", kind=SpanKind.SERVER, start_time=0).end(end_time=100_000_000)
+    processor.force_flush()
+
+    # Assert
+    assert [span.name for span in exporter.get_finished_spans()] == ["slow"]
+    assert counted == {"dropped": ["ratio"], "kept": ["slow"]}
+
+def test_without_rules_unsampled_requests_are_not_recorded(counted):
+    # Arrange
+    tracer, _, _ = make_tracer(0.0, sample_errors=False)
+
+    # Act
+    span = tracer.start_span("GET /notes", kind=SpanKind.SERVER)
+
+    # Assert
+    assert not span.is_recording()
+    assert counted["dropped"] == ["ratio"]
+
+def test_remote_parent_decision_is_followed(counted):
+    # Arrange
+    tracer, _, _ = make_tracer(0.0)
+    sampled_parent = NonRecordingSpan(SpanContext(1, 2, is_remote=True, trace_flags=TraceFlags(TraceFlags.SAMPLED)))
+
+    # Act
+    span = tracer.start_span("GET /notes", context=set_span_in_context(sampled_parent), kind=SpanKind.SERVER)
+
+    # Assert
+    assert span.context.trace_flags.sampled
+    assert counted["dropped"] == []
+
+def test_ratio_out_of_range_is_rejected():
+    with pytest.raises(ValueError):
+        sut.build_sampler(1.5)